@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import config
+from app.utils.startup_profile import StartupProfile, profiling_enabled
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -20,46 +21,56 @@ cors = CORS()
 def create_app(config_name=None):
     """Application factory pattern."""
     
-    app = Flask(__name__)
-    
-    # Configuration
-    config_name = config_name or os.environ.get('FLASK_ENV', 'development')
-    app.config.from_object(config[config_name])
-    
-    # Initialize extensions with app
-    db.init_app(app)
-    migrate.init_app(app, db)
-    jwt.init_app(app)
-    
-    # Enhanced CORS configuration using config
-    cors.init_app(app, 
-                  origins=app.config['CORS_ORIGINS'],
-                  methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-                  allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
-                  supports_credentials=True,
-                  expose_headers=['Content-Type', 'Authorization'])
-    
-    # Import models (needed for migrations)
-    from app.models import user, order, manifest_email, audit_log, rbac, email_config
-    
-    # Register CLI commands
-    from app import cli
-    cli.init_app(app)
-    
-    # Register blueprints
-    from app.routes.auth import auth_bp
-    from app.routes.manifest import manifest_bp
-    from app.routes.orders import orders_bp
-    from app.routes.rbac import rbac_bp
-    from app.routes.email_config import bp as email_config_bp
-    from app.routes.users import users_bp
-    
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(manifest_bp, url_prefix='/api/manifest')
-    app.register_blueprint(orders_bp, url_prefix='/api/orders')
-    app.register_blueprint(rbac_bp, url_prefix='/api/rbac')
-    app.register_blueprint(email_config_bp)
-    app.register_blueprint(users_bp, url_prefix='/api/admin')
+    profile = StartupProfile()
+    
+    with profile.phase('config'):
+        app = Flask(__name__)
+        
+        # Configuration
+        config_name = config_name or os.environ.get('FLASK_ENV', 'development')
+        app.config.from_object(config[config_name])
+    
+    with profile.phase('extensions'):
+        # Initialize extensions with app
+        db.init_app(app)
+        migrate.init_app(app, db)
+        jwt.init_app(app)
+        
+        # Enhanced CORS configuration using config
+        cors.init_app(app, 
+                      origins=app.config['CORS_ORIGINS'],
+                      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+                      allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
+                      supports_credentials=True,
+                      expose_headers=['Content-Type', 'Authorization'])
+    
+    with profile.phase('models'):
+        # Import models (needed for migrations)
+        from app.models import user, order, manifest_email, audit_log, rbac, email_config, change_counter
+        from app.services import order_rollup  # keeps order_daily_stats in step with orders
+        from app.services import order_search  # keeps order_search_tokens in step with orders
+        from app.services import change_counters  # versions orders/manifest_emails for ETags
+    
+    with profile.phase('cli'):
+        # Register CLI commands
+        from app import cli
+        cli.init_app(app)
+    
+    with profile.phase('blueprints'):
+        # Register blueprints (route modules load services on first use)
+        from app.routes.auth import auth_bp
+        from app.routes.manifest import manifest_bp
+        from app.routes.orders import orders_bp
+        from app.routes.rbac import rbac_bp
+        from app.routes.email_config import bp as email_config_bp
+        from app.routes.users import users_bp
+        
+        app.register_blueprint(auth_bp, url_prefix='/api/auth')
+        app.register_blueprint(manifest_bp, url_prefix='/api/manifest')
+        app.register_blueprint(orders_bp, url_prefix='/api/orders')
+        app.register_blueprint(rbac_bp, url_prefix='/api/rbac')
+        app.register_blueprint(email_config_bp)
+        app.register_blueprint(users_bp, url_prefix='/api/admin')
     
     # Additional CORS handling
     @app.after_request
@@ -130,10 +141,19 @@ def create_app(config_name=None):
     def missing_token_callback(error):
         return {'error': 'Authorization token is required'}, 401
     
+    app.extensions['startup_profile'] = profile
+    if profiling_enabled():
+        print(profile.report())
+    
     return app
 
-# Create application instance
-app = create_app()
-
-if __name__ == '__main__':
-    app.run(debug=True)
+def __getattr__(name):
+    """Build `app.app` on first access only (kept for `gunicorn app:app`).
+    
+    Importing the package no longer creates an application; scripts, tests
+    and migrations call create_app() themselves.
+    """
+    if name == 'app':
+        application = globals()['app'] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,8 @@
 """
 Database initialization commands.
 """
+import signal
+import threading
 import click
 from flask import current_app
 from flask.cli import with_appcontext
@@ -118,6 +120,88 @@ def reset_db():
     else:
         click.echo('Operation cancelled.')
 
+@click.command('imap-worker')
+@click.option('--shard', default='0/1', show_default=True,
+              help='Shard handled by this process, as i/N (e.g. 0/4).')
+@click.option('--mode', type=click.Choice(['continuous', 'regular', 'both']),
+              default='continuous', show_default=True, help='Monitor mode(s) to run.')
+@click.option('--interval', type=int, default=None,
+              help='Continuous polling interval in seconds (default 5).')
+@with_appcontext
+def imap_worker(shard, mode, interval):
+    """Run the IMAP monitor for one shard of the active mailboxes."""
+    from app.services.imap_monitor import IMAPMonitorService
+    from app.services.imap_sharding import ShardAssignment
+
+    try:
+        assignment = ShardAssignment.parse(shard)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--shard')
+
+    # Own service instance: its scheduler thread pushes its own app context,
+    # so it also gets its own DB session
+    service = IMAPMonitorService()
+    service.assign_shard(assignment)
+
+    if mode in ('regular', 'both'):
+        service.start_monitoring(current_app.config.get('EMAIL_CHECK_INTERVAL', 300))
+    if mode in ('continuous', 'both'):
+        service.start_continuous_monitoring(interval or 5)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    click.echo(f'IMAP worker running shard {assignment.label} ({mode}). Press Ctrl+C to stop.')
+    try:
+        while not stop.is_set() and service.scheduler_thread.is_alive():
+            stop.wait(1)
+    except KeyboardInterrupt:
+        pass
+
+    service.stop_monitoring()
+    service.stop_continuous_monitoring()
+    service.scheduler_thread.join(timeout=service.socket_timeout)
+    service.heartbeat_thread.join(timeout=service.socket_timeout)  # releases the lease
+    click.echo(f'IMAP worker shard {assignment.label} stopped.')
+
+@click.command('rebuild-order-stats')
+@click.option('--batch-size', type=int, default=1000, show_default=True,
+              help='Orders read (and rollup rows written) per batch.')
+@with_appcontext
+def rebuild_order_stats(batch_size):
+    """Recompute the order_daily_stats rollup from the orders table."""
+    from app.services.order_rollup import rebuild
+    from app.models.order import OrderDailyStat
+
+    orders = rebuild(batch_size=batch_size)
+    click.echo(f'Rebuilt order_daily_stats: {orders} orders in {OrderDailyStat.query.count()} rows.')
+
+@click.command('rebuild-order-search')
+@click.option('--batch-size', type=int, default=1000, show_default=True,
+              help='Orders read (and token rows written) per batch.')
+@with_appcontext
+def rebuild_order_search(batch_size):
+    """Recompute the order_search_tokens index from the orders table."""
+    from app.services.order_search import rebuild
+    from app.models.order import OrderSearchToken
+
+    orders = rebuild(batch_size=batch_size)
+    click.echo(f'Rebuilt order_search_tokens: {orders} orders, {OrderSearchToken.query.count()} tokens.')
+
+@click.command('prune-processed-emails')
+@click.option('--days', type=int, default=None,
+              help='Keep rows this many days old or newer [default: IMAP_DEDUP_RETENTION_DAYS].')
+@with_appcontext
+def prune_processed_emails(days):
+    """Delete processed_emails rows older than the retention period."""
+    from app.services.dedup_store import MIN_RETENTION_DAYS, ProcessedEmailStore
+
+    days = current_app.config.get('IMAP_DEDUP_RETENTION_DAYS', 7) if days is None else days
+    if days < MIN_RETENTION_DAYS:
+        raise click.BadParameter(f'must be at least {MIN_RETENTION_DAYS} (the monitors search back to yesterday)',
+                                 param_hint='--days')
+    deleted = ProcessedEmailStore().prune(days)
+    click.echo(f'Pruned processed_emails: {deleted} rows older than {days} days.')
+
 def init_app(app):
     """Register CLI commands with the Flask app."""
     app.cli.add_command(init_db)
@@ -126,3 +210,7 @@ def init_app(app):
     app.cli.add_command(assign_role)
     app.cli.add_command(list_users)
     app.cli.add_command(reset_db)
+    app.cli.add_command(imap_worker)
+    app.cli.add_command(rebuild_order_stats)
+    app.cli.add_command(rebuild_order_search)
+    app.cli.add_command(prune_processed_emails)
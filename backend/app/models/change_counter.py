@@ -0,0 +1,18 @@
+"""
+Per-table change counters, used to derive ETags for list and stats reads.
+"""
+from app import db
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, String
+
+
+class ChangeCounter(db.Model):
+    """Bumped once by every transaction that writes to the table it names."""
+    __tablename__ = 'change_counters'
+    
+    table_name = Column(String(100), primary_key=True)  # e.g. 'orders'
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ChangeCounter {self.table_name}: {self.version}>'
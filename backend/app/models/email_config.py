@@ -3,7 +3,7 @@ Email configuration models for IMAP monitoring.
 """
 from app import db
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON
 from app.utils.encryption import email_password_manager
 
 class EmailConfig(db.Model):
@@ -19,10 +19,12 @@ class EmailConfig(db.Model):
     use_ssl = Column(Boolean, default=True)  # Use SSL/TLS
     use_starttls = Column(Boolean, default=False)  # Use STARTTLS
     folder = Column(String(100), default='INBOX')  # IMAP folder to monitor
+    folders = Column(JSON, nullable=True)  # Extra folders checked in the same IMAP session
     
     # Email filtering settings
     subject_filter = Column(String(255), nullable=True)  # Filter by subject
     sender_filter = Column(String(255), nullable=True)  # Filter by sender
+    body_filter = Column(String(255), nullable=True)  # Keyword that must appear in the body (IMAP BODY search)
     attachment_filter = Column(String(100), nullable=True)  # Filter by attachment type
     
     # Status and monitoring
@@ -51,6 +53,15 @@ class EmailConfig(db.Model):
         except Exception:
             return False
     
+    @property
+    def monitored_folders(self):
+        """Main folder followed by the extra folders, without duplicates."""
+        extra = self.folders or []
+        if isinstance(extra, str):
+            extra = [extra]  # stored before the routes validated the field
+        folders = [self.folder or 'INBOX'] + list(extra)
+        return list(dict.fromkeys(f.strip() for f in folders if f and f.strip()))
+    
     def to_dict(self, include_sensitive=False):
         """Convert to dictionary."""
         data = {
@@ -62,8 +73,10 @@ class EmailConfig(db.Model):
             'use_ssl': self.use_ssl,
             'use_starttls': self.use_starttls,
             'folder': self.folder,
+            'folders': self.folders or [],
             'subject_filter': self.subject_filter,
             'sender_filter': self.sender_filter,
+            'body_filter': self.body_filter,
             'attachment_filter': self.attachment_filter,
             'is_active': self.is_active,
             'last_check': self.last_check.isoformat() if self.last_check else None,
@@ -102,6 +115,9 @@ class EmailConfig(db.Model):
 class EmailLog(db.Model):
     """Log of email monitoring activities."""
     __tablename__ = 'email_logs'
+    __table_args__ = (
+        db.Index('ix_email_logs_config_created_at_id', 'config_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     config_id = Column(Integer, db.ForeignKey('email_configs.id'), nullable=False)
@@ -154,3 +170,57 @@ class EmailLog(db.Model):
     
     def __repr__(self):
         return f'<EmailLog {self.action}: {self.status}>'
+
+
+class ProcessedEmail(db.Model):
+    """Messages already handled by the monitor, keyed by Message-ID or UID."""
+    __tablename__ = 'processed_emails'
+    __table_args__ = (
+        db.UniqueConstraint('config_id', 'message_key', name='uq_processed_emails_config_key'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    config_id = Column(Integer, db.ForeignKey('email_configs.id', ondelete='CASCADE'), nullable=False)
+    message_key = Column(String(255), nullable=False)  # Message-ID header, or 'uid:<UID>' when missing
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # pruned past IMAP_DEDUP_RETENTION_DAYS
+    
+    @staticmethod
+    def find_existing(config_id, message_keys):
+        """Return the subset of message_keys already stored (one query)."""
+        if not message_keys:
+            return set()
+        rows = db.session.query(ProcessedEmail.message_key).filter(
+            ProcessedEmail.config_id == config_id,
+            ProcessedEmail.message_key.in_(list(message_keys))
+        ).all()
+        return {row[0] for row in rows}
+    
+    def __repr__(self):
+        return f'<ProcessedEmail {self.config_id}: {self.message_key}>'
+
+
+class MonitorLease(db.Model):
+    """Leader lease: the process holding it is the only one running monitors."""
+    __tablename__ = 'monitor_leases'
+    
+    name = Column(String(50), primary_key=True)  # e.g. 'imap_monitor'
+    holder = Column(String(255), nullable=False)  # host:pid:token of the leader process
+    acquired_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    stopped_modes = Column(String(50), nullable=True)  # comma-separated modes an admin stopped, e.g. 'continuous'
+    
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'stopped_modes': self.stopped_modes.split(',') if self.stopped_modes else [],
+            'expired': self.expires_at < datetime.utcnow() if self.expires_at else True
+        }
+    
+    def __repr__(self):
+        return f'<MonitorLease {self.name}: {self.holder}>'
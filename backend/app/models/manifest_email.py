@@ -5,6 +5,9 @@ class ManifestEmail(db.Model):
     """Model for storing received manifest emails."""
     
     __tablename__ = 'manifest_emails'
+    __table_args__ = (
+        db.Index('ix_manifest_emails_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -1,12 +1,31 @@
 from datetime import datetime
 from app import db
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import text
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app.utils.text import normalize_name
+
+# Critical fields checked by Order.check_missing_data(); bit i of missing_data_mask is flag i
+MISSING_DATA_FLAGS = ('pickup_time', 'pickup_location', 'contact_phone', 'passenger_names', 'vehicle_model')
+
+
+def missing_data_mask(flags):
+    """Bitmask of missing-data flag names (ValueError on an unknown name)."""
+    mask = 0
+    for flag in flags or []:
+        if flag not in MISSING_DATA_FLAGS:
+            raise ValueError(f'Unknown missing-data flag: {flag}')
+        mask |= 1 << MISSING_DATA_FLAGS.index(flag)
+    return mask
 
 class Order(db.Model):
     """Order model representing parsed manifest services."""
     
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Keyset pagination of the orders list (newest service date first)
+        db.Index('ix_orders_service_date_created_at_id', 'service_date', 'created_at', 'id'),
+    )
     
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
@@ -60,6 +79,7 @@ class Order(db.Model):
     
     # Flags for issues
     missing_data_flags = db.Column(db.JSON)  # Array of missing data types
+    missing_data_mask = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)  # same flags as bits
     has_errors = db.Column(db.Boolean, default=False)
     requires_attention = db.Column(db.Boolean, default=False)
     
@@ -85,18 +105,24 @@ class Order(db.Model):
     approved_by = db.relationship('User', backref='approved_orders')
     source_manifest = db.relationship('ManifestEmail', backref='orders')
     audit_logs = db.relationship('AuditLog', backref='order', lazy='dynamic')
+    passengers = db.relationship('OrderPassenger', backref='order', order_by='OrderPassenger.position',
+                                 cascade='all, delete-orphan')
     
     def __init__(self, service_id, action, service_date, service_type, **kwargs):
         self.service_id = service_id
         self.action = action
         self.service_date = service_date
         self.service_type = service_type
+        passenger_types = kwargs.pop('passenger_types', None)
         
         # Set other attributes from kwargs
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         
+        if self.passenger_names:
+            self.set_passengers(self.passenger_names, passenger_types)
+        
         # Initialize missing data flags
         self.missing_data_flags = []
         self.check_missing_data()
@@ -118,10 +144,48 @@ class Order(db.Model):
             missing.append('vehicle_model')
         
         self.missing_data_flags = missing
+        self.missing_data_mask = missing_data_mask(missing)
         self.requires_attention = len(missing) > 0
         
         return missing
     
+    @classmethod
+    def missing_all(cls, flags):
+        """Filter for orders missing every flag in `flags`.
+        
+        Spelled as `missing_data_mask IN (every superset of the mask)` - at
+        most 2^5 values - so it is a seek on the mask index rather than a
+        bitwise AND evaluated per row.
+        """
+        mask = missing_data_mask(flags)
+        return cls.missing_data_mask.in_([
+            value for value in range(1 << len(MISSING_DATA_FLAGS)) if value & mask == mask
+        ])
+    
+    def set_passengers(self, names, types=None):
+        """Set passenger_names and the matching order_passengers rows.
+        
+        types: 'adult'/'child' per name; when unknown (or not one per name),
+        the first passenger_count_adults names are taken as adults.
+        """
+        names = list(names or [])
+        if types is None or len(types) != len(names):
+            adults = self.passenger_count_adults or 0
+            types = ['adult' if position < adults else 'child' for position in range(len(names))]
+        self.passenger_names = names
+        
+        # Update rows in place by position, so no (order_id, position) key is re-inserted
+        rows = list(self.passengers)
+        for position, (name, passenger_type) in enumerate(zip(names, types)):
+            if position < len(rows):
+                rows[position].set_name(name, passenger_type)
+            else:
+                passenger = OrderPassenger(position=position)
+                passenger.set_name(name, passenger_type)
+                self.passengers.append(passenger)
+        for row in rows[len(names):]:
+            self.passengers.remove(row)
+    
     @property
     def total_passengers(self):
         """Calculate total number of passengers."""
@@ -225,3 +289,79 @@ class Order(db.Model):
     
     def __repr__(self):
         return f'<Order {self.service_id}: {self.service_type} on {self.service_date}>'
+
+
+
+@event.listens_for(Session, 'before_flush')
+def _refresh_missing_data(session, flush_context, instances):
+    """Recompute the missing-data flags of orders whose checked fields were edited.
+    
+    Registered with the model, i.e. before the order_daily_stats listener, so
+    the rollup sees the new mask in the same flush.
+    """
+    for obj in session.dirty:
+        if isinstance(obj, Order) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in MISSING_DATA_FLAGS):
+                obj.check_missing_data()
+
+class OrderDailyStat(db.Model):
+    """Rollup of orders per creation day, status, action and service type.
+    
+    Kept in step with `orders` by app.services.order_rollup in the same
+    transaction as the order writes; `flask rebuild-order-stats` recomputes it.
+    """
+    
+    __tablename__ = 'order_daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)  # date(created_at), UTC
+    status = db.Column(db.String(50), primary_key=True)
+    action = db.Column(db.String(20), primary_key=True)
+    service_type = db.Column(db.String(100), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    missing_data_count = db.Column(db.Integer, nullable=False, default=0)  # orders with a non-zero missing_data_mask
+    
+    def __repr__(self):
+        return f'<OrderDailyStat {self.day} {self.status}/{self.action}/{self.service_type}: {self.order_count}>'
+
+
+class OrderSearchToken(db.Model):
+    """Inverted index of the searchable text of orders: one row per token, order and field.
+    
+    Maintained by app.services.order_search on every order write; a prefix
+    search is an index range seek on `token`. `flask rebuild-order-search`
+    recomputes it.
+    """
+    
+    __tablename__ = 'order_search_tokens'
+    
+    token = db.Column(db.String(64), primary_key=True)  # normalized: lower case, no accents
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), primary_key=True, index=True)
+    field = db.Column(db.String(30), primary_key=True)  # e.g. 'passenger_names', 'service_id'
+    weight = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<OrderSearchToken {self.token} -> {self.order_id} ({self.field})>'
+
+
+class OrderPassenger(db.Model):
+    """One passenger of an order, with a normalized name for indexed lookups.
+    
+    Written through Order.set_passengers() alongside Order.passenger_names.
+    """
+    
+    __tablename__ = 'order_passengers'
+    
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)  # 0-based, as in passenger_names
+    passenger_type = db.Column(db.String(10), nullable=False, default='adult')  # 'adult' or 'child'
+    name = db.Column(db.String(200), nullable=False)
+    normalized_name = db.Column(db.String(200), nullable=False, index=True)  # see app.utils.text.normalize_name
+    
+    def set_name(self, name, passenger_type='adult'):
+        self.name = name[:200]
+        self.normalized_name = normalize_name(name)[:200]
+        self.passenger_type = passenger_type
+    
+    def __repr__(self):
+        return f'<OrderPassenger {self.order_id}#{self.position}: {self.name}>'
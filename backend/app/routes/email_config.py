@@ -8,12 +8,27 @@ from app import db
 from app.models.email_config import EmailConfig, EmailLog
 from app.models.user import User
 from app.auth.decorators import require_admin, get_current_user
-from app.services.imap_monitor import imap_service
+from app.services.config_registry import config_registry
+from app.utils.pagination import InvalidCursor, cursor_requested, keyset_page, parse_limit
+from werkzeug.local import LocalProxy
 import imaplib
 import ssl
 import logging
 from datetime import datetime
 
+
+def _get_imap_service():
+    # Imported on first use: serving the other routes does not need the
+    # monitor stack (ingestion pipeline, manifest parser, python-docx)
+    from app.services.imap_monitor import get_imap_service
+    return get_imap_service()
+
+
+imap_service = LocalProxy(_get_imap_service)
+
+# Keyset pagination keys of the log listings: (column, descending)
+EMAIL_LOG_KEYS = ((EmailLog.created_at, True), (EmailLog.id, True))
+
 # Setup logger for IMAP monitoring
 logger = logging.getLogger('imap_monitor')
 logger.setLevel(logging.DEBUG)
@@ -30,6 +45,16 @@ if not logger.handlers:
 
 bp = Blueprint('email_config', __name__, url_prefix='/api/email-config')
 
+
+def _folders_error(folders):
+    """Validation error for the `folders` field, or None when it is a list of folder names."""
+    if folders is None:
+        return None
+    if not isinstance(folders, list) or not all(isinstance(f, str) and f.strip() for f in folders):
+        return 'folders must be a list of non-empty folder names'
+    return None
+
+
 @bp.route('', methods=['GET'])
 @bp.route('/', methods=['GET'])
 @jwt_required()
@@ -80,6 +105,13 @@ def create_email_config():
                     'error': f'Missing required field: {field}'
                 }), 400
         
+        folders_error = _folders_error(data.get('folders'))
+        if folders_error:
+            return jsonify({
+                'success': False,
+                'error': folders_error
+            }), 400
+        
         # Check if name already exists
         existing_config = EmailConfig.query.filter_by(name=data['name']).first()
         if existing_config:
@@ -98,8 +130,10 @@ def create_email_config():
             use_ssl=data.get('use_ssl', True),
             use_starttls=data.get('use_starttls', False),
             folder=data.get('folder', 'INBOX'),
+            folders=data.get('folders') or [],
             subject_filter=data.get('subject_filter'),
             sender_filter=data.get('sender_filter'),
+            body_filter=data.get('body_filter'),
             attachment_filter=data.get('attachment_filter'),
             is_active=data.get('is_active', True),
             created_by=current_user.id
@@ -110,6 +144,7 @@ def create_email_config():
         
         db.session.add(config)
         db.session.commit()
+        config_registry.invalidate()
         
         logger.info(f"✅ IMAP Success - Config '{config.name}' created | User: {current_user.username} | Server: {config.imap_server}:{config.imap_port}")
         
@@ -169,11 +204,20 @@ def update_email_config(config_id):
         
         data = request.get_json()
         
+        folders_error = _folders_error(data.get('folders'))
+        if folders_error:
+            return jsonify({
+                'success': False,
+                'error': folders_error
+            }), 400
+        if 'folders' in data:
+            data['folders'] = data['folders'] or []
+        
         # Update fields
         updatable_fields = [
             'name', 'imap_server', 'imap_port', 'email', 'use_ssl', 
-            'use_starttls', 'folder', 'subject_filter', 'sender_filter', 
-            'attachment_filter', 'is_active'
+            'use_starttls', 'folder', 'folders', 'subject_filter', 'sender_filter', 
+            'body_filter', 'attachment_filter', 'is_active'
         ]
         
         for field in updatable_fields:
@@ -186,6 +230,7 @@ def update_email_config(config_id):
         
         config.updated_at = datetime.utcnow()
         db.session.commit()
+        config_registry.invalidate()
         
         return jsonify({
             'success': True,
@@ -217,6 +262,7 @@ def delete_email_config(config_id):
         
         db.session.delete(config)
         db.session.commit()
+        config_registry.invalidate()
         
         return jsonify({
             'success': True,
@@ -351,6 +397,22 @@ def get_email_logs(config_id):
                 'error': 'Configuration not found'
             }), 404
         
+        if cursor_requested(request.args):
+            # Keyset pagination: newest first, each page a seek on (config_id, created_at, id)
+            try:
+                logs, pagination = keyset_page(
+                    EmailLog.query.filter_by(config_id=config_id), EMAIL_LOG_KEYS,
+                    request.args.get('cursor'), parse_limit(request.args, default=50)
+                )
+            except InvalidCursor as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            logger.info(f"✅ IMAP Logs - Retrieved {len(logs)} logs for config '{config.name}' | User: {current_user.username} | Cursor mode")
+            return jsonify({
+                'success': True,
+                'data': [log.to_dict() for log in logs],
+                'pagination': pagination
+            })
+        
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 50, type=int)
@@ -358,7 +420,7 @@ def get_email_logs(config_id):
         logger.debug(f"📊 IMAP Logs - Query params: page={page}, limit={limit} | Config: '{config.name}' | User: {current_user.username}")
         
         # Query logs with pagination
-        logs_query = EmailLog.query.filter_by(config_id=config_id).order_by(EmailLog.created_at.desc())
+        logs_query = EmailLog.query.filter_by(config_id=config_id).order_by(EmailLog.created_at.desc(), EmailLog.id.desc())
         logs_paginated = logs_query.paginate(
             page=page,
             per_page=limit,
@@ -718,8 +780,8 @@ def stop_monitoring():
         current_user = get_current_user()
         logger.info(f"🛑 IMAP Monitor - Stop requested | User: {current_user.username} (ID: {current_user.id}) | IP: {request.remote_addr}")
         
-        # Stop the monitoring service
-        imap_service.stop_monitoring()
+        # Stop the monitoring service, on whichever worker holds the lease too
+        imap_service.stop_monitoring(deployment_wide=True)
         
         logger.info(f"✅ IMAP Monitor - Stopped successfully | User: {current_user.username}")
         
@@ -755,7 +817,11 @@ def get_monitor_status():
             'data': {
                 'monitoring_active': imap_service.monitoring_active,
                 'check_interval': imap_service.check_interval,
-                'thread_alive': imap_service.monitor_thread.is_alive() if imap_service.monitor_thread else False
+                'thread_alive': imap_service.monitor_thread.is_alive() if imap_service.monitor_thread else False,
+                'schedule': imap_service.get_schedule_status(),
+                'lease': imap_service.lease.status(),
+                'pipeline': imap_service.pipeline.status(),
+                'timings': imap_service.timings.summary()
             }
         })
         
@@ -854,8 +920,8 @@ def stop_continuous_monitoring():
         current_user = get_current_user()
         logger.info(f"🛑 IMAP Continuous - Stop requested | User: {current_user.username} (ID: {current_user.id}) | IP: {request.remote_addr}")
         
-        # Stop the continuous monitoring service
-        imap_service.stop_continuous_monitoring()
+        # Stop the continuous monitoring service, on whichever worker holds the lease too
+        imap_service.stop_continuous_monitoring(deployment_wide=True)
         
         logger.info(f"✅ IMAP Continuous - Stopped successfully | User: {current_user.username}")
         
@@ -892,8 +958,13 @@ def get_continuous_monitor_status():
                 'continuous_monitoring_active': imap_service.continuous_monitoring,
                 'regular_monitoring_active': imap_service.monitoring_active,
                 'check_interval': imap_service.check_interval,
+                'continuous_interval': imap_service.continuous_interval,
                 'continuous_thread_alive': imap_service.continuous_thread.is_alive() if imap_service.continuous_thread else False,
-                'regular_thread_alive': imap_service.monitor_thread.is_alive() if imap_service.monitor_thread else False
+                'regular_thread_alive': imap_service.monitor_thread.is_alive() if imap_service.monitor_thread else False,
+                'schedule': imap_service.get_schedule_status(),
+                'lease': imap_service.lease.status(),
+                'pipeline': imap_service.pipeline.status(),
+                'timings': imap_service.timings.summary()
             }
         })
         
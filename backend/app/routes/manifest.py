@@ -5,6 +5,7 @@ Routes for manifest processing API endpoints.
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import defer
 import os
 from datetime import datetime
 
@@ -14,12 +15,29 @@ from app.models.order import Order
 from app.models.manifest_email import ManifestEmail
 from app.models.audit_log import AuditLog
 from app.auth.decorators import require_permission, require_auth, Permissions
+from app.utils.pagination import InvalidCursor, cursor_requested, keyset_page, parse_limit
+from app.utils.conditional import conditional, weak_etag
+from app.services import change_counters
 from app import db
 
 manifest_bp = Blueprint('manifest', __name__)
 
+# Keyset pagination keys of the manifest listings: (column, descending)
+MANIFEST_KEYS = ((ManifestEmail.created_at, True), (ManifestEmail.id, True))
+
+# The listings never show the message bodies or parsed data: leave them in the database
+MANIFEST_LIST_OPTIONS = (
+    defer(ManifestEmail.email_body_text),
+    defer(ManifestEmail.email_body_html),
+    defer(ManifestEmail.raw_email_content),
+    defer(ManifestEmail.parsed_services_data),
+)
+
 ALLOWED_EXTENSIONS = {'docx', 'doc'}
 
+# Seconds clients may reuse a stats response before revalidating
+STATS_MAX_AGE = 10
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and \
@@ -170,16 +188,49 @@ def upload_manifest():
         current_app.logger.error(f"Error processing manifest: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def _manifest_history_item(m):
+    """A manifest as shown in the processing history."""
+    return {
+        'id': m.id,
+        'subject': m.email_subject,
+        'sender': m.email_sender,
+        'received_at': m.email_date.isoformat() if m.email_date else None,
+        'processed_at': m.processing_completed_at.isoformat() if m.processing_completed_at else None,
+        'status': m.processing_status,
+        'services_found': m.services_found,
+        'orders_created': m.services_processed,
+        'original_filename': (m.attachment_filenames or [None])[0],
+        'processing_errors': m.processing_error
+    }
+
+def _manifests_etag():
+    # One counter read: any manifest written since bumps it; the query string picks the page
+    versions = change_counters.versions(['manifest_emails'])
+    return weak_etag(request.path, request.query_string.decode(), versions['manifest_emails'], datetime.utcnow().year)
+
 @manifest_bp.route('/history', methods=['GET'])
 @require_permission(Permissions.MANIFESTS_READ)
+@conditional(_manifests_etag)
 def get_manifest_history():
-    """Get manifest processing history."""
+    """Get manifest processing history (pass cursor/limit for keyset pagination)."""
     try:
+        if cursor_requested(request.args):
+            try:
+                items, pagination = keyset_page(
+                    ManifestEmail.query.options(*MANIFEST_LIST_OPTIONS), MANIFEST_KEYS, request.args.get('cursor'), parse_limit(request.args)
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'manifests': [_manifest_history_item(m) for m in items],
+                'pagination': pagination
+            }), 200
+        
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        manifests = ManifestEmail.query.order_by(
-            ManifestEmail.received_at.desc()
+        manifests = ManifestEmail.query.options(*MANIFEST_LIST_OPTIONS).order_by(
+            ManifestEmail.created_at.desc(), ManifestEmail.id.desc()
         ).paginate(
             page=page, 
             per_page=per_page, 
@@ -187,18 +238,7 @@ def get_manifest_history():
         )
         
         return jsonify({
-            'manifests': [{
-                'id': m.id,
-                'subject': m.subject,
-                'sender': m.sender,
-                'received_at': m.received_at.isoformat(),
-                'processed_at': m.processed_at.isoformat() if m.processed_at else None,
-                'status': m.status,
-                'services_found': m.services_found,
-                'orders_created': m.orders_created,
-                'original_filename': m.original_filename,
-                'processing_errors': m.processing_errors
-            } for m in manifests.items],
+            'manifests': [_manifest_history_item(m) for m in manifests.items],
             'pagination': {
                 'page': manifests.page,
                 'pages': manifests.pages,
@@ -325,25 +365,31 @@ def test_parser():
 
 @manifest_bp.route('/stats', methods=['GET'])
 @require_permission(Permissions.MANIFESTS_READ)
+@conditional(_manifests_etag, max_age=STATS_MAX_AGE)
 def get_manifest_stats():
     """Get manifest statistics for dashboard."""
     try:
-        # Get basic counts
-        total_manifests = ManifestEmail.query.count()
-        processed_manifests = ManifestEmail.query.filter_by(status='processed').count()
-        failed_manifests = ManifestEmail.query.filter_by(status='failed').count()
-        pending_manifests = ManifestEmail.query.filter_by(status='pending').count()
-        
-        # Get monthly statistics for current year
-        from sqlalchemy import func, extract
+        # Get basic counts (one GROUP BY instead of a COUNT per status)
+        from sqlalchemy import func
+        counts = dict(db.session.query(
+            ManifestEmail.processing_status, func.count(ManifestEmail.id)
+        ).group_by(ManifestEmail.processing_status).all())
+        total_manifests = sum(counts.values())
+        processed_manifests = counts.get('completed', 0)
+        failed_manifests = counts.get('failed', 0)
+        pending_manifests = counts.get('received', 0) + counts.get('processing', 0)
+        
+        # Get monthly statistics for current year (range predicate, so an
+        # index on the timestamp can be used instead of extract() on every row)
         current_year = datetime.now().year
         monthly_stats = db.session.query(
-            func.extract('month', ManifestEmail.processed_at).label('month'),
+            func.extract('month', ManifestEmail.processing_completed_at).label('month'),
             func.count(ManifestEmail.id).label('count')
         ).filter(
-            extract('year', ManifestEmail.processed_at) == current_year
+            ManifestEmail.processing_completed_at >= datetime(current_year, 1, 1),
+            ManifestEmail.processing_completed_at < datetime(current_year + 1, 1, 1)
         ).group_by(
-            func.extract('month', ManifestEmail.processed_at)
+            func.extract('month', ManifestEmail.processing_completed_at)
         ).all()
         
         # Format monthly stats
@@ -371,14 +417,26 @@ def get_manifest_stats():
 @manifest_bp.route('/emails', methods=['GET'])
 @require_permission(Permissions.MANIFESTS_READ)
 def get_manifest_emails():
-    """Get list of manifest emails with pagination."""
+    """Get list of manifest emails with pagination (pass cursor for keyset pagination)."""
     try:
+        if cursor_requested(request.args):
+            try:
+                items, pagination = keyset_page(
+                    ManifestEmail.query.options(*MANIFEST_LIST_OPTIONS), MANIFEST_KEYS, request.args.get('cursor'), parse_limit(request.args)
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'manifests': [manifest.to_dict() for manifest in items],
+                'pagination': pagination
+            }), 200
+        
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 20, type=int)
         
         # Query with pagination
-        paginated_manifests = ManifestEmail.query.order_by(
-            ManifestEmail.processed_at.desc()
+        paginated_manifests = ManifestEmail.query.options(*MANIFEST_LIST_OPTIONS).order_by(
+            ManifestEmail.created_at.desc(), ManifestEmail.id.desc()
         ).paginate(
             page=page,
             per_page=limit,
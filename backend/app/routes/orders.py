@@ -2,24 +2,187 @@
 Routes for order management API endpoints.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, date
-from sqlalchemy import and_, or_
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, or_, func
 
 from app.models.user import User
-from app.models.order import Order
+from app.models.order import MISSING_DATA_FLAGS, Order, OrderPassenger
 from app.models.audit_log import AuditLog
+from app.models.manifest_email import ManifestEmail
 from app.auth.decorators import require_permission, require_auth, Permissions
+from app.services.order_stats import order_summary, SUMMARY_STATUSES
+from app.services import change_counters, order_bulk, order_rollup, order_search
+from app.utils.pagination import InvalidCursor, cursor_requested, keyset_page, parse_limit
+from app.utils.text import normalize_name
+from app.utils.streaming_export import FORMATS, WRITERS
+from app.utils.conditional import conditional, weak_etag
 from app import db
 
 orders_bp = Blueprint('orders', __name__)
 
+# Seconds clients may reuse a stats response before revalidating
+STATS_MAX_AGE = 10
+
+# Keyset pagination keys of the orders list: (column, descending)
+ORDER_KEYS = ((Order.service_date, True), (Order.created_at, True), (Order.id, True))
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _preview(text):
+    if text is None:
+        return None
+    return text[:DESCRIPTION_PREVIEW] + '...' if len(text) > DESCRIPTION_PREVIEW else text
+
+# Orders list fields: name -> (columns loaded for it, value from the loaded row).
+# Only the requested columns are selected; the description is cut in SQL so
+# the Text column is never transferred whole.
+DESCRIPTION_PREVIEW = 100
+ORDER_LIST_FIELDS = {
+    'id': ((Order.id,), lambda row: row.id),
+    'service_id': ((Order.service_id,), lambda row: row.service_id),
+    'action': ((Order.action,), lambda row: row.action),
+    'service_date': ((Order.service_date,), lambda row: _iso(row.service_date)),
+    'service_type': ((Order.service_type,), lambda row: row.service_type),
+    'description': (
+        (func.substring(Order.description, 1, DESCRIPTION_PREVIEW + 1).label('description_preview'),),
+        lambda row: _preview(row.description_preview)
+    ),
+    'vehicle_model': ((Order.vehicle_model,), lambda row: row.vehicle_model),
+    'vehicle_capacity': ((Order.vehicle_capacity,), lambda row: row.vehicle_capacity),
+    'passenger_count_adults': ((Order.passenger_count_adults,), lambda row: row.passenger_count_adults),
+    'passenger_count_children': ((Order.passenger_count_children,), lambda row: row.passenger_count_children),
+    'passenger_count_total': (
+        (Order.passenger_count_adults, Order.passenger_count_children),
+        lambda row: (row.passenger_count_adults or 0) + (row.passenger_count_children or 0)
+    ),
+    'passenger_names': ((Order.passenger_names,), lambda row: row.passenger_names),
+    'contact_phone': ((Order.contact_phone,), lambda row: row.contact_phone),
+    'contact_email': ((Order.contact_email,), lambda row: row.contact_email),
+    'pickup_location': ((Order.pickup_location,), lambda row: row.pickup_location),
+    'dropoff_location': ((Order.dropoff_location,), lambda row: row.dropoff_location),
+    'pickup_time': ((Order.pickup_time,), lambda row: row.pickup_time.strftime('%H:%M') if row.pickup_time else None),
+    'flight_number': ((Order.flight_number,), lambda row: row.flight_number),
+    'status': ((Order.status,), lambda row: row.status),
+    'created_at': ((Order.created_at,), lambda row: _iso(row.created_at)),
+    'updated_at': ((Order.updated_at,), lambda row: _iso(row.updated_at)),
+    'missing_data_flags': ((Order.missing_data_flags,), lambda row: row.missing_data_flags),
+    'has_missing_data': ((Order.missing_data_mask,), lambda row: bool(row.missing_data_mask)),
+    'requires_attention': ((Order.requires_attention,), lambda row: row.requires_attention),
+    'source_manifest_id': ((Order.source_manifest_id,), lambda row: row.source_manifest_id),
+}
+DEFAULT_ORDER_LIST_FIELDS = (
+    'id', 'action', 'service_date', 'service_type', 'description', 'vehicle_model', 'vehicle_capacity',
+    'passenger_count_total', 'contact_phone', 'pickup_location', 'pickup_time', 'status', 'created_at',
+    'missing_data_flags', 'has_missing_data'
+)
+
+DEFAULT_ORDER_EXPORT_FIELDS = (
+    'id', 'service_id', 'action', 'service_date', 'service_type', 'status', 'vehicle_model',
+    'vehicle_capacity', 'passenger_count_adults', 'passenger_count_children', 'passenger_names',
+    'contact_phone', 'contact_email', 'pickup_location', 'dropoff_location', 'pickup_time',
+    'flight_number', 'missing_data_flags', 'created_at'
+)
+EXPORT_FILTERS = ('status', 'action', 'service_type', 'date_from', 'date_to', 'search', 'missing')
+EXPORT_BATCH_SIZE = 1000
+
+def order_projection(fields=None):
+    """(field names, columns to select) for a fields= value; ValueError on unknown names.
+    
+    The id and the keyset pagination keys are always selected.
+    """
+    names = ['id']
+    for name in (fields.split(',') if fields else DEFAULT_ORDER_LIST_FIELDS):
+        name = name.strip()
+        if name and name not in names:
+            if name not in ORDER_LIST_FIELDS:
+                raise ValueError(f'Unknown field: {name}')
+            names.append(name)
+    
+    columns = {column.key: column for column, _ in ORDER_KEYS}
+    for name in names:
+        for column in ORDER_LIST_FIELDS[name][0]:
+            columns.setdefault(column.key, column)
+    return names, list(columns.values())
+
+def order_list_item(row, names):
+    """An order as shown in the orders list, from a projected row."""
+    return {name: ORDER_LIST_FIELDS[name][1](row) for name in names}
+
+def filtered_orders(args):
+    """Orders query with the list filters of `args` applied, and the search ranking.
+    
+    Returns (query, matches): matches is the (order_id, score) subquery of a
+    search, or None. Raises ValueError for an unknown missing-data flag.
+    """
+    status = args.get('status')
+    action = args.get('action')
+    service_type = args.get('service_type')
+    date_from = args.get('date_from')
+    date_to = args.get('date_to')
+    search = args.get('search')
+    missing = args.get('missing')  # 'any', or flags that must all be missing
+    
+    # Build query
+    query = Order.query
+    
+    # Apply filters
+    if status:
+        query = query.filter(Order.status == status)
+    
+    if action:
+        query = query.filter(Order.action == action)
+    
+    if service_type:
+        query = query.filter(Order.service_type.ilike(f'%{service_type}%'))
+    
+    if date_from:
+        try:
+            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
+            query = query.filter(Order.service_date >= date_from_obj)
+        except ValueError:
+            pass
+    
+    if date_to:
+        try:
+            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
+            query = query.filter(Order.service_date <= date_to_obj)
+        except ValueError:
+            pass
+    
+    # Missing data: seeks on the missing_data_mask index
+    if missing == 'any':
+        query = query.filter(Order.missing_data_mask > 0)
+    elif missing:
+        query = query.filter(Order.missing_all([flag.strip() for flag in missing.split(',') if flag.strip()]))
+    
+    # Full-text search: prefix match of every term on the order_search_tokens index
+    matches = order_search.ranked(search) if search else None
+    if matches is not None:
+        query = query.join(matches, matches.c.order_id == Order.id)
+    
+    return query, matches
+
 @orders_bp.route('', methods=['GET'])
 @orders_bp.route('/', methods=['GET'])
 @require_permission(Permissions.ORDERS_READ)
 def get_orders():
-    """Get list of orders with filtering and pagination."""
+    """Get list of orders with filtering and pagination.
+    
+    Pass count=false to skip the COUNT(*) behind pagination.total/pages
+    (has_next is then found by fetching one extra row).
+    Pass cursor (empty for the first page) and limit for keyset pagination:
+    the response carries pagination.next_cursor and every page costs the same.
+    search matches word prefixes in booking number, passenger names, phone,
+    hotel/locations and description; offset pages are ranked by relevance,
+    cursor pages keep the (service_date, created_at, id) order.
+    missing=pickup_time,contact_phone keeps orders missing all the listed
+    fields; missing=any keeps orders missing at least one.
+    fields=id,service_date,status,... picks the returned fields (see
+    ORDER_LIST_FIELDS); only their columns are loaded.
+    """
     try:
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
@@ -30,106 +193,164 @@ def get_orders():
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
-        
-        # Filters
-        status = request.args.get('status')
-        action = request.args.get('action')
-        service_type = request.args.get('service_type')
-        date_from = request.args.get('date_from')
-        date_to = request.args.get('date_to')
-        search = request.args.get('search')
-        
-        # Build query
-        query = Order.query
-        
-        # Apply filters
-        if status:
-            query = query.filter(Order.status == status)
-        
-        if action:
-            query = query.filter(Order.action == action)
-        
-        if service_type:
-            query = query.filter(Order.service_type.ilike(f'%{service_type}%'))
-        
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                query = query.filter(Order.service_date >= date_from_obj)
-            except ValueError:
-                pass
-        
-        if date_to:
+        with_count = request.args.get('count', 'true').lower() not in ('false', '0', 'no')
+        
+        try:
+            query, matches = filtered_orders(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'valid_flags': list(MISSING_DATA_FLAGS)}), 400
+        
+        # Load only the columns of the requested fields
+        try:
+            fields, columns = order_projection(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e), 'valid_fields': list(ORDER_LIST_FIELDS)}), 400
+        query = query.with_entities(*columns)
+        
+        if cursor_requested(request.args):
+            # Keyset pagination on (service_date, created_at, id), newest first
             try:
-                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                query = query.filter(Order.service_date <= date_to_obj)
-            except ValueError:
-                pass
-        
-        if search:
-            search_filter = or_(
-                Order.description.ilike(f'%{search}%'),
-                Order.contact_phone.ilike(f'%{search}%'),
-                Order.pickup_location.ilike(f'%{search}%'),
-                Order.passenger_names.any(lambda name: search.lower() in name.lower())
-            )
-            query = query.filter(search_filter)
-        
-        # Order by service date (newest first)
-        query = query.order_by(Order.service_date.desc().nullslast(), Order.created_at.desc())
+                items, pagination = keyset_page(
+                    query, ORDER_KEYS, request.args.get('cursor'), parse_limit(request.args)
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            summary = order_summary.summary(ttl=current_app.config.get('ORDER_SUMMARY_TTL'))
+            return jsonify({
+                'orders': [order_list_item(row, fields) for row in items],
+                'pagination': pagination,
+                'summary': summary
+            }), 200
+        
+        # Order by relevance when searching, then by service date (newest first)
+        if matches is not None:
+            query = query.order_by(matches.c.score.desc())
+        query = query.order_by(Order.service_date.desc().nullslast(), Order.created_at.desc(), Order.id.desc())
         
         # Apply pagination
         orders = query.paginate(
             page=page,
             per_page=per_page,
-            error_out=False
+            error_out=False,
+            count=with_count
         )
-        
-        return jsonify({
-            'orders': [{
-                'id': order.id,
-                'action': order.action,
-                'service_date': order.service_date.isoformat() if order.service_date else None,
-                'service_type': order.service_type,
-                'description': order.description[:100] + '...' if len(order.description) > 100 else order.description,
-                'vehicle_model': order.vehicle_model,
-                'vehicle_capacity': order.vehicle_capacity,
-                'passenger_count_total': order.passenger_count_adults + order.passenger_count_children,
-                'contact_phone': order.contact_phone,
-                'pickup_location': order.pickup_location,
-                'pickup_time': order.pickup_time,
-                'status': order.status,
-                'created_at': order.created_at.isoformat(),
-                'missing_data_flags': order.missing_data_flags,
-                'has_missing_data': bool(order.missing_data_flags)
-            } for order in orders.items],
-            'pagination': {
+        if with_count:
+            pagination = {
                 'page': orders.page,
                 'pages': orders.pages,
                 'per_page': orders.per_page,
                 'total': orders.total,
                 'has_next': orders.has_next,
                 'has_prev': orders.has_prev
-            },
-            'summary': {
-                'total_orders': orders.total,
-                'pending_orders': Order.query.filter_by(status='pending').count(),
-                'approved_orders': Order.query.filter_by(status='approved').count(),
-                'completed_orders': Order.query.filter_by(status='completed').count(),
-                'cancelled_orders': Order.query.filter_by(status='cancelled').count()
             }
+        else:
+            # Probe for a next page instead of counting every matching row
+            has_next = query.with_entities(Order.id).offset(orders.page * orders.per_page).limit(1).first() is not None
+            pagination = {
+                'page': orders.page,
+                'pages': None,
+                'per_page': orders.per_page,
+                'total': None,
+                'has_next': has_next,
+                'has_prev': orders.has_prev
+            }
+        
+        # Status counts: one GROUP BY, cached briefly and invalidated by order writes
+        summary = order_summary.summary(ttl=current_app.config.get('ORDER_SUMMARY_TTL'))
+        if with_count:
+            summary['total_orders'] = orders.total
+        
+        return jsonify({
+            'orders': [order_list_item(row, fields) for row in orders.items],
+            'pagination': pagination,
+            'summary': summary
         }), 200
         
     except Exception as e:
         current_app.logger.error(f"Error getting orders: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@orders_bp.route('/export', methods=['GET'])
+@require_permission(Permissions.ORDERS_EXPORT)
+def export_orders():
+    """Stream every order matching the list filters as CSV, NDJSON or XLSX.
+    
+    format: csv (default), ndjson or xlsx. Takes the filters of GET /api/orders
+    and fields= (default DEFAULT_ORDER_EXPORT_FIELDS). Rows are read with
+    yield_per and written to the response as they arrive, so memory does not
+    grow with the number of orders.
+    """
+    try:
+        user = User.query.get(get_jwt_identity())
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in WRITERS:
+            return jsonify({'error': f'Unknown format: {export_format}', 'valid_formats': list(WRITERS)}), 400
+        
+        try:
+            query, matches = filtered_orders(request.args)
+            fields, columns = order_projection(request.args.get('fields') or ','.join(DEFAULT_ORDER_EXPORT_FIELDS))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if matches is not None:
+            query = query.order_by(matches.c.score.desc())
+        query = query.with_entities(*columns).order_by(
+            Order.service_date.desc(), Order.created_at.desc(), Order.id.desc()
+        ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        
+        audit_log = AuditLog(
+            user_id=user.id if user else None,
+            action='orders_export',
+            resource_type='order',
+            details={'format': export_format, 'fields': fields, 'filters': {
+                name: request.args[name] for name in EXPORT_FILTERS if request.args.get(name)
+            }}
+        )
+        db.session.add(audit_log)
+        db.session.commit()
+        
+        def rows():
+            for row in query:
+                item = order_list_item(row, fields)
+                yield [item[name] for name in fields]
+        
+        mimetype, extension = FORMATS[export_format]
+        filename = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{extension}"
+        return Response(
+            stream_with_context(WRITERS[export_format](fields, rows())),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'no-store',
+                'X-Accel-Buffering': 'no'  # let proxies pass chunks through
+            }
+        )
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error exporting orders: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _order_etag(order_id):
+    # The detail also shows the approver and the source manifest: their
+    # updated_at count too. None (no tag) lets the view answer the 404
+    row = db.session.query(
+        Order.updated_at, User.updated_at, ManifestEmail.updated_at
+    ).outerjoin(User, User.id == Order.approved_by_id).outerjoin(
+        ManifestEmail, ManifestEmail.id == Order.source_manifest_id
+    ).filter(Order.id == order_id).first()
+    return weak_etag('order', order_id, *[_iso(value) for value in row]) if row else None
+
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @require_permission(Permissions.ORDERS_READ)
+@conditional(_order_etag)
 def get_order_details(order_id):
     """Get detailed information about a specific order."""
     try:
-        order = Order.query.get_or_404(order_id)
+        order = db.session.get(Order, order_id)
+        
+        if not order:
+            return jsonify({'error': 'Order not found'}), 404
         
         return jsonify({
             'id': order.id,
@@ -145,25 +366,23 @@ def get_order_details(order_id):
             'contact_phone': order.contact_phone,
             'contact_email': order.contact_email,
             'pickup_location': order.pickup_location,
-            'pickup_time': order.pickup_time,
+            'pickup_time': order.pickup_time.strftime('%H:%M') if order.pickup_time else None,
             'dropoff_location': order.dropoff_location,
             'flight_number': order.flight_number,
-            'comments': order.comments,
+            'comments': order.operator_comments,
             'status': order.status,
-            'external_service_id': order.external_service_id,
-            'confirmation_number': order.confirmation_number,
+            'external_service_id': order.external_id,
             'missing_data_flags': order.missing_data_flags,
-            'created_at': order.created_at.isoformat(),
-            'updated_at': order.updated_at.isoformat(),
-            'created_by': order.created_by_user.email if order.created_by_user else None,
-            'approved_by': order.approved_by_user.email if order.approved_by_user else None,
-            'approved_at': order.approved_at.isoformat() if order.approved_at else None,
+            'created_at': _iso(order.created_at),
+            'updated_at': _iso(order.updated_at),
+            'approved_by': order.approved_by.email if order.approved_by else None,
+            'approved_at': _iso(order.approved_at),
             'manifest_email': {
-                'id': order.manifest_email.id,
-                'subject': order.manifest_email.subject,
-                'sender': order.manifest_email.sender,
-                'received_at': order.manifest_email.received_at.isoformat()
-            } if order.manifest_email else None
+                'id': order.source_manifest.id,
+                'subject': order.source_manifest.email_subject,
+                'sender': order.source_manifest.email_sender,
+                'received_at': _iso(order.source_manifest.email_date)
+            } if order.source_manifest else None
         }), 200
         
     except Exception as e:
@@ -326,49 +545,35 @@ def bulk_order_action():
         if not isinstance(order_ids, list) or not order_ids:
             return jsonify({'error': 'order_ids must be a non-empty list'}), 400
         
-        # Get orders
-        orders = Order.query.filter(Order.id.in_(order_ids)).all()
+        if action not in order_bulk.BULK_ACTIONS:
+            return jsonify({'error': f'Invalid action: {action}'}), 400
         
-        if len(orders) != len(order_ids):
-            return jsonify({'error': 'Some orders not found'}), 404
+        if action == 'approve' and user.role not in ['admin', 'operator']:
+            return jsonify({'error': 'Insufficient permissions'}), 403
         
-        results = []
-        
-        if action == 'approve':
-            if user.role not in ['admin', 'operator']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            
-            for order in orders:
-                if order.status == 'pending':
-                    order.status = 'approved'
-                    order.approved_by_user_id = user.id
-                    order.approved_at = datetime.utcnow()
-                    order.updated_at = datetime.utcnow()
-                    results.append({'id': order.id, 'status': 'approved'})
-                else:
-                    results.append({'id': order.id, 'status': 'skipped', 'reason': 'not pending'})
-        
-        elif action == 'cancel':
-            for order in orders:
-                if order.status not in ['completed', 'cancelled']:
-                    order.status = 'cancelled'
-                    order.updated_at = datetime.utcnow()
-                    results.append({'id': order.id, 'status': 'cancelled'})
-                else:
-                    results.append({'id': order.id, 'status': 'skipped', 'reason': 'already completed/cancelled'})
+        try:
+            order_ids = list(dict.fromkeys(int(order_id) for order_id in order_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'order_ids must be integers'}), 400
         
-        else:
-            return jsonify({'error': f'Invalid action: {action}'}), 400
+        statuses = order_bulk.current_statuses(order_ids)
         
-        # Create audit log
+        if len(statuses) != len(order_ids):
+            return jsonify({'error': 'Some orders not found'}), 404
+        
+        # Conditional set-based UPDATEs; results come from the rows they changed
+        results = order_bulk.apply(action, {order_id: statuses[order_id] for order_id in order_ids}, user.id)
+        
+        # Audit the outcome counts and changed ids, not the whole results list
         audit_log = AuditLog(
             user_id=user.id,
             action=f'bulk_{action}',
             resource_type='order',
             details={
-                'order_ids': order_ids,
                 'action': action,
-                'results': results
+                'requested': len(order_ids),
+                'outcomes': order_bulk.outcome_counts(results),
+                'order_ids': [result['id'] for result in results if result['status'] != 'skipped']
             }
         )
         db.session.add(audit_log)
@@ -385,77 +590,107 @@ def bulk_order_action():
         current_app.logger.error(f"Error performing bulk action: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@orders_bp.route('/passengers', methods=['GET'])
+@require_permission(Permissions.ORDERS_READ)
+def get_passenger_orders():
+    """Find every order of a passenger, across manifests.
+    
+    name: passenger name, compared case- and accent-insensitively.
+    match: 'exact' (default) or 'prefix' ('mario ro' finds 'Mario Rossi').
+    Both are seeks on the order_passengers.normalized_name index.
+    """
+    try:
+        name = normalize_name(request.args.get('name', ''))
+        match = request.args.get('match', 'exact')
+        limit = parse_limit(request.args, default=100)
+        
+        if not name:
+            return jsonify({'error': 'name is required'}), 400
+        if match not in ('exact', 'prefix'):
+            return jsonify({'error': "match must be 'exact' or 'prefix'"}), 400
+        
+        if match == 'prefix':
+            name_filter = OrderPassenger.normalized_name.like(f'{name}%')
+        else:
+            name_filter = OrderPassenger.normalized_name == name
+        
+        rows = db.session.query(
+            OrderPassenger.name, OrderPassenger.passenger_type, OrderPassenger.position,
+            Order.id, Order.service_id, Order.action, Order.service_date, Order.service_type,
+            Order.status, Order.pickup_location, Order.source_manifest_id
+        ).join(Order, Order.id == OrderPassenger.order_id).filter(name_filter).order_by(
+            Order.service_date.desc(), Order.id.desc(), OrderPassenger.position
+        ).limit(limit + 1).all()
+        
+        return jsonify({
+            'name': name,
+            'match': match,
+            'orders': [{
+                'passenger_name': row.name,
+                'passenger_type': row.passenger_type,
+                'passenger_position': row.position,
+                'id': row.id,
+                'service_id': row.service_id,
+                'action': row.action,
+                'service_date': row.service_date.isoformat() if row.service_date else None,
+                'service_type': row.service_type,
+                'status': row.status,
+                'pickup_location': row.pickup_location,
+                'source_manifest_id': row.source_manifest_id
+            } for row in rows[:limit]],
+            'truncated': len(rows) > limit
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error looking up passenger orders: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _orders_stats_etag():
+    # The figures change with the orders and, for date-relative ones, with the day
+    versions = change_counters.versions(['orders'])
+    return weak_etag(request.path, request.query_string.decode(), versions['orders'], datetime.utcnow().date())
+
 @orders_bp.route('/dashboard', methods=['GET'])
 @require_permission(Permissions.DASHBOARD_VIEW)
+@conditional(_orders_stats_etag, max_age=STATS_MAX_AGE)
 def get_orders_dashboard():
-    """Get dashboard statistics for orders."""
+    """Get dashboard statistics for orders (from the order_daily_stats rollup)."""
     try:
         # Get date range for filtering (default: last 30 days)
         days = request.args.get('days', 30, type=int)
-        date_from = datetime.utcnow().date() - datetime.timedelta(days=days)
-        
-        # Basic counts
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
-        approved_orders = Order.query.filter_by(status='approved').count()
-        completed_orders = Order.query.filter_by(status='completed').count()
-        cancelled_orders = Order.query.filter_by(status='cancelled').count()
-        
-        # Recent orders (last 30 days by default)
-        recent_orders = Order.query.filter(
-            Order.created_at >= datetime.combine(date_from, datetime.min.time())
-        ).count()
-        
-        # Orders by action type
-        new_orders = Order.query.filter_by(action='new').count()
-        change_orders = Order.query.filter_by(action='change').count()
-        cancel_orders = Order.query.filter_by(action='cancel').count()
-        
-        # Orders by service type
-        service_types = db.session.query(
-            Order.service_type,
-            db.func.count(Order.id).label('count')
-        ).filter(
-            Order.service_type.isnot(None)
-        ).group_by(Order.service_type).all()
-        
-        # Orders with missing data
-        missing_data_orders = Order.query.filter(
-            Order.missing_data_flags.isnot(None)
-        ).count()
+        today = datetime.utcnow().date()
+        date_from = today - timedelta(days=days)
+        
+        summary = {'total_orders': 0, 'recent_orders': 0, 'missing_data_orders': 0}
+        summary.update({f'{status}_orders': 0 for status in SUMMARY_STATUSES})
+        by_action = {'new': 0, 'change': 0, 'cancel': 0}
+        by_service_type = {}
+        
+        # One GROUP BY over the rollup: counts per status/action/service type
+        for status, action, service_type, count, missing, recent in order_rollup.totals(date_from):
+            summary['total_orders'] += count
+            summary['recent_orders'] += recent
+            summary['missing_data_orders'] += missing
+            if status in SUMMARY_STATUSES:
+                summary[f'{status}_orders'] += count
+            action_key = (action or '').lower()
+            if action_key in by_action:
+                by_action[action_key] += count
+            by_service_type[service_type] = by_service_type.get(service_type, 0) + count
         
         # Recent activity (last 7 days)
-        recent_activity = db.session.query(
-            db.func.date(Order.created_at).label('date'),
-            db.func.count(Order.id).label('count')
-        ).filter(
-            Order.created_at >= datetime.utcnow() - datetime.timedelta(days=7)
-        ).group_by(
-            db.func.date(Order.created_at)
-        ).order_by('date').all()
+        recent_activity = order_rollup.daily_counts(today - timedelta(days=7))
         
         return jsonify({
-            'summary': {
-                'total_orders': total_orders,
-                'pending_orders': pending_orders,
-                'approved_orders': approved_orders,
-                'completed_orders': completed_orders,
-                'cancelled_orders': cancelled_orders,
-                'recent_orders': recent_orders,
-                'missing_data_orders': missing_data_orders
-            },
-            'by_action': {
-                'new': new_orders,
-                'change': change_orders,
-                'cancel': cancel_orders
-            },
+            'summary': summary,
+            'by_action': by_action,
             'by_service_type': [
-                {'service_type': st[0], 'count': st[1]} 
-                for st in service_types
+                {'service_type': service_type, 'count': count}
+                for service_type, count in by_service_type.items()
             ],
             'recent_activity': [
-                {'date': activity[0].isoformat(), 'count': activity[1]}
-                for activity in recent_activity
+                {'date': day.isoformat(), 'count': count}
+                for day, count in recent_activity
             ]
         }), 200
         
@@ -465,42 +700,34 @@ def get_orders_dashboard():
 
 @orders_bp.route('/stats', methods=['GET'])
 @require_permission(Permissions.ORDERS_READ)
+@conditional(_orders_stats_etag, max_age=STATS_MAX_AGE)
 def get_orders_stats():
     """Get order statistics for dashboard."""
     try:
         # Get basic counts
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
-        completed_orders = Order.query.filter_by(status='completed').count()
-        cancelled_orders = Order.query.filter_by(status='cancelled').count()
+        counts = order_rollup.counts_by_status()
         
-        # Get monthly statistics for current year
-        from sqlalchemy import func, extract
+        # Get monthly statistics for current year: a day-range read of the rollup
         current_year = datetime.now().year
-        monthly_stats = db.session.query(
-            func.extract('month', Order.created_at).label('month'),
-            func.count(Order.id).label('count')
-        ).filter(
-            extract('year', Order.created_at) == current_year
-        ).group_by(
-            func.extract('month', Order.created_at)
-        ).all()
+        monthly_counts = {}
+        for day, count in order_rollup.daily_counts(date(current_year, 1, 1), date(current_year, 12, 31)):
+            monthly_counts[day.month] = monthly_counts.get(day.month, 0) + count
         
         # Format monthly stats
         months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
         monthly_data = []
-        for month_num, count in monthly_stats:
+        for month_num, count in sorted(monthly_counts.items()):
             monthly_data.append({
-                'month': months[int(month_num) - 1],
+                'month': months[month_num - 1],
                 'count': count
             })
         
         return jsonify({
-            'total_orders': total_orders,
-            'pending_orders': pending_orders,
-            'completed_orders': completed_orders,
-            'cancelled_orders': cancelled_orders,
+            'total_orders': sum(counts.values()),
+            'pending_orders': counts.get('pending', 0),
+            'completed_orders': counts.get('completed', 0),
+            'cancelled_orders': counts.get('cancelled', 0),
             'monthly_stats': monthly_data
         }), 200
         
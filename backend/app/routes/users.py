@@ -12,11 +12,15 @@ from app.models.user import User
 from app.models.rbac import Role, Permission, UserPermission
 from app.models.seeds import assign_user_role, user_has_higher_role
 from app.auth.decorators import require_permission, require_admin, require_manager_or_above, Permissions
+from app.utils.pagination import InvalidCursor, cursor_requested, keyset_page, parse_limit
 from app import db
 import re
 
 users_bp = Blueprint('users', __name__)
 
+# Keyset pagination keys of the users list: (column, descending)
+USER_KEYS = ((User.created_at, True), (User.id, True))
+
 def validate_email(email):
     """Validate email format."""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -78,17 +82,34 @@ def get_users():
             elif status_filter == 'unverified':
                 query = query.filter(User.is_verified == False)
         
-        # Order by creation date (newest first)
-        query = query.order_by(User.created_at.desc())
-        
-        # Paginate
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
-        
-        users = pagination.items
+        if cursor_requested(request.args):
+            # Keyset pagination on (created_at, id): no COUNT, no OFFSET
+            try:
+                users, pagination = keyset_page(
+                    query, USER_KEYS, request.args.get('cursor'),
+                    parse_limit(request.args, name='limit' if 'limit' in request.args else 'per_page')
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            # Order by creation date (newest first)
+            query = query.order_by(User.created_at.desc(), User.id.desc())
+            
+            # Paginate
+            page_result = query.paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False
+            )
+            users = page_result.items
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': page_result.total,
+                'pages': page_result.pages,
+                'has_next': page_result.has_next,
+                'has_prev': page_result.has_prev
+            }
         
         # Convert to dict with role information
         users_data = []
@@ -106,14 +127,7 @@ def get_users():
         
         return jsonify({
             'users': users_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            },
+            'pagination': pagination,
             'filters': {
                 'search': search,
                 'role': role_filter,
@@ -0,0 +1,178 @@
+"""
+Write-behind buffer for monitor bookkeeping.
+EmailLog rows, EmailConfig check status and processed-message keys are
+collected in memory and written in one transaction per flush: one multi-row
+INSERT for the logs and one executemany UPDATE per status shape, instead of
+a commit per email. A failed flush keeps all three for the next one, so the
+logged messages are not processed (and logged) a second time meanwhile.
+"""
+import atexit
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import bindparam, insert
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from app.models.email_config import EmailConfig, EmailLog
+from app.services.dedup_store import ProcessedEmailStore
+from app.utils.logging_config import setup_imap_logger, log_imap_activity
+
+LOG_COLUMNS = ('config_id', 'action', 'status', 'message', 'email_subject',
+               'email_sender', 'email_date', 'manifest_file', 'created_at')
+
+
+class ActivityBuffer:
+    """Collects EmailLog rows, last-check updates and processed keys; flushes them together.
+
+    flush() is called at the end of every monitor cycle, by a background
+    timer every `flush_interval_ms`, as soon as `max_rows` logs are pending,
+    and at interpreter exit.
+    """
+
+    def __init__(self, flush_interval_ms: int = 1000, max_rows: int = 500):
+        self.logger = setup_imap_logger('activity_buffer')
+        self.flush_interval_ms = flush_interval_ms
+        self.max_rows = max_rows
+        self.app = None
+        self._logs: List[Dict] = []
+        self._checks: Dict[int, Dict] = {}
+        self._processed: List[Tuple[ProcessedEmailStore, int, List[str]]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._kick = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+
+    def log(self, config_id: int, action: str, status: str, message: str = None, **kwargs):
+        """Buffer an EmailLog row (same arguments as EmailLog.log_activity)."""
+        row = dict.fromkeys(LOG_COLUMNS)
+        row.update(config_id=config_id, action=action, status=status,
+                   message=message, created_at=datetime.utcnow(), **kwargs)
+        with self._lock:
+            self._logs.append(row)
+            full = len(self._logs) >= self.max_rows
+        if full:
+            self._kick.set()  # wake the flusher early
+
+    def update_last_check(self, config, success: bool = True, error_message: str = None):
+        """Buffer EmailConfig.update_last_check; a loaded EmailConfig reflects it at once.
+
+        `config` may also be a MailboxSnapshot, which only needs its id.
+        """
+        now = datetime.utcnow()
+        values = {'last_check': now, 'last_error': None if success else error_message}
+        if success:
+            values['last_success'] = now
+        if isinstance(config, EmailConfig):
+            # Keep the in-session object current without marking it dirty
+            for name, value in values.items():
+                set_committed_value(config, name, value)
+        with self._lock:
+            self._checks[config.id] = {**self._checks.get(config.id, {}), **values}
+
+    def mark_processed(self, store: ProcessedEmailStore, config_id: int, keys: Iterable[str]):
+        """Buffer processed-message keys; `store` treats them as seen from now on."""
+        keys = list(keys)
+        if not keys:
+            return
+        store.stage(config_id, keys)
+        with self._lock:
+            self._processed.append((store, config_id, keys))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._logs) + len(self._checks) + len(self._processed)
+
+    def flush(self):
+        """Write everything buffered in one transaction (call inside an app context)."""
+        with self._flush_lock:
+            with self._lock:
+                logs, self._logs = self._logs, []
+                checks, self._checks = self._checks, {}
+                processed, self._processed = self._processed, []
+
+            try:
+                for store, config_id, keys in processed:
+                    store.write_staged(config_id, keys)
+                if logs:
+                    db.session.execute(insert(EmailLog.__table__), logs)
+                for shape, rows in self._group_checks(checks).items():
+                    table = EmailConfig.__table__
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.id == bindparam('config_id'))
+                        .values({name: bindparam(f'new_{name}') for name in shape})
+                        # Check status is not a config change: keep updated_at (and the
+                        # config registry fingerprint) as is
+                        .values(updated_at=table.c.updated_at),
+                        rows
+                    )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    # Put rows back (before newer ones) so the next flush retries them
+                    self._logs = logs + self._logs
+                    for config_id, values in checks.items():
+                        self._checks[config_id] = {**values, **self._checks.get(config_id, {})}
+                    self._processed = processed + self._processed
+                log_imap_activity(
+                    self.logger, 'ERROR', 'activity_flush_error',
+                    details={'logs': len(logs), 'configs': len(checks),
+                             'processed_keys': sum(len(keys) for _, _, keys in processed)},
+                    error=e
+                )
+                raise
+
+    def start(self, app=None):
+        """Start the periodic flusher and register the exit flush."""
+        if app is not None:
+            self.app = app
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._flush_loop, name='activity-flush', daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        self._kick.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.pending():
+            with self._app_context():
+                self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._kick.wait(self.flush_interval_ms / 1000)
+            self._kick.clear()
+            if self._stop.is_set() or not self.pending():
+                continue
+            try:
+                with self._app_context():
+                    self.flush()
+            except Exception:
+                pass  # logged by flush(); retried next tick
+
+    def _app_context(self):
+        if self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+    @staticmethod
+    def _group_checks(checks: Dict[int, Dict]) -> Dict[tuple, List[Dict]]:
+        """Group status updates by the set of columns they touch (one executemany each)."""
+        groups = {}
+        for config_id, values in checks.items():
+            shape = tuple(sorted(values))
+            groups.setdefault(shape, []).append(
+                {'config_id': config_id, **{f'new_{name}': value for name, value in values.items()}}
+            )
+        return groups
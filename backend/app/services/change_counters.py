@@ -0,0 +1,81 @@
+"""
+Per-table change counters for conditional GETs.
+Every transaction that inserts, updates or deletes rows of a tracked table -
+through the unit of work or a bulk ORM statement - bumps that table's row in
+change_counters once, in the same transaction. Readers build weak ETags from
+the counter with a primary key lookup, so "has anything changed?" costs one
+tiny SELECT and is answered the same by every worker process.
+
+Core statements that bypass the ORM (connection.execute on a Table) are not
+seen; code writing a tracked table that way must call bump() itself.
+"""
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.change_counter import ChangeCounter
+from app.models.manifest_email import ManifestEmail
+from app.models.order import Order
+from app.utils.db_writes import increment_or_insert, on_bulk_write
+
+# Mapped classes whose writes are counted, by change_counters.table_name
+TRACKED = {
+    Order: 'orders',
+    ManifestEmail: 'manifest_emails',
+}
+
+
+def bump(connection, table_name: str):
+    """Increment `table_name`'s counter (creating it on first use)."""
+    table = ChangeCounter.__table__
+    now = datetime.utcnow()
+    increment_or_insert(
+        connection,
+        update(table).where(table.c.table_name == table_name).values(version=table.c.version + 1, changed_at=now),
+        insert(table).values(table_name=table_name, version=1, changed_at=now)
+    )
+
+
+def versions(table_names: Iterable[str]) -> Dict[str, int]:
+    """{table_name: version}; 0 for tables never written since the counters were added."""
+    table_names = list(table_names)
+    table = ChangeCounter.__table__
+    rows = db.session.execute(
+        select(table.c.table_name, table.c.version).where(table.c.table_name.in_(table_names))
+    )
+    found = dict(rows.all())
+    return {name: found.get(name, 0) for name in table_names}
+
+
+def _bump_once(session, table_names: Iterable[str]):
+    """Bump each table at most once per transaction."""
+    bumped = session.info.setdefault('change_counters_bumped', set())
+    for name in table_names:
+        if name not in bumped:
+            bump(session.connection(), name)
+            bumped.add(name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_flushed_changes(session, flush_context):
+    names = {
+        TRACKED[type(obj)] for obj in chain(session.new, session.dirty, session.deleted)
+        if type(obj) in TRACKED and (obj not in session.dirty or session.is_modified(obj))
+    }
+    if names:
+        _bump_once(session, names)
+
+
+def _count_bulk_statement(session, mapped_class):
+    _bump_once(session, [TRACKED[mapped_class]])
+
+
+on_bulk_write(TRACKED, _count_bulk_statement)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _end_transaction(session):
+    session.info.pop('change_counters_bumped', None)
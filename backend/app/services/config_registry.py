@@ -0,0 +1,77 @@
+"""
+In-process registry of active email configurations.
+Keeps a MailboxSnapshot (with the decrypted password) per active config so
+the monitor loop does no DB reads or Fernet decryption between changes.
+The config routes invalidate it directly; other processes notice changes
+through a cheap fingerprint query (row count + latest updated_at) that is
+run at most every `refresh_interval` seconds.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from app import db
+from app.models.email_config import EmailConfig
+from app.services.imap_async import MailboxSnapshot
+
+
+class ConfigRegistry:
+    """Cached {config_id: MailboxSnapshot} of the active configurations."""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._snapshots: Dict[int, MailboxSnapshot] = {}
+        self._versions: Dict[int, object] = {}  # config_id -> updated_at of the snapshot
+        self._fingerprint: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def invalidate(self):
+        """Force a reload on next access (call after creating/updating/deleting a config)."""
+        self._dirty = True
+
+    def active(self) -> Dict[int, MailboxSnapshot]:
+        """Active configs by id; reloads only when something changed."""
+        with self._lock:
+            if self._dirty or self._changed_elsewhere():
+                self._reload()
+            return dict(self._snapshots)
+
+    def get(self, config_id: int) -> Optional[MailboxSnapshot]:
+        return self.active().get(config_id)
+
+    def _changed_elsewhere(self) -> bool:
+        # Throttled check for edits made by other processes
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return False
+        self._checked_at = now
+        return self._current_fingerprint() != self._fingerprint
+
+    def _current_fingerprint(self) -> Tuple:
+        count, last_update = db.session.query(
+            func.count(EmailConfig.id), func.max(EmailConfig.updated_at)
+        ).one()
+        return count, last_update
+
+    def _reload(self):
+        # Clear the flag and read the fingerprint first, so an edit made
+        # while reloading triggers another reload
+        self._dirty = False
+        fingerprint = self._current_fingerprint()
+        snapshots, versions = {}, {}
+        for config in EmailConfig.query.filter_by(is_active=True).all():
+            if self._versions.get(config.id) == config.updated_at and config.id in self._snapshots:
+                snapshots[config.id] = self._snapshots[config.id]  # unchanged: no decryption
+            else:
+                snapshots[config.id] = MailboxSnapshot.from_config(config)
+            versions[config.id] = config.updated_at
+        self._snapshots, self._versions = snapshots, versions
+        self._fingerprint = fingerprint
+        self._checked_at = time.monotonic()
+        self.reloads += 1
+
+
+config_registry = ConfigRegistry()
@@ -0,0 +1,148 @@
+"""
+Dedup store for messages already handled by the IMAP monitor.
+A bounded in-memory LRU sits in front of the processed_emails table, so
+steady-state polling answers from memory and a restart costs one query
+per fetched batch instead of reprocessing the mailbox.
+
+Keys only enter the LRU once the rows recording them are committed, so a
+batch whose commit fails is looked up - and processed - again. Keys staged
+for a later write (ActivityBuffer) count as seen until that write commits.
+
+Rows only need to outlive the monitors' SINCE window (yesterday's date, so
+up to two days back): older mail is never fetched again. prune() drops rows
+past the retention period, run by the polling leader and `flask
+prune-processed-emails`.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.email_config import ProcessedEmail
+
+MIN_RETENTION_DAYS = 3  # SINCE is date-granular: keep more than the two days it can reach back
+PRUNE_BATCH_SIZE = 1000  # ids per DELETE, below SQL Server's 2100 parameter limit
+
+
+def message_key(email_info: Dict) -> str:
+    """Stable identity of a message: Message-ID header, else folder + IMAP UID."""
+    message_id = (email_info.get('message_id') or '').strip()
+    if message_id:
+        return message_id[:255]
+    if email_info.get('folder'):
+        return f"uid:{email_info['folder']}:{email_info['id']}"[:255]
+    return f"uid:{email_info['id']}"
+
+
+class ProcessedEmailStore:
+    """(config_id, message_key) membership with an LRU front and a DB back."""
+
+    def __init__(self, max_entries: int = 10000, retention_days: int = 7):
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self._cache = OrderedDict()
+        self._staged = set()  # (config_id, key) waiting for write_staged() to commit
+        self._lock = threading.Lock()
+
+    def filter_new(self, config_id: int, keys: Iterable[str]) -> List[str]:
+        """Return the keys not seen before, in input order (at most one query)."""
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            unknown = [key for key in keys
+                       if (config_id, key) not in self._staged and not self._touch((config_id, key))]
+        if not unknown:
+            return []
+
+        existing = ProcessedEmail.find_existing(config_id, unknown)
+        with self._lock:
+            for key in existing:
+                self._remember((config_id, key))
+        return [key for key in unknown if key not in existing]
+
+    def mark_processed(self, config_id: int, keys: Iterable[str], commit: bool = True):
+        """Record keys as processed in the database, and in memory once committed.
+
+        With commit=False the rows are left in the session for a later commit
+        (e.g. ActivityBuffer.flush); the keys reach the LRU only if it succeeds.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        db.session.add_all([ProcessedEmail(config_id=config_id, message_key=key) for key in keys])
+        cache_keys = [(config_id, key) for key in keys]
+        if commit:
+            db.session.commit()
+            self._remember_all(cache_keys)
+        else:
+            db.session.info.setdefault('processed_email_keys', []).append((self, cache_keys))
+
+    def stage(self, config_id: int, keys: Iterable[str]):
+        """Treat keys as seen until a write_staged() for them commits."""
+        with self._lock:
+            self._staged.update((config_id, key) for key in keys)
+
+    def write_staged(self, config_id: int, keys: Iterable[str]):
+        """Add rows for staged keys to the session, skipping keys stored meanwhile; the caller commits.
+
+        On rollback the keys stay staged, so the caller can retry the write.
+        """
+        keys = list(dict.fromkeys(keys))
+        existing = ProcessedEmail.find_existing(config_id, keys)
+        self._remember_all([(config_id, key) for key in existing])
+        self.mark_processed(config_id, [key for key in keys if key not in existing], commit=False)
+
+    def prune(self, retention_days: int = None, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+        """Delete rows older than the retention period, one commit per batch; return the count.
+
+        Keys still in the LRU stay there: they were processed all the same.
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        if retention_days < MIN_RETENTION_DAYS:
+            raise ValueError(f'retention_days must be at least {MIN_RETENTION_DAYS}')
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = 0
+        while True:
+            ids = [row[0] for row in db.session.query(ProcessedEmail.id).filter(
+                ProcessedEmail.created_at < cutoff
+            ).order_by(ProcessedEmail.id).limit(batch_size).all()]
+            if not ids:
+                return deleted
+            db.session.query(ProcessedEmail).filter(
+                ProcessedEmail.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _touch(self, cache_key) -> bool:
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return True
+        return False
+
+    def _remember_all(self, cache_keys):
+        with self._lock:
+            for cache_key in cache_keys:
+                self._staged.discard(cache_key)
+                self._remember(cache_key)
+
+    def _remember(self, cache_key):
+        self._cache[cache_key] = True
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_committed_keys(session):
+    for store, cache_keys in session.info.pop('processed_email_keys', ()):
+        store._remember_all(cache_keys)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_staged_keys(session):
+    session.info.pop('processed_email_keys', None)
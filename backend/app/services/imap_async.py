@@ -0,0 +1,147 @@
+"""
+Asyncio engine for checking many IMAP mailboxes concurrently.
+Drives one check per mailbox in parallel, with a per-mailbox timeout and a
+global concurrency limit, so a slow server no longer delays the others.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+
+@dataclass
+class MailboxSnapshot:
+    """Plain, thread-safe copy of an EmailConfig used by worker threads."""
+    id: int
+    name: str
+    imap_server: str
+    imap_port: int
+    email: str
+    password: str
+    use_ssl: bool = True
+    use_starttls: bool = False
+    folder: str = 'INBOX'
+    folders: List[str] = field(default_factory=list)  # all monitored folders, main one first
+    subject_filter: Optional[str] = None
+    sender_filter: Optional[str] = None
+    body_filter: Optional[str] = None
+    attachment_filter: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config) -> 'MailboxSnapshot':
+        """Build a snapshot from an EmailConfig (decrypts the password once)."""
+        return cls(
+            id=config.id,
+            name=config.name,
+            imap_server=config.imap_server,
+            imap_port=config.imap_port,
+            email=config.email,
+            password=config.get_password(),
+            use_ssl=config.use_ssl,
+            use_starttls=config.use_starttls,
+            folder=config.folder or 'INBOX',
+            folders=config.monitored_folders,
+            subject_filter=config.subject_filter,
+            sender_filter=config.sender_filter,
+            body_filter=config.body_filter,
+            attachment_filter=config.attachment_filter
+        )
+
+    def get_password(self) -> str:
+        """Same accessor as EmailConfig, so IMAP helpers accept either."""
+        return self.password
+
+
+@dataclass
+class MailboxResult:
+    """Outcome of one mailbox check within a cycle."""
+    config_id: int
+    value: Any = None
+    error: Optional[Exception] = None
+    elapsed: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class AsyncMailboxEngine:
+    """Run blocking IMAP checks for all mailboxes concurrently.
+
+    imaplib is blocking, so each check runs on a bounded thread pool driven
+    by an asyncio event loop. The loop enforces the per-mailbox timeout and
+    the global concurrency limit; the socket timeout set on each connection
+    makes sure a hung server also releases its worker thread.
+    """
+
+    def __init__(self, max_concurrency: int = 10, mailbox_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.mailbox_timeout = mailbox_timeout
+        self.last_cycle_seconds = None
+        self._executor = None
+
+    def configure(self, max_concurrency: int = None, mailbox_timeout: float = None):
+        """Update limits; the worker pool is recreated on the next cycle."""
+        if max_concurrency and max_concurrency != self.max_concurrency:
+            self.max_concurrency = max_concurrency
+            self.shutdown()
+        if mailbox_timeout:
+            self.mailbox_timeout = mailbox_timeout
+
+    def run_cycle(self, mailboxes: List[MailboxSnapshot],
+                  fetch: Callable[[MailboxSnapshot], Any]) -> List[MailboxResult]:
+        """Check every mailbox once. Results are returned in input order."""
+        if not mailboxes:
+            return []
+
+        started = time.monotonic()
+        results = asyncio.run(self._gather(mailboxes, fetch))
+        self.last_cycle_seconds = time.monotonic() - started
+        return results
+
+    def shutdown(self):
+        """Release the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # Headroom for threads still finishing a call that already timed out
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency * 2,
+                thread_name_prefix='imap-mailbox'
+            )
+        return self._executor
+
+    async def _gather(self, mailboxes, fetch) -> List[MailboxResult]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(
+            *(self._run_mailbox(mailbox, fetch, semaphore) for mailbox in mailboxes)
+        )
+
+    async def _run_mailbox(self, mailbox, fetch, semaphore) -> MailboxResult:
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                value = await asyncio.wait_for(
+                    loop.run_in_executor(self._get_executor(), fetch, mailbox),
+                    timeout=self.mailbox_timeout
+                )
+                return MailboxResult(mailbox.id, value=value,
+                                     elapsed=time.monotonic() - started)
+            except asyncio.TimeoutError:
+                return MailboxResult(
+                    mailbox.id,
+                    error=TimeoutError(
+                        f"Mailbox '{mailbox.name}' did not respond within {self.mailbox_timeout}s"
+                    ),
+                    elapsed=time.monotonic() - started,
+                    timed_out=True
+                )
+            except Exception as e:
+                return MailboxResult(mailbox.id, error=e,
+                                     elapsed=time.monotonic() - started)
@@ -0,0 +1,86 @@
+"""
+Multi-folder support for IMAP checks.
+A config can monitor several folders over one authenticated session. Before
+SELECTing a folder the monitor asks for its STATUS (UIDVALIDITY, UIDNEXT,
+MESSAGES) and skips folders that have not changed since the last check.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.services.imap_search import imap_quote
+
+STATUS_ITEMS = '(MESSAGES UIDNEXT UIDVALIDITY)'
+_STATUS_PATTERN = re.compile(rb'(MESSAGES|UIDNEXT|UIDVALIDITY)\s+(\d+)', re.IGNORECASE)
+_ATOM_PATTERN = re.compile(r'^[A-Za-z0-9_./\-]+$')
+
+
+def quote_mailbox(name: str) -> str:
+    """Mailbox argument for SELECT/STATUS: plain atom, or quoted if it has spaces etc."""
+    return name if _ATOM_PATTERN.match(name) else imap_quote(name)
+
+
+@dataclass(frozen=True)
+class FolderStatus:
+    uidvalidity: int
+    uidnext: int
+    messages: int
+
+
+def parse_status(data) -> Optional[FolderStatus]:
+    """Parse an untagged STATUS response, e.g. b'INBOX (MESSAGES 3 UIDNEXT 9 UIDVALIDITY 1)'."""
+    if not data or not data[0]:
+        return None
+    line = data[0] if isinstance(data[0], bytes) else str(data[0]).encode()
+    values = {key.upper(): int(value) for key, value in _STATUS_PATTERN.findall(line)}
+    if len(values) < 3:
+        return None
+    return FolderStatus(values[b'UIDVALIDITY'], values[b'UIDNEXT'], values[b'MESSAGES'])
+
+
+def successful_statuses(statuses: Dict[str, FolderStatus], failed_folders: List[str]) -> Dict[str, FolderStatus]:
+    """The statuses to commit: those of folders whose SEARCH and FETCHes all succeeded."""
+    return {folder: status for folder, status in statuses.items() if folder not in failed_folders}
+
+
+class FolderTracker:
+    """Last seen STATUS per (config, folder); decides which folders need a check.
+
+    New statuses are only remembered via commit() once the caller has
+    processed the folder, so a failed check is retried on the next cycle.
+    """
+
+    def __init__(self):
+        self._seen: Dict[Tuple[int, str], FolderStatus] = {}
+        self._lock = threading.Lock()
+
+    def changed_folders(self, mail, config_id: int,
+                        folders: List[str]) -> Tuple[List[str], Dict[str, FolderStatus]]:
+        """STATUS every folder; return the changed ones and their new statuses."""
+        changed, statuses = [], {}
+        for folder in folders:
+            try:
+                result, data = mail.status(quote_mailbox(folder), STATUS_ITEMS)
+                status = parse_status(data) if result == 'OK' else None
+            except Exception:
+                status = None
+            if status is None:
+                # Server without STATUS support, or unknown folder: let SELECT decide
+                changed.append(folder)
+                continue
+            statuses[folder] = status
+            with self._lock:
+                previous = self._seen.get((config_id, folder))
+            if previous != status:
+                changed.append(folder)
+        return changed, statuses
+
+    def previous(self, config_id: int, folder: str) -> Optional[FolderStatus]:
+        """Last committed status of a folder (None until a check of it succeeded)."""
+        with self._lock:
+            return self._seen.get((config_id, folder))
+
+    def commit(self, config_id: int, statuses: Dict[str, FolderStatus]):
+        with self._lock:
+            for folder, status in statuses.items():
+                self._seen[(config_id, folder)] = status
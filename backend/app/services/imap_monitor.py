@@ -8,14 +8,30 @@ import ssl
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from app import db
-from app.models.email_config import EmailConfig, EmailLog
+from app.models.email_config import EmailConfig
+from app.services.imap_async import AsyncMailboxEngine, MailboxSnapshot
+from app.services.imap_scheduler import AdaptiveScheduler, parse_busy_hours
+from app.services.dedup_store import ProcessedEmailStore, message_key
+from app.services.imap_search import Criterion, SearchQuery
+from app.services.leader_lease import LeaderLease
+from app.services.imap_sharding import ShardAssignment
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.activity_buffer import ActivityBuffer
+from app.services.imap_folders import FolderStatus, FolderTracker, quote_mailbox, successful_statuses
+from app.services.config_registry import config_registry
+from app.services.monitor_timings import StageTimings
 from app.utils.logging_config import setup_imap_logger, log_imap_activity
+from contextlib import nullcontext
+from flask import current_app, has_app_context
+from werkzeug.local import LocalProxy
 import threading
 import time
 
 class IMAPMonitorService:
     """Service for monitoring IMAP email accounts."""
     
+    PRUNE_INTERVAL = 6 * 3600  # seconds between processed_emails retention passes
+    
     def __init__(self):
         self.logger = setup_imap_logger('imap_service')
         self.monitoring_active = False
@@ -23,103 +39,432 @@ class IMAPMonitorService:
         self.check_interval = 300  # 5 minutes default
         self.continuous_monitoring = False
         self.continuous_thread = None
-        self.processed_email_ids = {}  # Track processed emails per config
-        
+        self.continuous_interval = 5
+        self.processed_store = ProcessedEmailStore()  # Messages already handled, per config
+        self.socket_timeout = 30  # seconds, applied to every IMAP socket
+        self.engine = AsyncMailboxEngine(max_concurrency=10, mailbox_timeout=30)
+        self.scheduler = AdaptiveScheduler()
+        self.scheduler_thread = None
+        self._wakeup = threading.Event()
+        self.lease = LeaderLease('imap_monitor')  # Only the lease holder polls
+        self.heartbeat_thread = None  # Renews the lease, however long a cycle takes
+        self._heartbeat_wakeup = threading.Event()
+        self.shard = None  # ShardAssignment when running as `flask imap-worker`
+        self._owned_configs = set()
+        self.pipeline = IngestPipeline(connect=self._connect_to_imap, processed_store=self.processed_store)  # Approved mail -> orders
+        self.activity = ActivityBuffer()  # EmailLog rows and check status, written per cycle
+        self.folder_tracker = FolderTracker()  # Last STATUS per folder, to skip unchanged ones
+        self.registry = config_registry  # Active configs with decrypted credentials
+        self.timings = StageTimings()  # Per-stage durations of recent checks, for the status endpoints
+        self.app = None
+        self._last_prune = None  # monotonic time of the last processed_emails prune
+    
+    def _bind_app(self):
+        """Remember the Flask app and its IMAP limits for background threads."""
+        if not has_app_context():
+            return
+        self.app = current_app._get_current_object()
+        self.socket_timeout = self.app.config.get('IMAP_MAILBOX_TIMEOUT', self.socket_timeout)
+        self.engine.configure(
+            max_concurrency=self.app.config.get('IMAP_MAX_CONCURRENCY'),
+            mailbox_timeout=self.app.config.get('IMAP_MAILBOX_TIMEOUT')
+        )
+        self.scheduler.max_backoff = self.app.config.get('IMAP_MAX_BACKOFF', self.scheduler.max_backoff)
+        self.scheduler.busy_hours = parse_busy_hours(self.app.config.get('IMAP_BUSY_HOURS'))
+        self.processed_store.max_entries = self.app.config.get('IMAP_DEDUP_CACHE_SIZE', self.processed_store.max_entries)
+        self.processed_store.retention_days = self.app.config.get('IMAP_DEDUP_RETENTION_DAYS', self.processed_store.retention_days)
+        self.lease.ttl = self.app.config.get('IMAP_LEASE_TTL', self.lease.ttl)
+        self.registry.refresh_interval = self.app.config.get('CONFIG_REGISTRY_REFRESH', self.registry.refresh_interval)
+        self.activity.flush_interval_ms = self.app.config.get('EMAIL_LOG_FLUSH_INTERVAL_MS', self.activity.flush_interval_ms)
+        self.activity.max_rows = self.app.config.get('EMAIL_LOG_BUFFER_SIZE', self.activity.max_rows)
+        timings_capacity = self.app.config.get('IMAP_TIMINGS_BUFFER', self.timings.capacity)
+        if timings_capacity != self.timings.capacity:
+            self.timings.configure(timings_capacity)
+        if not self.pipeline.running:
+            self.pipeline = IngestPipeline(
+                fetch_workers=self.app.config.get('INGEST_FETCH_WORKERS', 2),
+                parse_workers=self.app.config.get('INGEST_PARSE_WORKERS', 2),
+                queue_size=self.app.config.get('INGEST_QUEUE_SIZE', 100),
+                batch_size=self.app.config.get('INGEST_BATCH_SIZE', 50),
+                connect=self._connect_to_imap,
+                processed_store=self.processed_store
+            )
+    
+    def assign_shard(self, shard: ShardAssignment):
+        """Restrict this service to the mailboxes of one shard.
+
+        Each shard has its own lease, so a second worker started for the same
+        shard stays on standby instead of polling the same mailboxes.
+        """
+        self.shard = shard
+        self.lease.name = f'imap_monitor:{shard.index}/{shard.count}'
+    
+    def _app_context(self):
+        """App context for monitor threads (no-op if already inside one)."""
+        if self.app is None or has_app_context():
+            return nullcontext()
+        return self.app.app_context()
+    
     def start_monitoring(self, interval_seconds=300):
         """Start background monitoring of all active email configurations."""
         if self.monitoring_active:
             self.logger.warning("🔄 IMAP monitoring already active")
             return
         
+        self._bind_app()
+        self._set_mode_stopped('regular', False)
         self.check_interval = interval_seconds
         self.monitoring_active = True
-        
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        self.monitor_thread = self._ensure_scheduler_thread()
         
         log_imap_activity(
             self.logger, 'INFO', 'monitoring_started',
             details={'interval': f'{interval_seconds}s'}
         )
     
+    def stop_monitoring(self, deployment_wide: bool = False):
+        """Stop background monitoring.
+
+        With `deployment_wide` (admin stop requests) the stop is also recorded
+        on the lease, so the leader stops even if it is another worker.
+        """
+        if deployment_wide:
+            self._set_mode_stopped('regular', True)
+        self.monitoring_active = False
+        self._wakeup.set()
+        self._heartbeat_wakeup.set()
+        log_imap_activity(self.logger, 'INFO', 'monitoring_stopped')
+    
     def start_continuous_monitoring(self, interval_seconds=5):
         """Start continuous monitoring every 5 seconds (like the user's script)."""
         if self.continuous_monitoring:
             self.logger.warning("🔄 IMAP continuous monitoring already active")
             return
         
+        self._bind_app()
+        self._set_mode_stopped('continuous', False)
+        self.continuous_interval = interval_seconds
         self.continuous_monitoring = True
-        self.continuous_thread = threading.Thread(target=self._continuous_monitor_loop, args=(interval_seconds,), daemon=True)
-        self.continuous_thread.start()
+        self.continuous_thread = self._ensure_scheduler_thread()
         
         log_imap_activity(
             self.logger, 'INFO', 'continuous_monitoring_started',
             details={'interval': f'{interval_seconds}s', 'mode': 'real_time'}
         )
     
-    def stop_continuous_monitoring(self):
-        """Stop continuous monitoring."""
+    def stop_continuous_monitoring(self, deployment_wide: bool = False):
+        """Stop continuous monitoring (see stop_monitoring for `deployment_wide`)."""
+        if deployment_wide:
+            self._set_mode_stopped('continuous', True)
         self.continuous_monitoring = False
+        self._wakeup.set()
+        self._heartbeat_wakeup.set()
         log_imap_activity(self.logger, 'INFO', 'continuous_monitoring_stopped')
     
-    def _continuous_monitor_loop(self, interval_seconds):
-        """Continuous monitoring loop (every 5 seconds like user's script)."""
-        while self.continuous_monitoring:
+    def _set_mode_stopped(self, mode: str, stopped: bool):
+        """Record a deployment-wide stop (or its lifting by a new start) on the lease."""
+        if has_app_context():
+            self.lease.set_mode_stopped(mode, stopped)
+    
+    def _ensure_scheduler_thread(self) -> threading.Thread:
+        """Start the shared scheduler and heartbeat threads unless they are already running."""
+        self._wakeup.set()  # pick up the new mode immediately
+        self.pipeline.start(self.app)
+        self.activity.start(self.app)
+        if self.scheduler_thread is None or not self.scheduler_thread.is_alive():
+            self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+            self.scheduler_thread.start()
+        if self.heartbeat_thread is None or not self.heartbeat_thread.is_alive():
+            self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='imap-lease', daemon=True)
+            self.heartbeat_thread.start()
+        return self.scheduler_thread
+    
+    def _active_modes(self) -> Dict[str, float]:
+        """Base polling interval of each enabled monitor mode."""
+        modes = {}
+        if self.monitoring_active:
+            modes['regular'] = self.check_interval
+        if self.continuous_monitoring:
+            modes['continuous'] = self.continuous_interval
+        return modes
+    
+    def _scheduler_loop(self):
+        """Single monitoring loop: check whichever mailboxes are due, then sleep.
+
+        Every process runs this loop, but only the holder of the leader lease
+        polls; the lease itself is taken and renewed by the heartbeat thread.
+        """
+        while self.monitoring_active or self.continuous_monitoring:
+            self._wakeup.clear()
             try:
-                self._check_all_configs_continuous()
+                with self._app_context():
+                    if self.lease.is_valid():
+                        self._run_due_checks()
+                        self._prune_processed()
             except Exception as e:
                 log_imap_activity(
-                    self.logger, 'ERROR', 'continuous_monitoring_error',
+                    self.logger, 'ERROR', 'monitoring_loop_error',
                     error=e
                 )
             
-            # Wait for next check
-            time.sleep(interval_seconds)
+            # Sleep until the next mailbox is due, a mode is started/stopped or
+            # the heartbeat takes the lease over
+            self._wakeup.wait(self.scheduler.seconds_until_next() if self.lease.is_leader else self.lease.ttl / 3)
+        
+        self.pipeline.stop()
+        try:
+            self.activity.shutdown()
+        except Exception as e:
+            log_imap_activity(self.logger, 'ERROR', 'activity_shutdown_error', error=e)
+        self._heartbeat_wakeup.set()  # last cycle written: the lease can go
+    
+    def _heartbeat_loop(self):
+        """Keep the leader lease renewed every ttl/3, however long a cycle runs.
+
+        Also applies the modes an admin stopped on another worker. After
+        monitoring stops, the lease is kept until the scheduler thread has
+        written its last cycle, then released.
+        """
+        while self.monitoring_active or self.continuous_monitoring or self._scheduler_running():
+            self._heartbeat_wakeup.clear()
+            try:
+                with self._app_context():
+                    if self.monitoring_active or self.continuous_monitoring:
+                        self._renew_leadership()
+                        self._apply_stop_requests()
+                    elif self.lease.is_leader:
+                        self.lease.acquire()  # a last cycle is still being written
+            except Exception as e:
+                log_imap_activity(self.logger, 'ERROR', 'lease_heartbeat_error', error=e)
+            self._heartbeat_wakeup.wait(self.lease.ttl / 3)
+        
+        try:
+            with self._app_context():
+                self.lease.release()
+        except Exception as e:
+            log_imap_activity(self.logger, 'ERROR', 'lease_release_error', error=e)
+    
+    def _scheduler_running(self) -> bool:
+        return self.scheduler_thread is not None and self.scheduler_thread.is_alive()
+    
+    def _renew_leadership(self) -> bool:
+        """Acquire or renew the leader lease, logging leadership changes."""
+        was_leader = self.lease.is_leader
+        is_leader = self.lease.acquire()
+        if is_leader != was_leader:
+            log_imap_activity(
+                self.logger, 'INFO', 'leadership_acquired' if is_leader else 'leadership_lost',
+                details={'holder': self.lease.holder_id}
+            )
+            if is_leader:
+                self._wakeup.set()  # start polling now
+        return is_leader
     
-    def _check_all_configs_continuous(self):
-        """Check all active configs continuously (like user's script logic)."""
-        configs = EmailConfig.query.filter_by(is_active=True).all()
+    def _apply_stop_requests(self):
+        """Stop the modes an admin stopped through another worker."""
+        stopped = self.lease.stopped_modes()
+        if 'regular' in stopped and self.monitoring_active:
+            self.stop_monitoring()
+        if 'continuous' in stopped and self.continuous_monitoring:
+            self.stop_continuous_monitoring()
+    
+    def _run_due_checks(self):
+        """Sync the schedule with active configs and check the due mailboxes."""
+        configs = self.registry.active()  # cached: no DB read unless configs changed
+        if self.shard is not None:
+            configs = self._rebalance(configs)
+        modes = self._active_modes()
+        
+        self.scheduler.sync({
+            (mode, config_id): interval
+            for mode, interval in modes.items()
+            for config_id in configs
+        })
         
-        if not configs:
+        due = self.scheduler.pop_due()
+        due_by_mode = {}
+        for mode, config_id in due:
+            due_by_mode.setdefault(mode, []).append(configs[config_id])
+        
+        try:
+            for mode, due_configs in due_by_mode.items():
+                # A failing batch must not keep the other mode from running
+                try:
+                    self._check_configs(mode, due_configs)
+                except Exception as e:
+                    log_imap_activity(
+                        self.logger, 'ERROR', 'batch_check_failed',
+                        details={'mode': mode, 'configs_count': len(due_configs)},
+                        error=e
+                    )
+        finally:
+            # Popped keys stay out of the queue until recorded: back off any
+            # that were not, so no mailbox is left unscheduled
+            for key in due:
+                if self.scheduler.is_in_flight(key):
+                    self.scheduler.record_failure(key)
+    
+    def _prune_processed(self):
+        """Drop processed_emails rows past the retention period, every PRUNE_INTERVAL.
+
+        Shards share the table, so only the first one prunes it.
+        """
+        if self.shard is not None and self.shard.index != 0:
+            return
+        if self._last_prune is not None and time.monotonic() - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = time.monotonic()
+        try:
+            deleted = self.processed_store.prune()
+        except Exception as e:
+            db.session.rollback()
+            log_imap_activity(self.logger, 'ERROR', 'processed_emails_prune_failed', error=e)
             return
+        if deleted:
+            log_imap_activity(
+                self.logger, 'INFO', 'processed_emails_pruned',
+                details={'deleted': deleted, 'retention_days': self.processed_store.retention_days}
+            )
+    
+    def _rebalance(self, configs: Dict[int, MailboxSnapshot]) -> Dict[int, MailboxSnapshot]:
+        """Keep only this shard's configs, logging mailboxes gained or dropped."""
+        owned = self.shard.filter(configs)
+        if owned != self._owned_configs:
+            log_imap_activity(
+                self.logger, 'INFO', 'shard_rebalanced',
+                details={
+                    'shard': self.shard.label,
+                    'owned': len(owned),
+                    'added': sorted(owned - self._owned_configs),
+                    'removed': sorted(self._owned_configs - owned)
+                }
+            )
+            self._owned_configs = owned
+        return {config_id: configs[config_id] for config_id in owned}
+    
+    def _check_configs(self, mode: str, configs: List[MailboxSnapshot]):
+        """Check a batch of mailboxes in parallel and feed outcomes to the scheduler."""
+        if mode == 'continuous':
+            fetch, handle = self._fetch_latest_emails, self._handle_continuous_result
+        else:
+            fetch, handle = self._fetch_recent_emails, self._apply_check_results
         
         log_imap_activity(
-            self.logger, 'DEBUG', 'continuous_batch_check',
-            details={'configs_count': len(configs), 'mode': 'real_time'}
+            self.logger, 'DEBUG', 'batch_check_start',
+            details={'configs_count': len(configs), 'mode': mode}
         )
         
-        for config in configs:
+        try:
+            results = self.engine.run_cycle(configs, fetch)
+        except Exception:
+            for config in configs:
+                self.scheduler.record_failure((mode, config.id))
+            raise
+        
+        if not self.lease.is_valid():
+            # The lease lapsed during the cycle and another worker may be
+            # polling already: leave these results to it
+            log_imap_activity(
+                self.logger, 'WARNING', 'leadership_lost_during_cycle',
+                details={'mode': mode, 'configs_count': len(configs)}
+            )
+            return
+        
+        for config, result in zip(configs, results):
             try:
-                self.check_config_emails_continuous(config)
+                outcome = handle(config, result.value, result.error)
+                self.scheduler.record_success((mode, config.id), outcome.get('new_emails', 0))
             except Exception as e:
+                self.scheduler.record_failure((mode, config.id))
                 log_imap_activity(
-                    self.logger, 'ERROR', 'continuous_config_check_failed',
+                    self.logger, 'ERROR', 'config_check_failed',
                     config_name=config.name,
+                    details={'mode': mode, 'elapsed': f'{result.elapsed:.2f}s', 'timed_out': result.timed_out},
                     error=e
                 )
+        
+        # One commit for the whole batch: logs, check status and dedup keys
+        with self.timings.measure('commit'):
+            self.activity.flush()
+    
+    def get_schedule_status(self) -> List[Dict]:
+        """Per-mailbox polling state for the status endpoints."""
+        status = []
+        for entry in self.scheduler.snapshot():
+            mode, config_id = entry.pop('key')
+            status.append({'config_id': config_id, 'mode': mode, **entry})
+        return status
     
     def check_config_emails_continuous(self, config: EmailConfig) -> Dict:
         """Check emails continuously for a config (like user's script)."""
         try:
-            # Initialize processed emails set for this config if not exists
-            if config.id not in self.processed_email_ids:
-                self.processed_email_ids[config.id] = set()
-            
+            fetched, error = self._fetch_latest_emails(MailboxSnapshot.from_config(config)), None
+        except Exception as e:
+            fetched, error = None, e
+        try:
+            return self._handle_continuous_result(config, fetched, error)
+        finally:
+            self.activity.flush()
+    
+    def _fetch_latest_emails(self, mailbox: MailboxSnapshot) -> Dict:
+        """Network part of a continuous check; safe to run off the app thread."""
+        with self.timings.cycle(mailbox.id, 'continuous'):
             # Connect to IMAP
-            mail = self._connect_to_imap(config)
+            mail = self._connect_to_imap(mailbox)
             
-            # Get latest 10 emails (like user's script)
-            latest_emails = self._get_latest_emails_continuous(mail, config, limit=10)
+            try:
+                # One session for all folders; unchanged folders are not even selected
+                with self.timings.stage('select'):  # STATUS of every monitored folder
+                    folders, folder_status = self.folder_tracker.changed_folders(mail, mailbox.id, mailbox.folders)
+                
+                latest_emails = []
+                failed_folders = []
+                for folder in folders:
+                    self._select_folder(mail, folder)
+                    # Get latest 10 emails per folder (like user's script)
+                    base = self._continuous_search_base(mailbox.id, folder, folder_status.get(folder))
+                    emails, complete = self._get_latest_emails_continuous(mail, mailbox, limit=10, base=base)
+                    for email_info in emails:
+                        email_info['folder'] = folder
+                        latest_emails.append(email_info)
+                    if not complete:
+                        failed_folders.append(folder)
+                    mail.close()
+            finally:
+                # Close connection
+                mail.logout()
             
-            # Close connection
-            mail.close()
-            mail.logout()
+            return {
+                'emails': latest_emails,
+                'folder_status': successful_statuses(folder_status, failed_folders),
+                'folders_checked': folders,
+                'folders_failed': failed_folders,
+                'folders_skipped': len(mailbox.folders) - len(folders)
+            }
+    
+    def _select_folder(self, mail: imaplib.IMAP4, folder: str) -> int:
+        """SELECT a folder and return its message count."""
+        with self.timings.stage('select'):
+            status, messages = mail.select(quote_mailbox(folder))
+        if status != 'OK':
+            raise Exception(f"Cannot select folder '{folder}'")
+        return int(messages[0]) if messages and messages[0] else 0
+    
+    def _handle_continuous_result(self, config: EmailConfig, fetched: Optional[Dict],
+                                  error: Optional[Exception]) -> Dict:
+        """Database part of a continuous check: approval, logs and status."""
+        try:
+            if error is not None:
+                raise error
             
             # Process new emails and check approval
-            result = self._process_new_emails_for_approval(config, latest_emails)
+            result = self._process_new_emails_for_approval(config, fetched['emails'])
+            result['folders_skipped'] = fetched['folders_skipped']
+            result['folders_failed'] = fetched['folders_failed']
+            self.folder_tracker.commit(config.id, fetched['folder_status'])
             
             # Update config status
-            config.update_last_check(success=True)
+            self.activity.update_last_check(config, success=True)
             
             if result['new_emails'] > 0:
                 log_imap_activity(
@@ -136,7 +481,7 @@ class IMAPMonitorService:
             return result
             
         except Exception as e:
-            config.update_last_check(success=False, error_message=str(e))
+            self.activity.update_last_check(config, success=False, error_message=str(e))
             log_imap_activity(
                 self.logger, 'ERROR', 'continuous_check_failed',
                 config_name=config.name,
@@ -144,16 +489,41 @@ class IMAPMonitorService:
             )
             raise
     
-    def _get_latest_emails_continuous(self, mail: imaplib.IMAP4, config: EmailConfig, limit: int = 10) -> List[Dict]:
-        """Get latest emails (like user's script ALL search + limit)."""
+    def _continuous_search_base(self, config_id: int, folder: str, status: Optional[FolderStatus]) -> str:
+        """Messages a continuous SEARCH looks at: those new since the last check.
+        
+        Its BODY criterion makes the server read every message it covers, so
+        it starts at the UIDNEXT committed by the last successful check, or
+        covers yesterday's mail when there is none (first check, new
+        UIDVALIDITY, server without STATUS).
+        """
+        previous = self.folder_tracker.previous(config_id, folder)
+        if previous is not None and status is not None and previous.uidvalidity == status.uidvalidity:
+            return f'UID {previous.uidnext}:*'
+        return self._since_yesterday()
+    
+    @staticmethod
+    def _since_yesterday() -> str:
+        yesterday = datetime.now() - timedelta(days=1)
+        return f'SINCE "{yesterday.strftime("%d-%b-%Y")}"'
+    
+    def _get_latest_emails_continuous(self, mail: imaplib.IMAP4, config: EmailConfig,
+                                      limit: int = 10, base: str = 'ALL') -> Tuple[List[Dict], bool]:
+        """Get latest emails matching the filters (server-side search + limit).
+        
+        Returns (emails, complete); complete is False when the SEARCH or a
+        FETCH failed, so the folder is checked again on the next cycle.
+        """
+        complete = True
         try:
-            # Search ALL emails (like user's script)
-            status, messages = mail.search(None, 'ALL')
-            if status != 'OK' or not messages[0]:
-                return []
+            # Search by UID (stable across expunges); filters run on the server
+            query = self._build_search_query(config, base=base, subject_in_body=True)
+            with self.timings.stage('search'):
+                email_ids = query.execute(mail)
+            if not email_ids:
+                return [], True
             
-            # Get email IDs and take latest ones
-            email_ids = messages[0].split()
+            # Take latest matching ones
             latest_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
             
             log_imap_activity(
@@ -161,8 +531,9 @@ class IMAPMonitorService:
                 config_name=config.name,
                 details={
                     'email_account': config.email,
-                    'total_emails': len(email_ids),
-                    'checking_latest': len(latest_ids)
+                    'matching_emails': len(email_ids),
+                    'checking_latest': len(latest_ids),
+                    'criteria': query.to_criteria()
                 }
             )
             
@@ -170,21 +541,26 @@ class IMAPMonitorService:
             for email_id in latest_ids:
                 try:
                     # Fetch full email (like user's script RFC822)
-                    status, msg_data = mail.fetch(email_id, '(RFC822)')
-                    if status == 'OK' and msg_data[0]:
-                        email_message = email.message_from_bytes(msg_data[0][1])
-                        
-                        email_info = {
-                            'id': email_id.decode(),
-                            'subject': email_message.get('Subject', ''),
-                            'sender': email_message.get('From', ''),
-                            'date': email_message.get('Date', ''),
-                            'message_id': email_message.get('Message-ID', ''),
-                            'body': self._extract_email_body(email_message)
-                        }
+                    with self.timings.stage('fetch'):
+                        status, msg_data = mail.uid('FETCH', email_id, '(RFC822)')
+                    if status != 'OK':
+                        raise imaplib.IMAP4.error(f"FETCH returned {status}")
+                    if msg_data[0]:
+                        with self.timings.stage('parse'):
+                            email_message = email.message_from_bytes(msg_data[0][1])
+                            
+                            email_info = {
+                                'id': email_id.decode(),
+                                'subject': email_message.get('Subject', ''),
+                                'sender': email_message.get('From', ''),
+                                'date': email_message.get('Date', ''),
+                                'message_id': email_message.get('Message-ID', ''),
+                                'body': self._extract_email_body(email_message)
+                            }
                         emails.append(email_info)
                         
                 except Exception as e:
+                    complete = False
                     log_imap_activity(
                         self.logger, 'WARNING', 'email_parse_error',
                         config_name=config.name,
@@ -192,7 +568,7 @@ class IMAPMonitorService:
                         error=e
                     )
             
-            return emails
+            return emails, complete
             
         except Exception as e:
             log_imap_activity(
@@ -200,7 +576,7 @@ class IMAPMonitorService:
                 config_name=config.name,
                 error=e
             )
-            return []
+            return [], False
     
     def _extract_email_body(self, email_message) -> str:
         """Extract email body text."""
@@ -217,52 +593,51 @@ class IMAPMonitorService:
     
     def _process_new_emails_for_approval(self, config: EmailConfig, emails: List[Dict]) -> Dict:
         """Process emails for approval (like user's script logic)."""
-        new_emails = []
         approved_count = 0
         rejected_count = 0
         
-        for email_info in emails:
-            email_id = email_info['id']
+        # Only emails not processed yet
+        new_emails = self._filter_new_emails(config, emails)
+        approved_emails = []
+        
+        for email_info in new_emails:
+            # Check approval based on keyword filter
+            is_approved = self._check_email_approval(config, email_info)
             
-            # Check if it's a new email (not processed yet)
-            if email_id not in self.processed_email_ids[config.id]:
-                new_emails.append(email_info)
-                self.processed_email_ids[config.id].add(email_id)
-                
-                # Check approval based on keyword filter
-                is_approved = self._check_email_approval(config, email_info)
+            subject_preview = email_info['subject'][:50] + '...' if len(email_info['subject']) > 50 else email_info['subject']
+            sender = email_info['sender']
+            
+            if is_approved:
+                approved_count += 1
+                approved_emails.append(email_info)
+                self.logger.info(f"✅ NUOVA MAIL APPROVATA | Account: {config.email} | Config: '{config.name}' | From: {sender} | Subject: '{subject_preview}' | Keyword: '{config.subject_filter or 'None'}' found")
                 
-                subject_preview = email_info['subject'][:50] + '...' if len(email_info['subject']) > 50 else email_info['subject']
-                sender = email_info['sender']
+                # Log to EmailLog as approved
+                self.activity.log(
+                    config_id=config.id,
+                    action='approved',
+                    status='success',
+                    message=f'Email approved - keyword "{config.subject_filter}" found',
+                    email_subject=email_info['subject'],
+                    email_sender=sender,
+                    email_date=datetime.now()
+                )
+            else:
+                rejected_count += 1
+                self.logger.info(f"❌ NUOVA MAIL NON APPROVATA | Account: {config.email} | Config: '{config.name}' | From: {sender} | Subject: '{subject_preview}' | Keyword: '{config.subject_filter or 'None'}' not found")
                 
-                if is_approved:
-                    approved_count += 1
-                    self.logger.info(f"✅ NUOVA MAIL APPROVATA | Account: {config.email} | Config: '{config.name}' | From: {sender} | Subject: '{subject_preview}' | Keyword: '{config.subject_filter or 'None'}' found")
-                    
-                    # Log to EmailLog as approved
-                    EmailLog.log_activity(
-                        config_id=config.id,
-                        action='approved',
-                        status='success',
-                        message=f'Email approved - keyword "{config.subject_filter}" found',
-                        email_subject=email_info['subject'],
-                        email_sender=sender,
-                        email_date=datetime.now()
-                    )
-                else:
-                    rejected_count += 1
-                    self.logger.info(f"❌ NUOVA MAIL NON APPROVATA | Account: {config.email} | Config: '{config.name}' | From: {sender} | Subject: '{subject_preview}' | Keyword: '{config.subject_filter or 'None'}' not found")
-                    
-                    # Log to EmailLog as rejected
-                    EmailLog.log_activity(
-                        config_id=config.id,
-                        action='rejected',
-                        status='warning',
-                        message=f'Email rejected - keyword "{config.subject_filter}" not found',
-                        email_subject=email_info['subject'],
-                        email_sender=sender,
-                        email_date=datetime.now()
-                    )
+                # Log to EmailLog as rejected
+                self.activity.log(
+                    config_id=config.id,
+                    action='rejected',
+                    status='warning',
+                    message=f'Email rejected - keyword "{config.subject_filter}" not found',
+                    email_subject=email_info['subject'],
+                    email_sender=sender,
+                    email_date=datetime.now()
+                )
+        
+        self._record_processed(config, new_emails, approved_emails)
         
         return {
             'new_emails': len(new_emails),
@@ -271,14 +646,55 @@ class IMAPMonitorService:
             'emails': new_emails
         }
     
+    def _record_processed(self, config: EmailConfig, new_emails: List[Dict], accepted_emails: List[Dict]):
+        """Buffer the dedup keys of a check for the next activity flush.
+
+        Emails taken by the ingestion pipeline are left out: the pipeline
+        records them with their orders, so a failed ingestion is retried.
+        """
+        submitted = self._submit_for_ingestion(config, accepted_emails)
+        keys = [key for key in map(message_key, new_emails) if key not in submitted]
+        self.activity.mark_processed(self.processed_store, config.id, keys)
+    
+    def _submit_for_ingestion(self, config: EmailConfig, emails: List[Dict]) -> set:
+        """Hand accepted emails to the fetch -> parse -> persist pipeline; returns the keys it took."""
+        if not emails or not self.pipeline.running:
+            return set()
+        mailbox = config if isinstance(config, MailboxSnapshot) else MailboxSnapshot.from_config(config)
+        keys_by_folder = {}
+        for email_info in emails:
+            folder = email_info.get('folder', mailbox.folder)
+            keys_by_folder.setdefault(folder, {})[email_info['id']] = message_key(email_info)
+        submitted = set()
+        for folder, keys in keys_by_folder.items():
+            if self.pipeline.submit(mailbox, list(keys), folder=folder, keys=keys):
+                submitted.update(keys.values())
+        return submitted
+    
+    def _filter_new_emails(self, config: EmailConfig, emails: List[Dict]) -> List[Dict]:
+        """Keep emails not processed before nor being ingested (one dedup lookup per batch)."""
+        new_keys = set(self.processed_store.filter_new(config.id, [message_key(e) for e in emails]))
+        new_emails = []
+        for email_info in emails:
+            key = message_key(email_info)
+            if key in new_keys and not self.pipeline.is_pending(config.id, key):
+                new_emails.append(email_info)
+                new_keys.discard(key)  # same message twice in one batch
+        return new_emails
+    
     def _check_email_approval(self, config: EmailConfig, email_info: Dict) -> bool:
         """Check if email should be approved based on filters."""
+        subject = email_info.get('subject', '').lower()
+        body = email_info.get('body', '').lower()
+        
+        # Body keyword must appear in the body
+        if config.body_filter and config.body_filter.lower() not in body:
+            return False
+        
         # If no subject filter, approve everything
         if not config.subject_filter:
             return True
         
-        subject = email_info.get('subject', '').lower()
-        body = email_info.get('body', '').lower()
         keyword_lower = config.subject_filter.lower()
         
         # Check if keyword is in subject or body (like user's requirement)
@@ -287,120 +703,101 @@ class IMAPMonitorService:
         
         return False
         
-    def start_monitoring(self, interval_seconds=300):
-        """Start background monitoring of all active email configurations."""
-        if self.monitoring_active:
-            self.logger.warning("🔄 IMAP monitoring already active")
-            return
-        
-        self.check_interval = interval_seconds
-        self.monitoring_active = True
-        
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
-        
-        log_imap_activity(
-            self.logger, 'INFO', 'monitoring_started',
-            details={'interval': f'{interval_seconds}s'}
-        )
-    
-    def stop_monitoring(self):
-        """Stop background monitoring."""
-        self.monitoring_active = False
-        log_imap_activity(self.logger, 'INFO', 'monitoring_stopped')
-    
-    def _monitor_loop(self):
-        """Main monitoring loop running in background thread."""
-        while self.monitoring_active:
-            try:
-                self._check_all_configs()
-            except Exception as e:
-                log_imap_activity(
-                    self.logger, 'ERROR', 'monitoring_loop_error',
-                    error=e
-                )
-            
-            # Wait for next check
-            time.sleep(self.check_interval)
-    
-    def _check_all_configs(self):
-        """Check all active email configurations for new emails."""
-        configs = EmailConfig.query.filter_by(is_active=True).all()
-        
-        if not configs:
-            self.logger.debug("📭 No active email configurations to monitor")
-            return
-        
-        log_imap_activity(
-            self.logger, 'INFO', 'batch_check_start',
-            details={'configs_count': len(configs)}
-        )
-        
-        for config in configs:
-            try:
-                self.check_config_emails(config)
-            except Exception as e:
-                log_imap_activity(
-                    self.logger, 'ERROR', 'config_check_failed',
-                    config_name=config.name,
-                    error=e
-                )
-                # Update config with error
-                config.update_last_check(success=False, error_message=str(e))
-    
     def check_config_emails(self, config: EmailConfig) -> Dict:
         """Check a specific email configuration for new emails."""
-        log_imap_activity(
-            self.logger, 'INFO', 'email_check_start',
-            config_name=config.name,
-            details={
-                'server': f"{config.imap_server}:{config.imap_port}",
-                'email_account': config.email,
-                'folder': config.folder,
-                'filters': f"Subject: {config.subject_filter or 'None'}, Sender: {config.sender_filter or 'None'}"
-            }
-        )
-        
         try:
-            # Connect to IMAP server
-            mail = self._connect_to_imap(config)
-            
-            # Select folder
-            status, messages = mail.select(config.folder)
-            if status != 'OK':
-                raise Exception(f"Cannot select folder '{config.folder}'")
-            
-            # Get message count
-            message_count = int(messages[0]) if messages and messages[0] else 0
-            
+            fetched, error = self._fetch_recent_emails(MailboxSnapshot.from_config(config)), None
+        except Exception as e:
+            fetched, error = None, e
+        try:
+            return self._apply_check_results(config, fetched, error)
+        finally:
+            self.activity.flush()
+    
+    def _fetch_recent_emails(self, mailbox) -> Dict:
+        """Network part of a check; safe to run off the app thread."""
+        with self.timings.cycle(mailbox.id, 'regular'):
             log_imap_activity(
-                self.logger, 'DEBUG', 'folder_selected',
-                config_name=config.name,
+                self.logger, 'INFO', 'email_check_start',
+                config_name=mailbox.name,
                 details={
-                    'email_account': config.email,
-                    'folder': config.folder, 
-                    'messages': message_count,
-                    'server': f"{config.imap_server}:{config.imap_port}"
+                    'server': f"{mailbox.imap_server}:{mailbox.imap_port}",
+                    'email_account': mailbox.email,
+                    'folders': ', '.join(mailbox.folders),
+                    'filters': f"Subject: {mailbox.subject_filter or 'None'}, Sender: {mailbox.sender_filter or 'None'}"
                 }
             )
             
-            # Check for new emails (last 24 hours)
-            new_emails = self._get_recent_emails(mail, config)
+            # Connect to IMAP server
+            mail = self._connect_to_imap(mailbox)
             
-            # Close connection
-            mail.close()
-            mail.logout()
+            try:
+                with self.timings.stage('select'):  # STATUS of every monitored folder
+                    folders, folder_status = self.folder_tracker.changed_folders(mail, mailbox.id, mailbox.folders)
+                
+                message_count = 0
+                new_emails = []
+                failed_folders = []
+                for folder in folders:
+                    folder_messages = self._select_folder(mail, folder)
+                    message_count += folder_messages
+                    
+                    log_imap_activity(
+                        self.logger, 'DEBUG', 'folder_selected',
+                        config_name=mailbox.name,
+                        details={
+                            'email_account': mailbox.email,
+                            'folder': folder, 
+                            'messages': folder_messages,
+                            'server': f"{mailbox.imap_server}:{mailbox.imap_port}"
+                        }
+                    )
+                    
+                    # Check for new emails (last 24 hours)
+                    emails, complete = self._get_recent_emails(mail, mailbox)
+                    for email_info in emails:
+                        email_info['folder'] = folder
+                        new_emails.append(email_info)
+                    if not complete:
+                        failed_folders.append(folder)
+                    mail.close()
+            finally:
+                # Close connection
+                mail.logout()
+            
+            return {
+                'message_count': message_count,
+                'emails': new_emails,
+                'folder_status': successful_statuses(folder_status, failed_folders),
+                'folders_checked': folders,
+                'folders_failed': failed_folders,
+                'folders_skipped': len(mailbox.folders) - len(folders)
+            }
+    
+    def _apply_check_results(self, config: EmailConfig, fetched: Optional[Dict],
+                             error: Optional[Exception]) -> Dict:
+        """Database part of a check: filter, log each email and update status."""
+        try:
+            if error is not None:
+                raise error
+            
+            message_count = fetched['message_count']
+            
+            # Skip emails already handled in an earlier cycle
+            new_emails = self._filter_new_emails(config, fetched['emails'])
             
             # Process found emails
             processed_count = 0
             ignored_count = 0
             error_count = 0
             
+            accepted_emails = []
             for email_info in new_emails:
                 try:
                     action = self._process_email(config, email_info)
                     if action == 'processed':
                         processed_count += 1
+                        accepted_emails.append(email_info)
                     elif action == 'ignored':
                         ignored_count += 1
                     else:
@@ -414,8 +811,11 @@ class IMAPMonitorService:
                         error=e
                     )
             
+            self._record_processed(config, new_emails, accepted_emails)
+            self.folder_tracker.commit(config.id, fetched['folder_status'])
+            
             # Update config status
-            config.update_last_check(success=True)
+            self.activity.update_last_check(config, success=True)
             
             # Log summary
             log_imap_activity(
@@ -424,7 +824,9 @@ class IMAPMonitorService:
                 details={
                     'email_account': config.email,
                     'server': f"{config.imap_server}:{config.imap_port}",
-                    'folder': config.folder,
+                    'folders': ', '.join(fetched['folders_checked']) or 'unchanged',
+                    'folders_skipped': fetched['folders_skipped'],
+                    'folders_failed': ', '.join(fetched['folders_failed']) or 'none',
                     'total_messages': message_count,
                     'new_emails': len(new_emails),
                     'processed': processed_count,
@@ -439,12 +841,14 @@ class IMAPMonitorService:
                 'new_emails': len(new_emails),
                 'processed': processed_count,
                 'ignored': ignored_count,
-                'errors': error_count
+                'errors': error_count,
+                'folders_skipped': fetched['folders_skipped'],
+                'folders_failed': fetched['folders_failed']
             }
             
         except Exception as e:
             # Update config with error
-            config.update_last_check(success=False, error_message=str(e))
+            self.activity.update_last_check(config, success=False, error_message=str(e))
             
             log_imap_activity(
                 self.logger, 'ERROR', 'email_check_failed',
@@ -468,16 +872,18 @@ class IMAPMonitorService:
             }
         )
         
-        # Create IMAP connection
-        if config.use_ssl:
-            mail = imaplib.IMAP4_SSL(config.imap_server, config.imap_port)
-        else:
-            mail = imaplib.IMAP4(config.imap_server, config.imap_port)
-            if config.use_starttls:
-                mail.starttls()
+        # Create IMAP connection (with a socket timeout so a hung server can't block forever)
+        with self.timings.stage('connect'):  # TCP + TLS handshake and greeting
+            if config.use_ssl:
+                mail = imaplib.IMAP4_SSL(config.imap_server, config.imap_port, timeout=self.socket_timeout)
+            else:
+                mail = imaplib.IMAP4(config.imap_server, config.imap_port, timeout=self.socket_timeout)
+                if config.use_starttls:
+                    mail.starttls()
         
         # Authenticate
-        mail.login(config.email, config.get_password())
+        with self.timings.stage('login'):
+            mail.login(config.email, config.get_password())
         
         log_imap_activity(
             self.logger, 'DEBUG', 'imap_connected',
@@ -487,18 +893,14 @@ class IMAPMonitorService:
         
         return mail
     
-    def _get_recent_emails(self, mail: imaplib.IMAP4, config: EmailConfig) -> List[Dict]:
-        """Get emails from the last 24 hours."""
-        # Search for recent emails
-        yesterday = datetime.now() - timedelta(days=1)
-        search_criteria = f'SINCE "{yesterday.strftime("%d-%b-%Y")}"'
-        
-        # Apply filters if configured
-        if config.subject_filter:
-            search_criteria += f' SUBJECT "{config.subject_filter}"'
+    def _get_recent_emails(self, mail: imaplib.IMAP4, config: EmailConfig) -> Tuple[List[Dict], bool]:
+        """Get emails from the last 24 hours.
         
-        if config.sender_filter:
-            search_criteria += f' FROM "{config.sender_filter}"'
+        Returns (emails, complete); complete is False when the SEARCH or a
+        FETCH failed, so the folder is checked again on the next cycle.
+        """
+        # Search for recent emails, with configured filters applied by the server
+        query = self._build_search_query(config, base=self._since_yesterday())
         
         log_imap_activity(
             self.logger, 'DEBUG', 'email_search',
@@ -506,16 +908,23 @@ class IMAPMonitorService:
             details={
                 'email_account': config.email,
                 'folder': config.folder,
-                'criteria': search_criteria
+                'criteria': query.to_criteria()
             }
         )
         
-        status, messages = mail.search(None, search_criteria)
-        if status != 'OK':
-            return []
-        
-        email_ids = messages[0].split()
+        try:
+            with self.timings.stage('search'):
+                email_ids = query.execute(mail)
+        except Exception as e:
+            log_imap_activity(
+                self.logger, 'ERROR', 'email_search_error',
+                config_name=config.name,
+                details={'email_account': config.email},
+                error=e
+            )
+            return [], False
         emails = []
+        complete = True
         
         # Limit to prevent overwhelming the system
         max_emails = 100
@@ -534,19 +943,24 @@ class IMAPMonitorService:
         for email_id in email_ids:
             try:
                 # Fetch email headers
-                status, msg_data = mail.fetch(email_id, '(RFC822.HEADER)')
-                if status == 'OK':
-                    email_message = email.message_from_bytes(msg_data[0][1])
-                    
-                    email_info = {
-                        'id': email_id.decode(),
-                        'subject': email_message.get('Subject', ''),
-                        'sender': email_message.get('From', ''),
-                        'date': email_message.get('Date', ''),
-                        'message_id': email_message.get('Message-ID', '')
-                    }
+                with self.timings.stage('fetch'):
+                    status, msg_data = mail.uid('FETCH', email_id, '(RFC822.HEADER)')
+                if status != 'OK':
+                    raise imaplib.IMAP4.error(f"FETCH returned {status}")
+                if msg_data[0]:
+                    with self.timings.stage('parse'):
+                        email_message = email.message_from_bytes(msg_data[0][1])
+                        
+                        email_info = {
+                            'id': email_id.decode(),
+                            'subject': email_message.get('Subject', ''),
+                            'sender': email_message.get('From', ''),
+                            'date': email_message.get('Date', ''),
+                            'message_id': email_message.get('Message-ID', '')
+                        }
                     emails.append(email_info)
             except Exception as e:
+                complete = False
                 log_imap_activity(
                     self.logger, 'WARNING', 'email_fetch_error',
                     config_name=config.name,
@@ -554,7 +968,24 @@ class IMAPMonitorService:
                     error=e
                 )
         
-        return emails
+        return emails, complete
+    
+    def _build_search_query(self, config: EmailConfig, base: str = 'ALL',
+                            subject_in_body: bool = False) -> SearchQuery:
+        """Translate the config filters into an IMAP SEARCH query."""
+        query = SearchQuery(base)
+        if config.subject_filter:
+            if subject_in_body:
+                # Continuous mode approves the keyword in subject or body
+                query.require_any(
+                    Criterion('SUBJECT', config.subject_filter),
+                    Criterion('BODY', config.subject_filter)
+                )
+            else:
+                query.require('SUBJECT', config.subject_filter)
+        query.require('FROM', config.sender_filter)
+        query.require('BODY', config.body_filter)
+        return query
     
     def _process_email(self, config: EmailConfig, email_info: Dict) -> str:
         """Process a single email and determine action."""
@@ -573,7 +1004,7 @@ class IMAPMonitorService:
         
         # Check if email should be ignored based on filters
         if not self._email_matches_filters(config, email_info):
-            EmailLog.log_activity(
+            self.activity.log(
                 config_id=config.id,
                 action='ignored',
                 status='warning',
@@ -590,8 +1021,8 @@ class IMAPMonitorService:
             # For now, we'll assume it passes
             pass
         
-        # Log as processed (in a real implementation, this would trigger manifest parsing)
-        EmailLog.log_activity(
+        # Log as processed (manifest parsing runs in the ingestion pipeline)
+        self.activity.log(
             config_id=config.id,
             action='processed',
             status='success',
@@ -669,5 +1100,19 @@ class IMAPMonitorService:
             )
             raise
 
-# Global service instance
-imap_service = IMAPMonitorService()
+_imap_service = None
+_imap_service_lock = threading.Lock()
+
+
+def get_imap_service() -> IMAPMonitorService:
+    """The process-wide service, created on first use rather than at import."""
+    global _imap_service
+    if _imap_service is None:
+        with _imap_service_lock:
+            if _imap_service is None:
+                _imap_service = IMAPMonitorService()
+    return _imap_service
+
+
+# Global service instance (lazy)
+imap_service = LocalProxy(get_imap_service)
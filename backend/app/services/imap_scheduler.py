@@ -0,0 +1,171 @@
+"""
+Adaptive polling scheduler for IMAP mailboxes.
+Keeps a next-due time per mailbox in a priority queue and adapts each
+interval to mailbox activity, server errors and the supplier send window.
+"""
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class ScheduleEntry:
+    """Polling state of one mailbox (per monitor mode)."""
+    key: Hashable
+    base_interval: float
+    interval: float
+    next_due: float = 0.0
+    failures: int = 0
+    circuit_open: bool = False
+    in_flight: bool = False
+    last_activity: Optional[float] = None
+
+
+def parse_busy_hours(value: Optional[str]) -> List[Tuple[int, int]]:
+    """Parse '6-11,14-16' into [(6, 11), (14, 16)] (end hour exclusive)."""
+    windows = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        windows.append((int(start), int(end or int(start) + 1)))
+    return windows
+
+
+class AdaptiveScheduler:
+    """Priority-queue scheduler with adaptive intervals, backoff and jitter.
+
+    - new mail shortens the interval (down to base * min_factor)
+    - idle checks lengthen it (up to base * max_factor)
+    - inside the busy window the interval never exceeds the minimum
+    - errors back off exponentially; after ``failure_threshold`` consecutive
+      errors the circuit is reported open until a check succeeds again
+    """
+
+    MIN_INTERVAL = 1.0  # seconds, absolute floor
+
+    def __init__(self, min_factor: float = 0.25, max_factor: float = 4.0,
+                 speedup: float = 0.5, slowdown: float = 1.5,
+                 max_backoff: float = 1800.0, failure_threshold: int = 3,
+                 jitter: float = 0.1, busy_hours: List[Tuple[int, int]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.jitter = jitter
+        self.busy_hours = busy_hours or []
+        self.clock = clock
+        self._entries: Dict[Hashable, ScheduleEntry] = {}
+        self._heap = []
+        self._counter = itertools.count()
+
+    def sync(self, base_intervals: Dict[Hashable, float]):
+        """Add new mailboxes (due now), update changed bases, drop removed ones."""
+        now = self.clock()
+        for key, base in base_intervals.items():
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = ScheduleEntry(key=key, base_interval=base, interval=base)
+                self._entries[key] = entry
+                # Spread first checks a little so mailboxes don't fire in lockstep
+                self._push(entry, now + random.uniform(0, self.jitter) * min(base, 5))
+            elif entry.base_interval != base:
+                entry.base_interval = base
+                entry.interval = self._clamp(entry, base)
+        for key in list(self._entries):
+            if key not in base_intervals:
+                del self._entries[key]
+
+    def pop_due(self) -> List[Hashable]:
+        """Return keys whose check is due; they stay out of the queue until recorded."""
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, _, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.in_flight or entry.next_due != next_due:
+                continue  # removed or superseded
+            entry.in_flight = True
+            due.append(key)
+        return due
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        """True while a popped key has not been recorded yet."""
+        entry = self._entries.get(key)
+        return entry is not None and entry.in_flight
+
+    def seconds_until_next(self, default: float = 5.0) -> float:
+        """Time to sleep before the next check is due."""
+        while self._heap:
+            next_due, _, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and not entry.in_flight and entry.next_due == next_due:
+                return max(0.0, next_due - self.clock())
+            heapq.heappop(self._heap)
+        return default
+
+    def record_success(self, key: Hashable, new_emails: int = 0):
+        """Reschedule after a successful check, adapting to activity."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.failures = 0
+        entry.circuit_open = False
+        if new_emails:
+            entry.last_activity = self.clock()
+            entry.interval = self._clamp(entry, entry.interval * self.speedup)
+        else:
+            entry.interval = self._clamp(entry, entry.interval * self.slowdown)
+        delay = entry.interval
+        if self._in_busy_window():
+            delay = min(delay, self._min_interval(entry))
+        self._push(entry, self.clock() + self._jittered(delay))
+
+    def record_failure(self, key: Hashable):
+        """Back off exponentially after a failed check."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.failures += 1
+        entry.circuit_open = entry.failures >= self.failure_threshold
+        backoff = min(self.max_backoff, entry.base_interval * (2 ** entry.failures))
+        self._push(entry, self.clock() + self._jittered(backoff))
+
+    def snapshot(self) -> List[Dict]:
+        """Scheduler state for status endpoints."""
+        now = self.clock()
+        return [{
+            'key': entry.key,
+            'base_interval': entry.base_interval,
+            'interval': round(entry.interval, 2),
+            'next_check_in': round(max(0.0, entry.next_due - now), 2),
+            'failures': entry.failures,
+            'circuit_open': entry.circuit_open
+        } for entry in self._entries.values()]
+
+    def _push(self, entry: ScheduleEntry, when: float):
+        entry.in_flight = False
+        entry.next_due = when
+        heapq.heappush(self._heap, (when, next(self._counter), entry.key))
+
+    def _min_interval(self, entry: ScheduleEntry) -> float:
+        return max(self.MIN_INTERVAL, entry.base_interval * self.min_factor)
+
+    def _clamp(self, entry: ScheduleEntry, interval: float) -> float:
+        return min(max(interval, self._min_interval(entry)),
+                   entry.base_interval * self.max_factor)
+
+    def _jittered(self, delay: float) -> float:
+        return max(self.MIN_INTERVAL, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _in_busy_window(self) -> bool:
+        hour = datetime.now().hour
+        return any(start <= hour < end for start, end in self.busy_hours)
@@ -0,0 +1,109 @@
+"""
+IMAP SEARCH query builder.
+Pushes mailbox filters to the server so only matching UIDs are fetched,
+with proper quoting and UTF-8 literals for non-ASCII keywords.
+"""
+import imaplib
+from dataclasses import dataclass
+from typing import List, Set
+
+
+def imap_quote(value: str) -> str:
+    """Quote an ASCII string for an IMAP command (RFC 3501 quoted string)."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def is_ascii(value: str) -> bool:
+    try:
+        value.encode('ascii')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+@dataclass
+class Criterion:
+    """Single search key with a string argument, e.g. SUBJECT "manifest"."""
+    key: str
+    value: str
+
+    def render(self) -> str:
+        return f'{self.key} {imap_quote(self.value)}'
+
+
+class SearchQuery:
+    """AND of terms, each term an OR of criteria, on top of a base criterion.
+
+    ASCII-only queries run as a single UID SEARCH. imaplib can send only one
+    literal per command, so a query with non-ASCII keywords runs one search
+    per criterion (the keyword sent as a UTF-8 literal) and combines the
+    UID sets client-side: union within a term, intersection across terms.
+    """
+
+    def __init__(self, base: str = 'ALL'):
+        self.base = base
+        self.terms: List[List[Criterion]] = []
+
+    def require(self, key: str, value: str) -> 'SearchQuery':
+        """Add a criterion that must match."""
+        if value:
+            self.terms.append([Criterion(key, value)])
+        return self
+
+    def require_any(self, *criteria: Criterion) -> 'SearchQuery':
+        """Add a group where at least one criterion must match."""
+        criteria = [c for c in criteria if c.value]
+        if criteria:
+            self.terms.append(criteria)
+        return self
+
+    @property
+    def is_ascii(self) -> bool:
+        return all(is_ascii(c.value) for term in self.terms for c in term)
+
+    def to_criteria(self) -> str:
+        """Single-command criteria string (ASCII queries only)."""
+        parts = [self.base]
+        for term in self.terms:
+            parts.append(self._render_or(term))
+        return ' '.join(parts)
+
+    def execute(self, mail: imaplib.IMAP4) -> List[bytes]:
+        """Run the search and return matching UIDs in ascending order."""
+        if self.is_ascii:
+            return self._uid_search(mail, self.to_criteria())
+
+        result = None
+        for term in self.terms:
+            matched: Set[bytes] = set()
+            for criterion in term:
+                matched.update(self._search_criterion(mail, criterion))
+            result = matched if result is None else result & matched
+            if not result:
+                return []
+        if result is None:
+            return self._uid_search(mail, self.base)
+        return sorted(result, key=int)
+
+    def _render_or(self, criteria: List[Criterion]) -> str:
+        # IMAP OR is binary: OR a OR b c
+        if len(criteria) == 1:
+            return criteria[0].render()
+        return f'OR {criteria[0].render()} {self._render_or(criteria[1:])}'
+
+    def _search_criterion(self, mail, criterion: Criterion) -> List[bytes]:
+        if is_ascii(criterion.value):
+            return self._uid_search(mail, f'{self.base} {criterion.render()}')
+        mail.literal = criterion.value.encode('utf-8')
+        status, data = mail.uid('SEARCH', 'CHARSET', 'UTF-8', self.base, criterion.key)
+        return self._parse(status, data)
+
+    def _uid_search(self, mail, criteria: str) -> List[bytes]:
+        status, data = mail.uid('SEARCH', None, criteria)
+        return self._parse(status, data)
+
+    @staticmethod
+    def _parse(status, data) -> List[bytes]:
+        if status != 'OK' or not data or not data[0]:
+            return []
+        return data[0].split()
@@ -0,0 +1,65 @@
+"""
+Mailbox sharding for IMAP worker processes.
+`flask imap-worker --shard i/N` runs one shard; each EmailConfig is assigned
+to exactly one shard by consistent hashing, so every worker can compute the
+assignment on its own and adding/disabling configs only moves those configs.
+"""
+import bisect
+import hashlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Set, Tuple
+
+
+def _hash(value: str) -> int:
+    return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:16], 16)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse 'i/N' into (index, count), with 0 <= index < count."""
+    index, sep, count = (value or '').partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N (e.g. 0/4)")
+    if not sep or count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', expected 0 <= i < N")
+    return index, count
+
+
+@dataclass
+class ShardAssignment:
+    """Consistent-hash ring over N shards; answers which configs shard i owns."""
+    index: int
+    count: int
+    replicas: int = 100  # virtual nodes per shard, evens out the distribution
+    _ring: List[Tuple[int, int]] = field(default_factory=list, init=False, repr=False)
+    _points: List[int] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        self._ring = sorted(
+            (_hash(f'shard-{shard}#{replica}'), shard)
+            for shard in range(self.count)
+            for replica in range(self.replicas)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @classmethod
+    def parse(cls, value: str) -> 'ShardAssignment':
+        index, count = parse_shard(value)
+        return cls(index, count)
+
+    @property
+    def label(self) -> str:
+        return f'{self.index}/{self.count}'
+
+    def shard_for(self, config_id: int) -> int:
+        """Shard that owns a config: first ring point clockwise of its hash."""
+        position = bisect.bisect(self._points, _hash(f'config-{config_id}')) % len(self._ring)
+        return self._ring[position][1]
+
+    def owns(self, config_id: int) -> bool:
+        return self.count == 1 or self.shard_for(config_id) == self.index
+
+    def filter(self, config_ids: Iterable[int]) -> Set[int]:
+        """Subset of config ids owned by this shard."""
+        return {config_id for config_id in config_ids if self.owns(config_id)}
@@ -0,0 +1,494 @@
+"""
+Manifest ingestion pipeline for approved supplier emails.
+Three stages connected by bounded queues:
+
+    IMAP fetchers -> ManifestParser workers -> single batching DB writer
+
+Full queues block the stage upstream, so a parsing backlog slows the
+fetchers instead of buffering whole mailboxes in memory. Queue depths and
+per-stage latency are exposed through status().
+
+A message's processed_emails key is written in the same transaction as its
+orders. Until then the message is reported as pending, so pollers don't
+submit it twice; if any stage fails, it is released and picked up again
+on the next poll.
+"""
+import email
+import imaplib
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models.audit_log import AuditLog
+from app.models.manifest_email import ManifestEmail
+from app.models.order import Order
+from app.services.dedup_store import ProcessedEmailStore
+from app.services.imap_async import MailboxSnapshot
+from app.services.imap_folders import quote_mailbox
+from app.services.manifest_parser import ManifestParser, ParsedService
+from app.utils.logging_config import setup_imap_logger, log_imap_activity
+
+# ParsedService attributes copied onto Order as-is
+ORDER_FIELDS = (
+    'action', 'service_date', 'service_type', 'description',
+    'vehicle_model', 'vehicle_capacity',
+    'passenger_count_adults', 'passenger_count_children', 'passenger_names',
+    'contact_phone', 'contact_email',
+    'pickup_location', 'dropoff_location', 'pickup_address', 'dropoff_address',
+    'pickup_time_confirmed', 'flight_number', 'flight_departure_time', 'flight_arrival_time',
+    'train_details', 'operator_comments', 'supplier_comments'
+)
+
+_STOP = object()
+
+
+@dataclass
+class FetchJob:
+    """Approved messages of one mailbox, to be downloaded in one connection."""
+    mailbox: MailboxSnapshot
+    uids: List[str]
+    folder: str = 'INBOX'
+    keys: Dict[str, str] = field(default_factory=dict)  # uid -> processed_emails key
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class FetchedMessage:
+    config_id: int
+    uid: str
+    raw: bytes
+    folder: str = 'INBOX'
+    key: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ParsedMessage:
+    config_id: int
+    message_id: str
+    subject: str
+    sender: str
+    date: datetime
+    body_text: str
+    attachment_filenames: List[str]
+    services: List[ParsedService]
+    errors: List[str]
+    key: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class StageMetrics:
+    """Counters and latencies of one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, started: float, enqueued_at: float, items: int = 1, error: bool = False):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.processed += items
+            self.errors += int(error)
+            self.busy_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            self.wait_seconds += (started - enqueued_at) * items
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            processed = self.processed or 1
+            return {
+                'processed': self.processed,
+                'errors': self.errors,
+                'avg_seconds': round(self.busy_seconds / processed, 4),
+                'max_seconds': round(self.max_seconds, 4),
+                'avg_queue_wait_seconds': round(self.wait_seconds / processed, 4)
+            }
+
+
+def parse_pickup_time(value: Optional[str]) -> Optional[dt_time]:
+    """Convert parser times such as '10:30 am' or '14:05' to a time."""
+    if not value:
+        return None
+    value = value.strip().upper().replace('.', '')
+    for fmt in ('%I:%M %p', '%I:%M%p', '%H:%M'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+class IngestPipeline:
+    """Fetch -> parse -> persist for approved manifest emails."""
+
+    def __init__(self, fetch_workers: int = 2, parse_workers: int = 2,
+                 queue_size: int = 100, batch_size: int = 50,
+                 connect: Callable[[MailboxSnapshot], imaplib.IMAP4] = None,
+                 processed_store: ProcessedEmailStore = None):
+        self.logger = setup_imap_logger('ingest_pipeline')
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.connect = connect
+        self.processed_store = processed_store
+        self._pending = set()  # (config_id, key) submitted and not yet committed or failed
+        self._pending_lock = threading.Lock()
+        self.fetch_queue = queue.Queue(maxsize=queue_size)
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.metrics = {name: StageMetrics(name) for name in ('fetch', 'parse', 'write')}
+        self.stages = []  # (input queue, worker threads) per stage
+        self.running = False
+        self.app = None
+
+    def start(self, app=None):
+        """Start the stage threads (no-op if already running)."""
+        if self.running:
+            return
+        self.app = app
+        self.running = True
+        self.stages = [
+            (self.fetch_queue, [self._spawn(self._fetch_loop, f'ingest-fetch-{i}')
+                                for i in range(self.fetch_workers)]),
+            (self.parse_queue, [self._spawn(self._parse_loop, f'ingest-parse-{i}')
+                                for i in range(self.parse_workers)]),
+            (self.write_queue, [self._spawn(self._write_loop, 'ingest-write')])
+        ]
+        log_imap_activity(
+            self.logger, 'INFO', 'ingest_pipeline_started',
+            details={'fetchers': self.fetch_workers, 'parsers': self.parse_workers,
+                     'batch_size': self.batch_size}
+        )
+
+    def stop(self, timeout: float = 10):
+        """Drain what is queued, then stop all stages in order."""
+        if not self.running:
+            return
+        self.running = False
+        # Stop markers queue up behind pending work, so each stage drains first
+        for stage_queue, threads in self.stages:
+            for _ in threads:
+                stage_queue.put(_STOP)
+            for thread in threads:
+                thread.join(timeout)
+        self.stages = []
+        log_imap_activity(self.logger, 'INFO', 'ingest_pipeline_stopped')
+
+    def submit(self, mailbox: MailboxSnapshot, uids: List[str], folder: str = None,
+               timeout: float = None, keys: Dict[str, str] = None) -> bool:
+        """Queue approved messages for ingestion; blocks while the pipeline is full.
+
+        `keys` maps uids to their processed_emails keys: they are recorded with
+        the orders, and reported by is_pending() until then.
+        """
+        if not self.running or not uids:
+            return False
+        keys = keys or {}
+        with self._pending_lock:
+            self._pending.update((mailbox.id, key) for key in keys.values())
+        try:
+            job = FetchJob(mailbox, list(uids), folder or mailbox.folder or 'INBOX', dict(keys))
+            self.fetch_queue.put(job, timeout=timeout)
+            return True
+        except queue.Full:
+            self._release(mailbox.id, keys.values())
+            return False
+
+    def is_pending(self, config_id: int, key: str) -> bool:
+        """True while a submitted message is neither committed nor failed."""
+        with self._pending_lock:
+            return (config_id, key) in self._pending
+
+    def _release(self, config_id: int, keys: Iterable[Optional[str]]):
+        with self._pending_lock:
+            for key in keys:
+                self._pending.discard((config_id, key))
+
+    def status(self) -> Dict:
+        """Queue depths and per-stage metrics for the status endpoints."""
+        return {
+            'running': self.running,
+            'queues': {
+                'fetch': self.fetch_queue.qsize(),
+                'parse': self.parse_queue.qsize(),
+                'write': self.write_queue.qsize(),
+                'capacity': self.fetch_queue.maxsize
+            },
+            'stages': {name: metrics.to_dict() for name, metrics in self.metrics.items()}
+        }
+
+    def _spawn(self, target, name) -> threading.Thread:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    # Stage 1: IMAP fetchers
+
+    def _fetch_loop(self):
+        while True:
+            job = self.fetch_queue.get()
+            if job is _STOP:
+                return
+            started = time.monotonic()
+            failed = False
+            fetched = set()
+            try:
+                for uid, raw in self._fetch_messages(job):
+                    fetched.add(uid)
+                    # Blocks when the parsers lag behind (backpressure)
+                    self.parse_queue.put(FetchedMessage(job.mailbox.id, uid, raw, job.folder, job.keys.get(uid)))
+            except Exception as e:
+                failed = True
+                log_imap_activity(
+                    self.logger, 'ERROR', 'ingest_fetch_error',
+                    config_name=job.mailbox.name, error=e
+                )
+            # Messages not downloaded are polled and submitted again
+            self._release(job.mailbox.id, (key for uid, key in job.keys.items() if uid not in fetched))
+            self.metrics['fetch'].record(started, job.enqueued_at, len(job.uids), failed)
+
+    def _fetch_messages(self, job: FetchJob):
+        mail = self.connect(job.mailbox)
+        try:
+            mail.select(quote_mailbox(job.folder), readonly=True)
+            for uid in job.uids:
+                status, msg_data = mail.uid('FETCH', uid, '(RFC822)')
+                if status == 'OK' and msg_data and msg_data[0]:
+                    yield uid, msg_data[0][1]
+        finally:
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+    # Stage 2: ManifestParser workers
+
+    def _parse_loop(self):
+        while True:
+            fetched = self.parse_queue.get()
+            if fetched is _STOP:
+                return
+            started = time.monotonic()
+            try:
+                self.write_queue.put(self._parse_message(fetched))
+                self.metrics['parse'].record(started, fetched.enqueued_at)
+            except Exception as e:
+                self._release(fetched.config_id, [fetched.key])
+                self.metrics['parse'].record(started, fetched.enqueued_at, error=True)
+                log_imap_activity(
+                    self.logger, 'ERROR', 'ingest_parse_error',
+                    details={'config_id': fetched.config_id, 'uid': fetched.uid}, error=e
+                )
+
+    def _parse_message(self, fetched: FetchedMessage) -> ParsedMessage:
+        message = email.message_from_bytes(fetched.raw)
+        services, errors, body_text, filenames = [], [], '', []
+
+        for part in message.walk():
+            filename = part.get_filename()
+            if filename and filename.lower().endswith('.docx'):
+                filenames.append(filename)
+                parser = ManifestParser()
+                services.extend(parser.parse_manifest_bytes(part.get_payload(decode=True) or b'', filename))
+                errors.extend(parser.get_errors())
+            elif part.get_content_type() == 'text/plain' and not body_text and not filename:
+                body_text = (part.get_payload(decode=True) or b'').decode('utf-8', errors='ignore')
+
+        if not filenames and body_text:
+            # Manifest pasted in the body instead of attached
+            parser = ManifestParser()
+            services = parser.parse_manifest_content(body_text)
+            errors.extend(parser.get_errors())
+
+        try:
+            sent_at = parsedate_to_datetime(message.get('Date'))
+            if sent_at.tzinfo is not None:
+                sent_at = sent_at.astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            sent_at = datetime.utcnow()
+
+        return ParsedMessage(
+            config_id=fetched.config_id,
+            message_id=(message.get('Message-ID') or f'<uid-{fetched.config_id}-{fetched.folder}-{fetched.uid}>').strip()[:200],
+            subject=(message.get('Subject') or '')[:500],
+            sender=(message.get('From') or '')[:120],
+            date=sent_at,
+            body_text=body_text,
+            attachment_filenames=filenames,
+            services=services,
+            errors=errors,
+            key=fetched.key
+        )
+
+    # Stage 3: single batching DB writer
+
+    def _write_loop(self):
+        with self.app.app_context() if self.app else nullcontext():
+            stopping = False
+            while not stopping:
+                batch = [self.write_queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in batch:
+                    stopping = True
+                    batch = [item for item in batch if item is not _STOP]
+                if batch:
+                    self._write_batch(batch)
+
+    def _write_batch(self, batch: List[ParsedMessage]):
+        started = time.monotonic()
+        enqueued_at = min(item.enqueued_at for item in batch)
+        try:
+            try:
+                self._persist(batch)
+                self.metrics['write'].record(started, enqueued_at, len(batch))
+            except Exception as e:
+                db.session.rollback()
+                log_imap_activity(
+                    self.logger, 'ERROR', 'ingest_write_error',
+                    details={'batch_size': len(batch)}, error=e
+                )
+                # Retry one by one so a single bad message doesn't drop the batch
+                failures = 0
+                for item in batch:
+                    try:
+                        self._persist([item])
+                    except Exception:
+                        db.session.rollback()
+                        failures += 1
+                self.metrics['write'].record(started, enqueued_at, len(batch), error=failures > 0)
+        finally:
+            # Committed keys are in processed_emails by now; failed ones get polled again
+            for item in batch:
+                self._release(item.config_id, [item.key])
+
+    def _persist(self, batch: List[ParsedMessage]):
+        """Insert manifests, upsert their orders and record the messages as processed, in one transaction."""
+        message_ids = [item.message_id for item in batch]
+        existing_messages = {
+            row[0] for row in db.session.query(ManifestEmail.email_message_id)
+            .filter(ManifestEmail.email_message_id.in_(message_ids))
+        }
+        service_ids = {service.service_id for item in batch for service in item.services}
+        orders = {
+            order.service_id: order
+            for order in Order.query.options(selectinload(Order.passengers))
+            .filter(Order.service_id.in_(service_ids))
+        } if service_ids else {}
+
+        processed_keys = {}
+        for item in batch:
+            if item.key:
+                processed_keys.setdefault(item.config_id, []).append(item.key)
+            if item.message_id in existing_messages:
+                continue
+            existing_messages.add(item.message_id)
+
+            manifest = ManifestEmail(
+                email_subject=item.subject,
+                email_sender=item.sender,
+                email_date=item.date,
+                email_message_id=item.message_id,
+                email_body_text=item.body_text,
+                has_attachments=bool(item.attachment_filenames),
+                attachment_filenames=item.attachment_filenames,
+                processing_status='completed' if item.services else 'skipped',
+                processing_completed_at=datetime.utcnow(),
+                processing_error='; '.join(item.errors) or None,
+                services_found=len(item.services),
+                services_processed=len(item.services),
+                parsed_services_data=[service.service_id for service in item.services]
+            )
+            db.session.add(manifest)
+
+            for service in item.services:
+                values = {name: getattr(service, name) for name in ORDER_FIELDS}
+                values['pickup_time'] = parse_pickup_time(service.pickup_time)
+                values['raw_manifest_data'] = service.raw_data
+
+                order = orders.get(service.service_id)
+                if order is None:
+                    order = Order(service_id=service.service_id, passenger_types=service.passenger_types, **values)
+                    orders[service.service_id] = order
+                    db.session.add(order)
+                    if service.action == 'Cancel':
+                        order.status = 'cancelled'
+                elif order.id is None:
+                    # Created earlier in this batch: nothing reviewed yet
+                    self._update_order(order, service, values)
+                else:
+                    self._update_existing_order(order, service, values, item)
+                order.source_manifest = manifest
+
+        if self.processed_store is not None:
+            for config_id, keys in processed_keys.items():
+                self.processed_store.mark_processed(config_id, keys, commit=False)
+        db.session.commit()
+
+    @staticmethod
+    def _update_order(order: Order, service: ParsedService, values: Dict):
+        for name, value in values.items():
+            setattr(order, name, value)
+        order.set_passengers(service.passenger_names, service.passenger_types)
+        order.check_missing_data()
+        if service.action == 'Cancel':
+            order.status = 'cancelled'
+
+    def _update_existing_order(self, order: Order, service: ParsedService, values: Dict, item: ParsedMessage):
+        """Apply a Change/Cancel from a manifest to a stored order, with an audit entry.
+
+        Orders an operator already handled may be overwritten here, so the old
+        values are kept in the audit log; an identical resend changes nothing.
+        """
+        old_values = {
+            name: _audit_value(getattr(order, name)) for name, value in values.items()
+            if name != 'raw_manifest_data' and getattr(order, name) != value
+        }
+        old_status = order.status
+        if service.action == 'Cancel':
+            new_status = 'cancelled'
+        elif old_values and old_status != 'cancelled':
+            new_status = 'modified'
+        else:
+            new_status = old_status
+        if not old_values and new_status == old_status:
+            return
+
+        new_values = {name: _audit_value(values[name]) for name in old_values}
+        if new_status != old_status:
+            old_values['status'], new_values['status'] = old_status, new_status
+        self._update_order(order, service, values)
+        order.status = new_status
+        db.session.add(AuditLog(
+            action='order_cancelled' if new_status == 'cancelled' and old_status != 'cancelled' else 'order_modified',
+            resource_type='order',
+            resource_id=str(order.id),
+            order_id=order.id,
+            order_service_id=order.service_id,
+            old_values=old_values,
+            new_values=new_values,
+            description=f"Updated from supplier manifest '{item.subject[:200]}'",
+            details={'email_message_id': item.message_id, 'email_sender': item.sender,
+                     'manifest_action': service.action, 'previous_status': old_status}
+        ))
+
+
+def _audit_value(value):
+    """JSON-safe copy of an order field for audit old/new values."""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return value
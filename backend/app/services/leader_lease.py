@@ -0,0 +1,142 @@
+"""
+DB-backed leader lease.
+Under gunicorn every worker has its own IMAPMonitorService; the lease makes
+sure only one process in the deployment actually polls the mailboxes. The
+leader renews the lease on every heartbeat, and any other process takes
+over once the lease has expired.
+
+The row also carries the monitor modes an admin stopped: a stop request
+reaches whichever worker served it, so it is written here for the leader
+(and every standby) to apply. `flask imap-worker` shards have their own
+lease rows and are stopped by stopping the process.
+"""
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.email_config import MonitorLease
+
+
+class LeaderLease:
+    """Acquire/renew/release a named lease row with atomic conditional UPDATEs."""
+
+    def __init__(self, name: str = 'imap_monitor', ttl: int = 90):
+        self.name = name
+        self.ttl = ttl
+        self.is_leader = False
+        self._holder_id = None
+        self._pid = None
+        self._renewed_at = 0.0
+
+    @property
+    def holder_id(self) -> str:
+        """Identity of this process (regenerated after a fork, e.g. gunicorn --preload)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._holder_id = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+            self.is_leader = False
+        return self._holder_id
+
+    def is_valid(self) -> bool:
+        """True while we lead and the last renewal is younger than the TTL.
+
+        Checked before writing results, so a process whose heartbeat stalled
+        stops acting as leader before another one can take over.
+        """
+        return self.is_leader and time.monotonic() - self._renewed_at < self.ttl
+
+    def acquire(self) -> bool:
+        """Take or renew the lease. Returns True if this process is the leader."""
+        now = datetime.utcnow()
+        table = MonitorLease.__table__
+        try:
+            result = db.session.execute(
+                table.update()
+                .where(table.c.name == self.name)
+                .where(or_(table.c.holder == self.holder_id, table.c.expires_at < now))
+                .values(
+                    holder=self.holder_id,
+                    heartbeat_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl),
+                    acquired_at=case(
+                        (table.c.holder == self.holder_id, table.c.acquired_at),
+                        else_=now
+                    )
+                )
+            )
+            if result.rowcount:
+                db.session.commit()
+                self.is_leader = True
+                self._renewed_at = time.monotonic()
+                return True
+
+            if db.session.get(MonitorLease, self.name) is None:
+                # First process ever: create the row (a concurrent insert loses on the PK)
+                db.session.add(MonitorLease(
+                    name=self.name,
+                    holder=self.holder_id,
+                    acquired_at=now,
+                    heartbeat_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl)
+                ))
+                db.session.commit()
+                self.is_leader = True
+                self._renewed_at = time.monotonic()
+                return True
+
+            db.session.rollback()
+        except IntegrityError:
+            db.session.rollback()
+
+        self.is_leader = False
+        return False
+
+    def release(self):
+        """Give up the lease so another process can take over immediately."""
+        if not self.is_leader:
+            return
+        table = MonitorLease.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.name == self.name)
+            .where(table.c.holder == self.holder_id)
+            .values(expires_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self.is_leader = False
+
+    def stopped_modes(self) -> Set[str]:
+        """Monitor modes stopped deployment-wide."""
+        lease = self.current()
+        return set(filter(None, (lease.stopped_modes or '').split(','))) if lease else set()
+
+    def set_mode_stopped(self, mode: str, stopped: bool):
+        """Record (or clear) a deployment-wide stop of `mode`.
+
+        Without a lease row no process has ever polled, so there is nothing to stop.
+        """
+        lease = self.current()
+        if lease is None:
+            return
+        modes = self.stopped_modes()
+        modes = modes | {mode} if stopped else modes - {mode}
+        lease.stopped_modes = ','.join(sorted(modes)) or None
+        db.session.commit()
+
+    def current(self) -> Optional[MonitorLease]:
+        """Lease row as stored in the database."""
+        return db.session.get(MonitorLease, self.name)
+
+    def status(self) -> Dict:
+        """Lease info for the status endpoints."""
+        lease = self.current()
+        return {
+            'this_process': self.holder_id,
+            'is_leader': bool(lease and lease.holder == self.holder_id and lease.expires_at > datetime.utcnow()),
+            'lease': lease.to_dict() if lease else None
+        }
@@ -1,6 +1,6 @@
 import re
 import os
-import docx
+import io
 from datetime import datetime, date
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
@@ -18,6 +18,7 @@ class ParsedService:
     passenger_count_adults: int = 0
     passenger_count_children: int = 0
     passenger_names: List[str] = None
+    passenger_types: List[str] = None  # 'adult'/'child', parallel to passenger_names
     contact_phone: Optional[str] = None
     contact_email: Optional[str] = None
     pickup_location: Optional[str] = None
@@ -38,6 +39,8 @@ class ParsedService:
     def __post_init__(self):
         if self.passenger_names is None:
             self.passenger_names = []
+        if self.passenger_types is None:
+            self.passenger_types = []
         if self.missing_data_flags is None:
             self.missing_data_flags = []
         if self.raw_data is None:
@@ -109,13 +112,9 @@ class ManifestParser:
     def read_docx_file(self, file_path: str) -> str:
         """Read text content from a Word document."""
         try:
+            import docx  # deferred: python-docx is slow to import
             doc = docx.Document(file_path)
-            full_text = []
-            
-            for paragraph in doc.paragraphs:
-                full_text.append(paragraph.text)
-            
-            return '\n'.join(full_text)
+            return self.document_text(doc)
         
         except Exception as e:
             self.errors.append(f"Error reading document {file_path}: {str(e)}")
@@ -129,6 +128,37 @@ class ManifestParser:
         
         return self.parse_manifest_content(content)
     
+    def parse_manifest_bytes(self, data: bytes, filename: str = 'attachment') -> List[ParsedService]:
+        """Parse a manifest Word document held in memory (e.g. an email attachment)."""
+        try:
+            import docx
+            doc = docx.Document(io.BytesIO(data))
+        except Exception as e:
+            self.errors.append(f"Error reading document {filename}: {str(e)}")
+            return []
+        
+        return self.parse_manifest_content(self.document_text(doc))
+    
+    @staticmethod
+    def document_text(doc) -> str:
+        """Text of a Word document in reading order, tables included.
+        
+        Each table row becomes one line with its cells separated by spaces, so
+        'Pickup Time: | 10:30' rows read like the paragraph form.
+        """
+        lines = []
+        for block in doc.iter_inner_content():
+            if hasattr(block, 'rows'):
+                for row in block.rows:
+                    cells = []
+                    for cell in row.cells:
+                        if not cells or cell._tc is not cells[-1]._tc:  # merged cells repeat
+                            cells.append(cell)
+                    lines.append(' '.join(cell.text.strip() for cell in cells if cell.text.strip()))
+            else:
+                lines.append(block.text)
+        return '\n'.join(lines)
+    
     def parse_manifest_content(self, content: str) -> List[ParsedService]:
         """Parse manifest content and extract services."""
         services = []
@@ -315,6 +345,7 @@ class ManifestParser:
         adults = 0
         children = 0
         names = []
+        types = []
         
         for passenger_type, name in passengers:
             if passenger_type.lower() == 'adult':
@@ -326,10 +357,12 @@ class ManifestParser:
             name = name.strip().replace(':', '').strip()
             if name:
                 names.append(name)
+                types.append(passenger_type.lower())
         
         service.passenger_count_adults = adults
         service.passenger_count_children = children
         service.passenger_names = names
+        service.passenger_types = types
     
     def extract_contact_info(self, block: str, service: ParsedService):
         """Extract contact information."""
@@ -0,0 +1,135 @@
+"""
+Hot-path timings of the IMAP monitor.
+Each mailbox check records how long it spent in connect (TCP + TLS), login,
+select (incl. STATUS), search, fetch and parse; the DB commit is timed per
+batch flush. Samples live in fixed-size ring buffers and are summarised as
+percentiles for the status endpoints, so slow detection can be traced to the
+mail server, TLS setup or our own writes.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+STAGES = ('connect', 'login', 'select', 'search', 'fetch', 'parse', 'commit')
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an unsorted list (None if empty)."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class CycleTimer:
+    """Stage durations of one mailbox check (summed over folders/messages)."""
+
+    def __init__(self, config_id: int, mode: str):
+        self.config_id = config_id
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class StageTimings:
+    """Ring buffers of per-stage durations and of recent mailbox checks."""
+
+    def __init__(self, capacity: int = 1000):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.configure(capacity)
+
+    def configure(self, capacity: int):
+        with self._lock:
+            self.capacity = capacity
+            self._stages = {stage: deque(maxlen=capacity) for stage in STAGES}
+            self._cycles = deque(maxlen=capacity)
+
+    @contextmanager
+    def cycle(self, config_id: int, mode: str):
+        """Time one mailbox check; stage() calls on this thread are attributed to it."""
+        timer = CycleTimer(config_id, mode)
+        self._local.timer = timer
+        ok = False
+        try:
+            yield timer
+            ok = True
+        finally:
+            self._local.timer = None
+            self._record_cycle(timer, ok)
+
+    def stage(self, stage: str):
+        """Time a stage of the current check (no-op outside cycle())."""
+        timer = getattr(self._local, 'timer', None)
+        if timer is None:
+            return nullcontext()
+        return self._timed(timer, stage)
+
+    @contextmanager
+    def _timed(self, timer: CycleTimer, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer.add(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Time a stage that is not tied to one mailbox (the batch commit)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stages[stage].append(time.perf_counter() - started)
+
+    def _record_cycle(self, timer: CycleTimer, ok: bool):
+        total = time.perf_counter() - timer.started
+        with self._lock:
+            for stage, seconds in timer.stages.items():
+                self._stages[stage].append(seconds)
+            self._cycles.append({
+                'config_id': timer.config_id,
+                'mode': timer.mode,
+                'at': time.time(),
+                'ok': ok,
+                'total_ms': round(total * 1000, 1),
+                'stages_ms': {stage: round(seconds * 1000, 1) for stage, seconds in timer.stages.items()}
+            })
+
+    def summary(self, slowest: int = 5) -> Dict:
+        """Percentiles per stage (ms) and the slowest recent mailbox checks."""
+        with self._lock:
+            stages = {stage: list(samples) for stage, samples in self._stages.items()}
+            cycles = list(self._cycles)
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        totals = [cycle['total_ms'] for cycle in cycles]
+        return {
+            'capacity': self.capacity,
+            'stages': {
+                stage: {
+                    'count': len(samples),
+                    'p50_ms': ms(percentile(samples, 50)),
+                    'p95_ms': ms(percentile(samples, 95)),
+                    'p99_ms': ms(percentile(samples, 99)),
+                    'max_ms': ms(max(samples)) if samples else None
+                }
+                for stage, samples in stages.items()
+            },
+            'cycles': {
+                'count': len(cycles),
+                'failed': sum(1 for cycle in cycles if not cycle['ok']),
+                'p50_ms': percentile(totals, 50),
+                'p95_ms': percentile(totals, 95)
+            },
+            'slowest': sorted(cycles, key=lambda cycle: cycle['total_ms'], reverse=True)[:slowest]
+        }
@@ -0,0 +1,106 @@
+"""
+Set-based bulk status changes on orders.
+Bulk approve/cancel run as conditional UPDATEs - `WHERE id IN (...) AND
+status = ...` - in chunks that stay well under SQL Server's 2100-parameter
+limit, and the per-order outcome is read from the rows each UPDATE returned
+(OUTPUT/RETURNING). Approving a day's 3,000 transfers is a handful of
+statements instead of 3,000 loaded and flushed objects.
+
+The UPDATEs bypass the unit of work, so the order_daily_stats deltas are
+applied here; the summary cache notices the statements on its own.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence
+from sqlalchemy import select, update
+from app import db
+from app.models.order import Order
+from app.services import order_rollup
+
+CHUNK_SIZE = 1000
+
+# action -> new status, which current statuses it applies to (`applies_to`, or
+# everything but `excluded`) and the skip reason reported for the others
+BULK_ACTIONS = {
+    'approve': {'status': 'approved', 'applies_to': ('pending',), 'reason': 'not pending'},
+    'cancel': {'status': 'cancelled', 'excluded': ('completed', 'cancelled'), 'reason': 'already completed/cancelled'},
+}
+
+
+def _chunks(items: Sequence, size: int = None) -> Iterable[Sequence]:
+    size = size or CHUNK_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _eligible(action: str, status: str) -> bool:
+    spec = BULK_ACTIONS[action]
+    if 'applies_to' in spec:
+        return status in spec['applies_to']
+    return status not in spec['excluded']
+
+
+def current_statuses(order_ids: Sequence[int]) -> Dict[int, str]:
+    """{order_id: status} for the ids that exist."""
+    statuses = {}
+    for chunk in _chunks(list(order_ids)):
+        rows = db.session.execute(select(Order.id, Order.status).where(Order.id.in_(chunk)))
+        statuses.update({order_id: status for order_id, status in rows})
+    return statuses
+
+
+def apply(action: str, statuses: Dict[int, str], user_id: int = None) -> List[Dict]:
+    """Run `action` on the orders in `statuses` ({id: status} from current_statuses).
+
+    Returns one result per order, in the order of `statuses`. An order that
+    was eligible but changed status before its UPDATE ran is reported as
+    skipped. Does not commit.
+    """
+    spec = BULK_ACTIONS[action]
+    now = datetime.utcnow()
+    values = {'status': spec['status'], 'updated_at': now}
+    if action == 'approve':
+        values.update(approved_by_id=user_id, approved_at=now)
+
+    # One UPDATE per (old status, chunk): the WHERE on the old status guards
+    # against concurrent changes and tells which rollup row to decrement
+    by_status = defaultdict(list)
+    for order_id, status in statuses.items():
+        if _eligible(action, status):
+            by_status[status].append(order_id)
+
+    changed = set()
+    deltas = defaultdict(lambda: [0, 0])
+    for old_status, ids in by_status.items():
+        for chunk in _chunks(ids):
+            statement = (
+                update(Order)
+                .where(Order.id.in_(chunk), Order.status == old_status)
+                .values(**values)
+                .returning(Order.id, Order.created_at, Order.action, Order.service_type, Order.missing_data_mask)
+            )
+            rows = db.session.execute(statement, execution_options={'synchronize_session': False})
+            for order_id, created_at, order_action, service_type, mask in rows:
+                changed.add(order_id)
+                order_rollup.add_status_change(
+                    deltas, created_at, order_action, service_type, mask, old_status, spec['status']
+                )
+    order_rollup.apply_deltas(db.session.connection(), deltas)
+
+    results = []
+    for order_id, status in statuses.items():
+        if order_id in changed:
+            results.append({'id': order_id, 'status': spec['status']})
+        elif _eligible(action, status):
+            results.append({'id': order_id, 'status': 'skipped', 'reason': 'changed concurrently'})
+        else:
+            results.append({'id': order_id, 'status': 'skipped', 'reason': spec['reason']})
+    return results
+
+
+def outcome_counts(results: Iterable[Dict]) -> Dict[str, int]:
+    """{status or skip reason: number of orders}, for audit entries."""
+    counts = defaultdict(int)
+    for result in results:
+        counts[result.get('reason', result['status'])] += 1
+    return dict(counts)
@@ -0,0 +1,185 @@
+"""
+Incrementally maintained order_daily_stats rollup.
+Every flush that inserts, deletes or changes the status, action, service type
+or missing-data flags of an Order adjusts the matching rollup rows in the same
+transaction, so the dashboard and stats endpoints aggregate a table sized by
+days x categories instead of scanning `orders`.
+
+Bulk UPDATE/DELETE statements on orders bypass the unit of work; code issuing
+them must call apply_deltas() itself (or run `flask rebuild-order-stats`).
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import case, event, func, insert, inspect, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.order import Order, OrderDailyStat
+from app.utils.db_writes import increment_or_insert
+
+# Order attributes that decide which rollup row an order is counted in
+ROLLUP_ATTRIBUTES = ('created_at', 'status', 'action', 'service_type', 'missing_data_mask')
+
+RollupKey = Tuple[date, str, str, str]
+
+
+def rollup_key(created_at, status, action, service_type) -> RollupKey:
+    return (created_at or datetime.utcnow()).date(), status, action, service_type
+
+
+def _add(deltas, created_at, status, action, service_type, missing_data_mask, sign: int):
+    entry = deltas[rollup_key(created_at, status, action, service_type)]
+    entry[0] += sign
+    entry[1] += sign if missing_data_mask else 0
+
+
+def add_status_change(deltas, created_at, action, service_type, missing_data_mask, old_status: str, new_status: str):
+    """Move one order from its `old_status` rollup row to the `new_status` one."""
+    _add(deltas, created_at, old_status, action, service_type, missing_data_mask, sign=-1)
+    _add(deltas, created_at, new_status, action, service_type, missing_data_mask, sign=1)
+
+
+def _values(order: Order, old: bool = False) -> List:
+    """Rollup attributes of an order, as currently set or as last flushed."""
+    if not old:
+        return [getattr(order, name) for name in ROLLUP_ATTRIBUTES]
+    state = inspect(order)
+    values = []
+    for name in ROLLUP_ATTRIBUTES:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            values.append(None)  # was never set
+        else:
+            values.append(getattr(order, name))
+    return values
+
+
+def _apply_defaults(order: Order):
+    """Set column defaults the INSERT would apply, so the new order is counted in its final row."""
+    if order.created_at is None:
+        order.created_at = datetime.utcnow()
+    for name in ROLLUP_ATTRIBUTES:
+        default = Order.__table__.c[name].default
+        if getattr(order, name) is None and default is not None and default.is_scalar:
+            setattr(order, name, default.arg)
+
+
+def _changed(order: Order) -> bool:
+    state = inspect(order)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_ATTRIBUTES)
+
+
+def apply_deltas(connection, deltas: Dict[RollupKey, List[int]]):
+    """Add (order_count, missing_data_count) deltas to the rollup rows."""
+    table = OrderDailyStat.__table__
+    for (day, status, action, service_type), (count, missing) in deltas.items():
+        if not count and not missing:
+            continue
+        where = (
+            (table.c.day == day) & (table.c.status == status) &
+            (table.c.action == action) & (table.c.service_type == service_type)
+        )
+        increment_or_insert(
+            connection,
+            update(table).where(where).values(
+                order_count=table.c.order_count + count,
+                missing_data_count=table.c.missing_data_count + missing
+            ),
+            insert(table).values(
+                day=day, status=status, action=action, service_type=service_type,
+                order_count=count, missing_data_count=missing
+            )
+        )
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_order_deltas(session, flush_context, instances):
+    deltas = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if isinstance(obj, Order):
+            _apply_defaults(obj)
+            _add(deltas, *_values(obj), sign=1)
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            _add(deltas, *_values(obj, old=True), sign=-1)
+    for obj in session.dirty:
+        if isinstance(obj, Order) and obj not in session.deleted and _changed(obj):
+            _add(deltas, *_values(obj, old=True), sign=-1)
+            _add(deltas, *_values(obj), sign=1)
+    if deltas:
+        session.info.setdefault('order_rollup_deltas', []).append(deltas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_order_deltas(session, flush_context):
+    pending = session.info.pop('order_rollup_deltas', None)
+    if pending:
+        connection = session.connection()
+        for deltas in pending:
+            apply_deltas(connection, deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_order_deltas(session):
+    session.info.pop('order_rollup_deltas', None)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op; registering it with active_history=True is what matters."""
+
+
+# Load the previous value on assignment, so status changes on expired
+# instances still know which rollup row to decrement
+for _name in ROLLUP_ATTRIBUTES:
+    event.listen(getattr(Order, _name), 'set', _load_previous_value, active_history=True)
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """Recompute the whole rollup from `orders`; returns the number of orders counted."""
+    deltas = defaultdict(lambda: [0, 0])
+    total = 0
+    rows = db.session.query(
+        Order.created_at, Order.status, Order.action, Order.service_type, Order.missing_data_mask
+    ).execution_options(yield_per=batch_size)
+    for row in rows:
+        _add(deltas, *row, sign=1)
+        total += 1
+
+    db.session.query(OrderDailyStat).delete(synchronize_session=False)
+    records = [
+        {'day': day, 'status': status, 'action': action, 'service_type': service_type,
+         'order_count': count, 'missing_data_count': missing}
+        for (day, status, action, service_type), (count, missing) in deltas.items()
+    ]
+    for start in range(0, len(records), batch_size):
+        db.session.execute(insert(OrderDailyStat.__table__), records[start:start + batch_size])
+    db.session.commit()
+    return total
+
+
+def totals(recent_since: date) -> List[Tuple]:
+    """(status, action, service_type, orders, missing_data, orders since `recent_since`)."""
+    stat = OrderDailyStat
+    return db.session.query(
+        stat.status, stat.action, stat.service_type,
+        func.sum(stat.order_count),
+        func.sum(stat.missing_data_count),
+        func.sum(case((stat.day >= recent_since, stat.order_count), else_=0))
+    ).group_by(stat.status, stat.action, stat.service_type).all()
+
+
+def counts_by_status() -> Dict[str, int]:
+    stat = OrderDailyStat
+    rows = db.session.query(stat.status, func.sum(stat.order_count)).group_by(stat.status).all()
+    return {status: count for status, count in rows}
+
+
+def daily_counts(start: date, end: date = None) -> List[Tuple[date, int]]:
+    """Orders created per day in [start, end], oldest first (days without orders omitted)."""
+    stat = OrderDailyStat
+    query = db.session.query(stat.day, func.sum(stat.order_count)).filter(stat.day >= start)
+    if end is not None:
+        query = query.filter(stat.day <= end)
+    return query.group_by(stat.day).order_by(stat.day).all()
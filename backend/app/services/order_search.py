@@ -0,0 +1,185 @@
+"""
+Full-text search over orders, backed by the order_search_tokens inverted index.
+Every flush that inserts an order or changes one of its searchable fields
+rewrites that order's tokens in the same transaction. A search term matches
+tokens starting with it (an index range seek, `token LIKE 'term%'`), every
+term must match, and results are ranked by the summed weight of the fields
+they matched in - whole-word matches counting double.
+
+Works the same on Azure SQL and SQLite, without a full-text catalog. Bulk
+DELETEs on orders rely on ON DELETE CASCADE; bulk UPDATEs of searchable
+fields need `flask rebuild-order-search`.
+"""
+from typing import Dict, Iterable, List, Mapping, Tuple
+from sqlalchemy import case, delete, event, func, insert, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+from app import db
+from app.models.order import Order, OrderSearchToken
+from app.utils.text import words
+
+# Searchable order fields and how much a match in each counts
+FIELD_WEIGHTS = {
+    'service_id': 10,        # booking number
+    'passenger_names': 8,
+    'contact_phone': 6,
+    'pickup_location': 4,    # hotel name for arrivals
+    'dropoff_location': 4,   # hotel name for departures
+    'description': 1,
+}
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+MAX_TOKENS_PER_FIELD = 200
+MAX_TERMS = 8
+
+
+def tokenize(text) -> List[str]:
+    """Distinct words of `text`, in order of appearance."""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(part) for part in text if part)
+    seen = {}
+    for word in words(text):
+        if len(word) >= MIN_TOKEN_LENGTH:
+            seen.setdefault(word[:MAX_TOKEN_LENGTH], None)
+    return list(seen)
+
+
+def document_tokens(values: Mapping) -> Dict[Tuple[str, str], int]:
+    """{(token, field): weight} for an order's searchable field values."""
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        words = tokenize(values.get(field))
+        if field == 'contact_phone' and values.get(field):
+            # '+39 333 123 4567' is also searchable as '393331234567'
+            digits = ''.join(ch for ch in str(values[field]) if ch.isdigit())
+            if len(digits) >= MIN_TOKEN_LENGTH and digits not in words:
+                words.append(digits[:MAX_TOKEN_LENGTH])
+        for word in words[:MAX_TOKENS_PER_FIELD]:
+            tokens[(word, field)] = weight
+    return tokens
+
+
+def _rows(order_id: int, values: Mapping) -> List[Dict]:
+    return [
+        {'token': token, 'order_id': order_id, 'field': field, 'weight': weight}
+        for (token, field), weight in document_tokens(values).items()
+    ]
+
+
+def _order_values(order: Order) -> Dict:
+    return {field: getattr(order, field) for field in FIELD_WEIGHTS}
+
+
+def _needs_reindex(order: Order) -> bool:
+    state = inspect(order)
+    return any(state.attrs[field].history.has_changes() for field in FIELD_WEIGHTS)
+
+
+def _chunks(items: List, size: int = 500) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_search_changes(session, flush_context, instances):
+    pending = session.info.setdefault('order_search_pending', {'new': [], 'changed': []})
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, Order) and obj.id is not None]
+    if deleted_ids:
+        # Before the orders themselves, so the FK holds without relying on ON DELETE CASCADE
+        table = OrderSearchToken.__table__
+        connection = session.connection()
+        for chunk in _chunks(deleted_ids):
+            connection.execute(delete(table).where(table.c.order_id.in_(chunk)))
+    for obj in session.new:
+        if isinstance(obj, Order):
+            pending['new'].append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Order) and obj not in session.deleted and _needs_reindex(obj):
+            pending['changed'].append(obj)
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_search_tokens(session, flush_context):
+    pending = session.info.pop('order_search_pending', None)
+    if not pending or not (pending['new'] or pending['changed']):
+        return
+    table = OrderSearchToken.__table__
+    connection = session.connection()
+    orders = pending['new'] + pending['changed']
+    # New ids too: tokens left behind by a bulk DELETE where ON DELETE CASCADE is off (SQLite)
+    for chunk in _chunks([order.id for order in orders]):
+        connection.execute(delete(table).where(table.c.order_id.in_(chunk)))
+    rows = []
+    for order in orders:
+        rows.extend(_rows(order.id, _order_values(order)))
+    for chunk in _chunks(rows):
+        connection.execute(insert(table), chunk)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_search_changes(session):
+    session.info.pop('order_search_pending', None)
+
+
+def ranked(text: str):
+    """Subquery (order_id, score) of orders matching every term of `text`.
+
+    None when `text` has no searchable terms.
+    """
+    terms = tokenize(text)[:MAX_TERMS]
+    if not terms:
+        return None
+    token = OrderSearchToken
+    branches = []
+    for position, term in enumerate(terms):
+        weight = case((token.token == term, token.weight * 2), else_=token.weight)
+        branches.append(
+            select(
+                token.order_id.label('order_id'),
+                literal(position).label('term'),
+                func.max(weight).label('weight')
+            ).where(token.token.like(f'{term}%')).group_by(token.order_id)
+        )
+    matches = union_all(*branches).subquery()
+    return (
+        select(matches.c.order_id, func.sum(matches.c.weight).label('score'))
+        .group_by(matches.c.order_id)
+        .having(func.count() == len(terms))
+        .subquery()
+    )
+
+
+def search(text: str, limit: int = 20) -> List[Tuple[int, int]]:
+    """[(order_id, score)] best first."""
+    matches = ranked(text)
+    if matches is None:
+        return []
+    return db.session.execute(
+        select(matches.c.order_id, matches.c.score)
+        .order_by(matches.c.score.desc(), matches.c.order_id.desc())
+        .limit(limit)
+    ).all()
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """Recompute the whole index from `orders`; returns the number of orders indexed."""
+    total, last_id = 0, 0
+    db.session.query(OrderSearchToken).delete(synchronize_session=False)
+    columns = [getattr(Order, field) for field in FIELD_WEIGHTS]
+    while True:
+        # Batches by id, so no result set is left open while inserting
+        batch = db.session.query(Order.id, *columns).filter(Order.id > last_id) \
+            .order_by(Order.id).limit(batch_size).all()
+        if not batch:
+            break
+        rows = []
+        for order_id, *values in batch:
+            rows.extend(_rows(order_id, dict(zip(FIELD_WEIGHTS, values))))
+        for chunk in _chunks(rows, batch_size):
+            db.session.execute(insert(OrderSearchToken.__table__), chunk)
+        total += len(batch)
+        last_id = batch[-1][0]
+    db.session.commit()
+    return total
@@ -0,0 +1,88 @@
+"""
+Cached order aggregates for the orders API.
+The per-status summary shown with every orders page is one GROUP BY query,
+kept for ORDER_SUMMARY_TTL seconds. Commits that insert, change or delete
+orders in this process invalidate it at once (via session events); the TTL
+bounds how stale it can get when another worker writes.
+"""
+import threading
+import time
+from itertools import chain
+from typing import Dict, Optional
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app import db
+from app.models.order import Order
+from app.utils.db_writes import on_bulk_write
+
+SUMMARY_STATUSES = ('pending', 'approved', 'completed', 'cancelled')
+
+
+class OrderSummaryCache:
+    """Order counts by status, refreshed at most every `ttl` seconds."""
+
+    def __init__(self, ttl: float = 10.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._counts: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+            self._generation += 1
+
+    def counts(self, ttl: Optional[float] = None) -> Dict[str, int]:
+        """{status: count} for every status present, from cache when fresh."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            if self._counts is not None and self.clock() - self._loaded_at < ttl:
+                return dict(self._counts)
+            generation = self._generation
+
+        rows = db.session.query(Order.status, func.count(Order.id)).group_by(Order.status).all()
+        counts = {status: count for status, count in rows}
+
+        with self._lock:
+            # Don't cache a result that raced with an invalidation
+            if generation == self._generation:
+                self._counts, self._loaded_at = counts, self.clock()
+        return dict(counts)
+
+    def summary(self, ttl: Optional[float] = None) -> Dict[str, int]:
+        """The `summary` block of GET /api/orders (all orders, ignoring filters)."""
+        counts = self.counts(ttl)
+        summary = {'total_orders': sum(counts.values())}
+        for status in SUMMARY_STATUSES:
+            summary[f'{status}_orders'] = counts.get(status, 0)
+        return summary
+
+
+order_summary = OrderSummaryCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_order_changes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    if any(isinstance(obj, Order) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['orders_changed'] = True
+
+
+def _note_order_statements(session, mapped_class):
+    session.info['orders_changed'] = True
+
+
+on_bulk_write([Order], _note_order_statements)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('orders_changed', False):
+        order_summary.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop('orders_changed', None)
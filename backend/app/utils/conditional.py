@@ -0,0 +1,51 @@
+"""
+Conditional GET: weak ETags, If-None-Match and Cache-Control for read endpoints.
+The ETag is computed before the view runs, from something cheap (an
+updated_at looked up by primary key, a change counter), so a matching
+If-None-Match is answered 304 without loading rows or building JSON.
+"""
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+from flask import make_response, request
+
+
+def weak_etag(*parts) -> str:
+    """Opaque tag for the given version parts (unquoted, as werkzeug expects)."""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+
+def _cache_headers(response, etag: str, max_age: int):
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+    return response
+
+
+def conditional(etag_for: Callable[..., Optional[str]], max_age: int = 0):
+    """Serve the wrapped GET view conditionally.
+
+    etag_for: called with the view's arguments; returns the ETag of the
+    current representation, or None to run the view untagged (e.g. a 404).
+    max_age: seconds the client may reuse the response without asking;
+    0 means it must revalidate every time (which then costs a 304).
+    Apply below the permission decorator, so 304s are never served unauthorised.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_for(*args, **kwargs)
+            if etag is None:
+                return view(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                return _cache_headers(make_response('', 304), etag, max_age)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _cache_headers(response, etag, max_age)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,42 @@
+"""
+Write helpers shared by the services that keep derived tables in step with
+orders: an increment-or-insert upsert, and a hook for bulk ORM statements.
+"""
+from typing import Callable, Iterable
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def increment_or_insert(connection, increment, insert):
+    """Run the `increment` UPDATE; when it matches no row, run the `insert`.
+
+    The INSERT runs in a savepoint: if another transaction created the row
+    first, the increment is retried against that row.
+    """
+    if connection.execute(increment).rowcount:
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(insert)
+    except IntegrityError:
+        if not connection.execute(increment).rowcount:
+            raise
+
+
+def on_bulk_write(classes: Iterable[type], callback: Callable):
+    """Call `callback(session, mapped_class)` for every bulk ORM insert/update/delete on `classes`.
+
+    Such statements bypass the unit of work, so flush events never see them.
+    """
+    classes = tuple(classes)
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _note_bulk_statement(orm_execute_state):
+        if orm_execute_state.is_select:
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in classes:
+            callback(orm_execute_state.session, mapper.class_)
+
+    return _note_bulk_statement
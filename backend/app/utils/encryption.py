@@ -6,12 +6,31 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import os
 import base64
+import threading
 
 class EmailPasswordManager:
     """Manage encryption/decryption of email passwords."""
     
     def __init__(self, secret_key=None):
-        """Initialize with app secret key."""
+        """Initialize with app secret key (the key is derived on first use)."""
+        self._secret_key = secret_key
+        self._fernet = None
+        self._lock = threading.Lock()
+    
+    @property
+    def fernet(self):
+        """Fernet instance, derived once per process on the first encrypt/decrypt.
+        
+        PBKDF2 with 100k iterations is slow, so it is not run at import time.
+        """
+        if self._fernet is None:
+            with self._lock:
+                if self._fernet is None:
+                    self._fernet = Fernet(self._derive_key())
+        return self._fernet
+    
+    def _derive_key(self):
+        secret_key = self._secret_key
         if secret_key is None:
             secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
         
@@ -22,8 +41,7 @@ class EmailPasswordManager:
             salt=b'w3manifest_email_salt',  # Fixed salt for consistency
             iterations=100000,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
-        self.fernet = Fernet(key)
+        return base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
     
     def encrypt_password(self, password):
         """Encrypt password for storage."""
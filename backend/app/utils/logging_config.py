@@ -1,58 +1,159 @@
 """
 Enhanced logging configuration for IMAP monitoring and debugging.
 Provides structured logging with user context and detailed monitoring.
+
+log_imap_activity() returns immediately when its level is disabled. Otherwise
+it attaches a structured payload to the record and hands it to a QueueHandler.
+A single QueueListener thread formats records and writes them: readable lines
+to the console and JSON lines to logs/imap_monitor_YYYYMMDD.log. File I/O
+never runs on the monitor or request threads.
 """
+import atexit
+import json
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
 from functools import wraps
-from flask import request
+from logging.handlers import QueueHandler, QueueListener
+from flask import request, g, has_request_context
 from flask_jwt_extended import get_current_user
 
-def setup_imap_logger(logger_name='imap_monitor', log_level=logging.INFO):
-    """
-    Setup enhanced logger for IMAP monitoring with file and console output.
-    """
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(log_level)
-    
-    # Avoid duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    console_formatter = logging.Formatter(
-        '%(asctime)s - IMAP - %(levelname)s - %(message)s',
-        datefmt='%H:%M:%S'
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'SUCCESS': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL
+}
+
+ICONS = {
+    'INFO': '📧',
+    'WARNING': '⚠️',
+    'ERROR': '❌',
+    'DEBUG': '🔍',
+    'SUCCESS': '✅'
+}
+
+# Context of log calls made outside a request (monitor threads, CLI)
+NO_REQUEST_CONTEXT = {'user_id': None, 'username': 'Anonymous', 'ip': 'Unknown'}
+
+_log_queue = queue.SimpleQueue()
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+class ConsoleFormatter(logging.Formatter):
+    """Readable one-line rendering of IMAP activity records."""
+
+    def format(self, record):
+        payload = getattr(record, 'imap', None)
+        if payload is not None:
+            # Render on a copy: the file handler gets the same record
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg, record.args = render_message(payload), None
+        return super().format(record)
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger plus the activity payload."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName
+        }
+        payload = getattr(record, 'imap', None)
+        if payload is not None:
+            # 'level' in the payload is the caller's name (e.g. SUCCESS), only used for icons
+            entry.update((key, value) for key, value in payload.items() if key != 'level')
+        else:
+            entry['message'] = record.getMessage()
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class _ActivityQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting of activity records to the listener."""
+
+    def emit(self, record):
+        _ensure_listener()
+        super().emit(record)
+
+    def prepare(self, record):
+        if getattr(record, 'imap', None) is not None:
+            return record  # payload is already a private copy; format on the listener
+        return super().prepare(record)
+
+def _log_file_path():
+    log_dir = os.environ.get('IMAP_LOG_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs'
     )
-    
-    # Console handler (always enabled)
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, f'imap_monitor_{datetime.now().strftime("%Y%m%d")}.log')
+
+def _build_output_handlers():
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(ConsoleFormatter(
+        '%(asctime)s - IMAP - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+    handlers = [console_handler]
     
     # File handler (if logs directory exists or can be created)
     try:
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        
-        log_file = os.path.join(log_dir, f'imap_monitor_{datetime.now().strftime("%Y%m%d")}.log')
-        file_handler = logging.FileHandler(log_file)
+        log_file = _log_file_path()
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
-        
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
         print(f"📁 IMAP logging to file: {log_file}")
-        
     except Exception as e:
         print(f"⚠️ Could not setup file logging: {e}")
+    return handlers
+
+def _ensure_listener():
+    """Start the writer thread once per process (again after a fork)."""
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener = QueueListener(_log_queue, *_build_output_handlers(), respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+def shutdown_logging():
+    """Drain the log queue and close the output handlers (runs at exit)."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        _listener, _listener_pid = None, None
+
+atexit.register(shutdown_logging)
+
+def setup_imap_logger(logger_name='imap_monitor', log_level=logging.INFO):
+    """
+    Setup enhanced logger for IMAP monitoring with file and console output.
+    
+    The logger only enqueues records; the shared listener writes them.
+    """
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(log_level)
+    
+    # Avoid duplicate handlers
+    if logger.handlers:
+        return logger
     
+    logger.addHandler(_ActivityQueueHandler(_log_queue))
     return logger
 
 def get_user_context():
@@ -81,10 +182,47 @@ def get_request_context():
     except Exception:
         return {'ip': 'Unknown', 'user_agent': 'Unknown', 'method': 'Unknown', 'endpoint': 'Unknown'}
 
+def get_log_context():
+    """User id/name and client IP for the current request, cached for its duration."""
+    if not has_request_context():
+        return NO_REQUEST_CONTEXT
+    context = g.get('_imap_log_context')
+    if context is None:
+        user_ctx = get_user_context()
+        context = {
+            'user_id': user_ctx['user_id'],
+            'username': user_ctx['username'],
+            'ip': get_request_context()['ip']
+        }
+        g._imap_log_context = context
+    return context
+
+def render_message(payload):
+    """The human-readable line for an activity payload (console output)."""
+    message_parts = [
+        f"{ICONS.get(payload['level'], '📧')} IMAP {payload['action'].upper()}",
+        f"User: {payload['username']} (ID: {payload['user_id']})",
+        f"IP: {payload['ip']}"
+    ]
+    
+    if payload.get('config'):
+        message_parts.append(f"Config: '{payload['config']}'")
+    
+    for key, value in (payload.get('details') or {}).items():
+        message_parts.append(f"{key}: {value}")
+    
+    if payload.get('error'):
+        message_parts.append(f"Error: {payload['error']}")
+    
+    return " | ".join(message_parts)
+
 def log_imap_activity(logger, level, action, details=None, config_name=None, error=None):
     """
     Log IMAP activity with structured context.
     
+    Does nothing (no context lookup, no formatting) when `level` is not
+    enabled for `logger`, so DEBUG calls in per-message loops are free.
+    
     Args:
         logger: Logger instance
         level: Log level (INFO, WARNING, ERROR, etc.)
@@ -93,39 +231,20 @@ def log_imap_activity(logger, level, action, details=None, config_name=None, err
         config_name: Name of the email configuration
         error: Error object if applicable
     """
-    user_ctx = get_user_context()
-    req_ctx = get_request_context()
-    
-    # Build log message
-    icon = {
-        'INFO': '📧',
-        'WARNING': '⚠️',
-        'ERROR': '❌',
-        'DEBUG': '🔍',
-        'SUCCESS': '✅'
-    }.get(level.upper(), '📧')
-    
-    message_parts = [
-        f"{icon} IMAP {action.upper()}",
-        f"User: {user_ctx['username']} (ID: {user_ctx['user_id']})",
-        f"IP: {req_ctx['ip']}"
-    ]
-    
-    if config_name:
-        message_parts.append(f"Config: '{config_name}'")
-    
-    if details:
-        for key, value in details.items():
-            message_parts.append(f"{key}: {value}")
-    
-    if error:
-        message_parts.append(f"Error: {str(error)}")
-    
-    message = " | ".join(message_parts)
+    level = level.upper()
+    levelno = LEVELS.get(level, logging.INFO)
+    if not logger.isEnabledFor(levelno):
+        return
     
-    # Log with appropriate level
-    log_method = getattr(logger, level.lower(), logger.info)
-    log_method(message)
+    payload = {
+        'level': level,
+        'action': action,
+        'config': config_name,
+        'details': dict(details) if details else None,
+        'error': str(error) if error else None,
+        **get_log_context()
+    }
+    logger.log(levelno, action, extra={'imap': payload})
 
 def imap_log_decorator(action, config_param=None):
     """
@@ -0,0 +1,106 @@
+"""
+Keyset (cursor) pagination.
+A page is the next `limit` rows after the last row the client saw, found with
+a WHERE on the sort keys instead of OFFSET, so page 500 costs what page 1
+costs and no COUNT is issued. The cursor is an opaque token holding the sort
+key values of the last row returned.
+
+Sort keys must be non-null and end with a unique column (normally the id).
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued for this listing (or was tampered with)."""
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise InvalidCursor('unknown cursor value')
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([_dump(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = [_load(value) for value in json.loads(payload)]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursor('malformed cursor') from e
+    if len(values) != size:
+        raise InvalidCursor('cursor does not match this listing')
+    return values
+
+
+def _after(keys: Sequence[Tuple], values: Sequence):
+    """Rows strictly after `values` in the (column, descending) ordering.
+
+    Spelled as an OR of prefixes - (a < x) OR (a = x AND b < y) ... - since SQL
+    Server has no row-value comparison.
+    """
+    clauses = []
+    for position, (column, descending) in enumerate(keys):
+        beyond = column < values[position] if descending else column > values[position]
+        equal = [keys[i][0] == values[i] for i in range(position)]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def parse_limit(args, default: int = DEFAULT_LIMIT, name: str = 'limit') -> int:
+    return max(1, min(args.get(name, default, type=int), MAX_LIMIT))
+
+
+def keyset_page(query, keys: Sequence[Tuple], cursor: Optional[str], limit: int):
+    """Fetch one page of `query` ordered by `keys`.
+
+    keys: [(column, descending)], most significant first.
+    cursor: the next_cursor of the previous page ('' or None for the first page).
+    Returns (items, pagination dict with next_cursor/has_next).
+    """
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, len(keys))))
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+    rows = query.limit(limit + 1).all()
+
+    items, has_next = rows[:limit], len(rows) > limit
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in keys])
+    pagination: Dict = {
+        'mode': 'cursor',
+        'limit': limit,
+        'cursor': cursor or None,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    return items, pagination
+
+
+def cursor_requested(args) -> bool:
+    """Cursor mode is chosen by passing `cursor` (empty for the first page)."""
+    return 'cursor' in args
@@ -0,0 +1,45 @@
+"""
+Startup profiling for the application factory.
+create_app() times each construction phase; with STARTUP_PROFILE=1 the
+breakdown is printed when the app is built. For per-module import times as
+well, run `python profile_startup.py` from the backend directory.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get('STARTUP_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+class StartupProfile:
+    """Wall-clock duration of each named create_app() phase."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def to_dict(self):
+        return {
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases},
+            'total_ms': round(self.total * 1000, 2)
+        }
+
+    def report(self) -> str:
+        lines = ['⏱️ create_app() phases:']
+        lines += [f'   {name:<14} {seconds * 1000:8.2f} ms' for name, seconds in self.phases]
+        lines.append(f'   {"total":<14} {self.total * 1000:8.2f} ms')
+        return '\n'.join(lines)
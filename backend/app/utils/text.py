@@ -0,0 +1,23 @@
+"""
+Text normalization shared by the order search index and passenger lookup.
+"""
+import re
+import unicodedata
+
+_WORD = re.compile(r'[0-9a-z]+')
+
+
+def normalize(text) -> str:
+    """Lower case, accents stripped ('Niccolò' -> 'niccolo')."""
+    decomposed = unicodedata.normalize('NFKD', str(text).casefold())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def words(text):
+    """Alphanumeric words of the normalized text."""
+    return _WORD.findall(normalize(text))
+
+
+def normalize_name(name) -> str:
+    """Comparable form of a person's name: 'D'Angelo,  Niccolò' -> 'd angelo niccolo'."""
+    return ' '.join(words(name)) if name else ''
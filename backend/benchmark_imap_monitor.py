@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for IMAPMonitorService against the fake IMAP server.
+Delivers manifest emails into many fake mailboxes at a fixed rate while the
+monitor runs, then reports detection latency (delivery -> EmailLog row),
+detected messages/sec and IMAP connections opened, per monitor mode.
+
+Usage:
+    python benchmark_imap_monitor.py --mailboxes 200 --mode continuous --duration 60
+    python benchmark_imap_monitor.py --mode both --latency 0.05 --disconnect-rate 0.01
+Always runs on the throwaway SQLite database of testing_db, whatever
+SQLALCHEMY_DATABASE_URI is exported: it empties the mailbox tables.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import push_test_app
+from fake_imap_server import FakeIMAPServer, build_message, load_sample_manifests
+from app import db
+from app.models.email_config import EmailConfig, EmailLog, ProcessedEmail
+from app.services.imap_monitor import IMAPMonitorService
+from app.services.monitor_timings import percentile
+
+SUBJECT_PREFIX = 'Manifest bench'
+
+
+def create_configs(server: FakeIMAPServer, folders):
+    """One active EmailConfig per fake mailbox."""
+    for i, mailbox in enumerate(server.mailboxes.values()):
+        config = EmailConfig(
+            name=f'bench-{i}',
+            imap_server='127.0.0.1',
+            imap_port=server.port,
+            email=mailbox.address,
+            use_ssl=False,
+            folder='INBOX',
+            folders=folders[1:],
+            subject_filter='manifest',
+            is_active=True,
+            created_by=1
+        )
+        config.set_password(mailbox.password)
+        db.session.add(config)
+    db.session.commit()
+
+
+def deliver_loop(server: FakeIMAPServer, rate: float, duration: float, noise: float,
+                 folders, manifests, delivered: dict, stop: threading.Event):
+    """Deliver `rate` emails/sec for `duration` seconds into random mailboxes."""
+    mailboxes = list(server.mailboxes.values())
+    started, sequence = time.monotonic(), 0
+    while not stop.is_set() and time.monotonic() - started < duration:
+        mailbox = random.choice(mailboxes)
+        folder = random.choice(folders)
+        if random.random() < noise:
+            mailbox.deliver(build_message('Weekly newsletter', 'news@example.com', mailbox.address), folder)
+        else:
+            sequence += 1
+            subject = f'{SUBJECT_PREFIX} {sequence:06d}'
+            attachments = [random.choice(manifests)] if manifests else []
+            delivered[subject] = datetime.utcnow()
+            mailbox.deliver(build_message(subject, 'ops@classicvacations.com', mailbox.address,
+                                          'Manifest attached.', attachments), folder)
+        stop.wait(1 / rate)
+
+
+def run(args):
+    # Forces the test database and empties the tables the benchmark fills
+    app, ctx = push_test_app(EmailLog, ProcessedEmail, EmailConfig)
+    server = FakeIMAPServer(latency=args.latency, disconnect_rate=args.disconnect_rate).start()
+    folders = ['INBOX'] + [f'Suppliers/Folder{n}' for n in range(1, args.folders)]
+    server.add_mailboxes(args.mailboxes, folders=folders)
+    manifests = load_sample_manifests() if args.attachments else []
+
+    create_configs(server, folders)
+
+    service = IMAPMonitorService()
+    if args.mode in ('regular', 'both'):
+        service.start_monitoring(args.interval)
+    if args.mode in ('continuous', 'both'):
+        service.start_continuous_monitoring(args.interval)
+
+    delivered, stop = {}, threading.Event()
+    started = time.monotonic()
+    deliver_loop(server, args.rate, args.duration, args.noise, folders, manifests, delivered, stop)
+
+    # Give the monitor time to pick up the last deliveries
+    time.sleep(args.drain)
+    elapsed = time.monotonic() - started
+
+    service.stop_monitoring()
+    service.stop_continuous_monitoring()
+    service.scheduler_thread.join(timeout=30)
+
+    first_seen = {}
+    rows = db.session.query(EmailLog.email_subject, EmailLog.created_at).filter(
+        EmailLog.email_subject.like(f'{SUBJECT_PREFIX}%')
+    ).all()
+    for subject, created_at in rows:
+        if subject not in first_seen or created_at < first_seen[subject]:
+            first_seen[subject] = created_at
+    ctx.pop()
+
+    server.stop()
+
+    latencies = [
+        (first_seen[subject] - delivered_at).total_seconds()
+        for subject, delivered_at in delivered.items() if subject in first_seen
+    ]
+    report = {
+        'mode': args.mode,
+        'mailboxes': args.mailboxes,
+        'folders_per_mailbox': args.folders,
+        'delivered': len(delivered),
+        'detected': len(latencies),
+        'missed': len(delivered) - len(latencies),
+        'latency_p50_s': percentile(latencies, 50),
+        'latency_p95_s': percentile(latencies, 95),
+        'latency_max_s': max(latencies) if latencies else None,
+        'detected_per_s': round(len(latencies) / elapsed, 2),
+        'connections': server.stats['connections'],
+        'logins': server.stats['logins'],
+        'commands': server.stats['commands'],
+        'dropped_connections': server.stats['disconnects'],
+        'connections_per_detected': round(server.stats['connections'] / max(len(latencies), 1), 2),
+        'orders_pipeline': service.pipeline.status()['stages']['write']['processed']
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark IMAPMonitorService against a fake IMAP server')
+    parser.add_argument('--mode', choices=['continuous', 'regular', 'both'], default='continuous')
+    parser.add_argument('--mailboxes', type=int, default=100)
+    parser.add_argument('--folders', type=int, default=1, help='folders per mailbox (INBOX + extras)')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of mail delivery')
+    parser.add_argument('--drain', type=float, default=15, help='seconds to wait after the last delivery')
+    parser.add_argument('--rate', type=float, default=5, help='emails delivered per second')
+    parser.add_argument('--noise', type=float, default=0.3, help='share of non-manifest emails')
+    parser.add_argument('--interval', type=int, default=5, help='base polling interval in seconds')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake server delay per command (s)')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0, help='probability of a dropped command')
+    parser.add_argument('--no-attachments', dest='attachments', action='store_false',
+                        help="don't attach the sample .docx manifests")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmark: {args.mailboxes} mailboxes, mode={args.mode}, {args.rate}/s for {args.duration}s")
+    report = run(args)
+    print("=" * 60)
+    for key, value in report.items():
+        print(f"{key:<26} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from sqlalchemy.pool import QueuePool
 
@@ -47,6 +48,25 @@ class Config:
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD')
     EMAIL_CHECK_INTERVAL = int(os.environ.get('EMAIL_CHECK_INTERVAL', '300'))  # seconds
     
+    # IMAP monitor engine
+    IMAP_MAX_CONCURRENCY = int(os.environ.get('IMAP_MAX_CONCURRENCY', '10'))  # mailboxes checked at once
+    IMAP_MAILBOX_TIMEOUT = int(os.environ.get('IMAP_MAILBOX_TIMEOUT', '30'))  # seconds per mailbox
+    IMAP_MAX_BACKOFF = int(os.environ.get('IMAP_MAX_BACKOFF', '1800'))  # seconds, cap for failing servers
+    IMAP_BUSY_HOURS = os.environ.get('IMAP_BUSY_HOURS', '')  # supplier send window, e.g. "6-11,17-19"
+    IMAP_DEDUP_CACHE_SIZE = int(os.environ.get('IMAP_DEDUP_CACHE_SIZE', '10000'))  # processed message keys kept in memory
+    IMAP_DEDUP_RETENTION_DAYS = int(os.environ.get('IMAP_DEDUP_RETENTION_DAYS', '7'))  # days processed_emails rows are kept (min 3)
+    IMAP_LEASE_TTL = int(os.environ.get('IMAP_LEASE_TTL', '90'))  # seconds before another worker takes over polling
+    IMAP_TIMINGS_BUFFER = int(os.environ.get('IMAP_TIMINGS_BUFFER', '1000'))  # recent samples kept per monitor stage
+    CONFIG_REGISTRY_REFRESH = int(os.environ.get('CONFIG_REGISTRY_REFRESH', '30'))  # seconds between checks for config edits made elsewhere
+    
+    # Manifest ingestion pipeline (fetch -> parse -> persist)
+    INGEST_FETCH_WORKERS = int(os.environ.get('INGEST_FETCH_WORKERS', '2'))
+    INGEST_PARSE_WORKERS = int(os.environ.get('INGEST_PARSE_WORKERS', '2'))
+    INGEST_QUEUE_SIZE = int(os.environ.get('INGEST_QUEUE_SIZE', '100'))  # items per stage queue
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '50'))  # messages per DB commit
+    EMAIL_LOG_FLUSH_INTERVAL_MS = int(os.environ.get('EMAIL_LOG_FLUSH_INTERVAL_MS', '1000'))  # write-behind flush period
+    EMAIL_LOG_BUFFER_SIZE = int(os.environ.get('EMAIL_LOG_BUFFER_SIZE', '500'))  # pending log rows that force a flush
+    
     # Azure Configuration
     AZURE_STORAGE_CONNECTION_STRING = os.environ.get('STORAGE_CONNECTION_STRING')
     AZURE_CONTAINER_NAME = 'manifests'
@@ -63,15 +83,23 @@ class Config:
     
     # Pagination
     ORDERS_PER_PAGE = int(os.environ.get('ORDERS_PER_PAGE', '50'))
+    ORDER_SUMMARY_TTL = int(os.environ.get('ORDER_SUMMARY_TTL', '10'))  # seconds the per-status order summary is cached
     
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
 
-# Configurazione unica - SEMPRE Azure
+class TestingConfig(Config):
+    """Tests: always a throwaway SQLite file, never the database in SQLALCHEMY_DATABASE_URI."""
+    
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'w3manifest-test.db')
+
+
+# Configurazione unica - SEMPRE Azure (tranne i test)
 config = {
     'development': Config,
-    'testing': Config,
+    'testing': TestingConfig,
     'production': Config,
     'default': Config
 }
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Fake IMAP server for local tests and benchmarks of IMAPMonitorService.
+Speaks the subset of IMAP4rev1 used by imaplib and by the monitor (LOGIN,
+SELECT/EXAMINE, STATUS, UID SEARCH with UTF-8 literals, UID FETCH, CLOSE,
+LOGOUT), over plain TCP. It can host hundreds of mailboxes and simulate
+slow responses and dropped connections.
+
+Usage:
+    python fake_imap_server.py --port 1143 --mailboxes 50 --latency 0.05
+Every mailbox is supplier-<n>@fake.local with password "secret"; the sample
+manifests in "Manifest Datarockers/" are delivered as .docx attachments.
+"""
+import argparse
+import email
+import email.policy
+import os
+import random
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import format_datetime, make_msgid
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PASSWORD = 'secret'
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Manifest Datarockers')
+_LITERAL = re.compile(rb'\{(\d+)\+?\}\r\n$')
+_MONTHS = {m: i for i, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+
+class FakeMessage:
+    """A stored message plus the fields SEARCH needs."""
+
+    def __init__(self, uid: int, raw: bytes, delivered_at: datetime):
+        self.uid = uid
+        self.raw = raw
+        self.delivered_at = delivered_at
+        self.flags = set()
+        parsed = email.message_from_bytes(raw, policy=email.policy.default)
+        self.subject = str(parsed.get('Subject') or '').lower()
+        self.sender = str(parsed.get('From') or '').lower()
+        self.header = raw.split(b'\r\n\r\n', 1)[0] + b'\r\n\r\n'
+        body = []
+        for part in parsed.walk():
+            if part.get_content_maintype() == 'text' and not part.get_filename():
+                body.append((part.get_payload(decode=True) or b'').decode('utf-8', errors='ignore'))
+        self.body = '\n'.join(body).lower()
+
+
+class FakeFolder:
+    def __init__(self, uidvalidity: int):
+        self.uidvalidity = uidvalidity
+        self.uidnext = 1
+        self.messages: List[FakeMessage] = []
+
+
+class FakeMailbox:
+    """One account: folders of messages, safe to deliver into while clients read."""
+
+    def __init__(self, address: str, password: str = DEFAULT_PASSWORD,
+                 folders=('INBOX',), latency: Optional[float] = None):
+        self.address = address
+        self.password = password
+        self.latency = latency  # overrides the server latency for this account
+        self.folders = {name: FakeFolder(uidvalidity=random.randint(1, 10 ** 6)) for name in folders}
+        self.lock = threading.Lock()
+
+    def deliver(self, raw: bytes, folder: str = 'INBOX') -> int:
+        with self.lock:
+            target = self.folders.setdefault(folder, FakeFolder(uidvalidity=random.randint(1, 10 ** 6)))
+            message = FakeMessage(target.uidnext, raw, datetime.utcnow())
+            target.uidnext += 1
+            target.messages.append(message)
+            return message.uid
+
+
+def build_message(subject: str, sender: str, to: str, body: str = '',
+                  attachments: List[Tuple[str, bytes]] = ()) -> bytes:
+    """MIME message with optional .docx attachments, CRLF line endings."""
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = sender
+    message['To'] = to
+    message['Date'] = format_datetime(datetime.now().astimezone())
+    message['Message-ID'] = make_msgid(domain='fake.local')
+    message.set_content(body or subject)
+    for filename, data in attachments:
+        message.add_attachment(
+            data, maintype='application',
+            subtype='vnd.openxmlformats-officedocument.wordprocessingml.document',
+            filename=filename
+        )
+    return message.as_bytes().replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
+
+
+def load_sample_manifests(directory: str = MANIFEST_DIR) -> List[Tuple[str, bytes]]:
+    """The sample .docx manifests shipped with the repo (empty list if missing)."""
+    if not os.path.isdir(directory):
+        return []
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith('.docx'):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                samples.append((filename, f.read()))
+    return samples
+
+
+def tokenize(data: bytes) -> list:
+    """Split command arguments into atoms/strings, with nested lists for (...)."""
+    tokens, stack, i = [], [], 0
+    current = tokens
+    while i < len(data):
+        char = data[i:i + 1]
+        if char == b' ':
+            i += 1
+        elif char == b'(':
+            stack.append(current)
+            current.append([])
+            current = current[-1]
+            i += 1
+        elif char == b')':
+            current = stack.pop() if stack else tokens
+            i += 1
+        elif char == b'"':
+            value, i = bytearray(), i + 1
+            while i < len(data) and data[i:i + 1] != b'"':
+                if data[i:i + 1] == b'\\':
+                    i += 1
+                value += data[i:i + 1]
+                i += 1
+            current.append(value.decode('utf-8', errors='replace'))
+            i += 1
+        else:
+            end = i
+            while end < len(data) and data[end:end + 1] not in (b' ', b'(', b')'):
+                end += 1
+            current.append(data[i:end].decode('utf-8', errors='replace'))
+            i = end
+    return tokens
+
+
+def parse_uid_set(value: str, uidnext: int) -> set:
+    uids = set()
+    for part in value.split(','):
+        start, _, end = part.partition(':')
+        start = uidnext - 1 if start == '*' else int(start)
+        end = start if not end else (uidnext - 1 if end == '*' else int(end))
+        uids.update(range(min(start, end), max(start, end) + 1))
+    return uids
+
+
+def parse_date(value: str) -> datetime:
+    day, month, year = value.split('-')
+    return datetime(int(year), _MONTHS[month.lower()[:3]], int(day))
+
+
+class SearchError(Exception):
+    pass
+
+
+def match_search(tokens: list, message: FakeMessage, folder: FakeFolder) -> bool:
+    """Evaluate SEARCH keys (implicit AND) against one message."""
+    position = 0
+
+    def parse_key():
+        nonlocal position
+        if position >= len(tokens):
+            raise SearchError('Missing search key')
+        token = tokens[position]
+        position += 1
+        if isinstance(token, list):
+            return match_search(token, message, folder)
+        key = token.upper()
+        if key == 'ALL':
+            return True
+        if key in ('SEEN', 'UNSEEN'):
+            return ('\\Seen' in message.flags) == (key == 'SEEN')
+        if key == 'OR':
+            left, right = parse_key(), parse_key()
+            return left or right
+        if key == 'NOT':
+            return not parse_key()
+        if position >= len(tokens):
+            raise SearchError(f'Missing argument for {key}')
+        argument = tokens[position]
+        position += 1
+        if key == 'SUBJECT':
+            return argument.lower() in message.subject
+        if key == 'FROM':
+            return argument.lower() in message.sender
+        if key == 'BODY':
+            return argument.lower() in message.body
+        if key == 'TEXT':
+            needle = argument.lower()
+            return needle in message.body or needle in message.subject or needle in message.sender
+        if key == 'SINCE':
+            return message.delivered_at.date() >= parse_date(argument).date()
+        if key == 'BEFORE':
+            return message.delivered_at.date() < parse_date(argument).date()
+        if key == 'UID':
+            return message.uid in parse_uid_set(argument, folder.uidnext)
+        raise SearchError(f'Unsupported search key {key}')
+
+    result = True
+    while position < len(tokens):
+        result = parse_key() and result
+    return result
+
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+    """One client connection."""
+
+    def setup(self):
+        super().setup()
+        self.mailbox: Optional[FakeMailbox] = None
+        self.folder: Optional[FakeFolder] = None
+        self.readonly = False
+        self.server.stats_increment('connections')
+
+    def handle(self):
+        self.send(b'* OK [CAPABILITY IMAP4rev1 LITERAL+] Fake IMAP server ready')
+        while True:
+            line = self.read_command()
+            if line is None:
+                return
+            tag, _, rest = line.partition(b' ')
+            command, _, args = rest.partition(b' ')
+            command = command.decode('ascii', errors='replace').upper()
+            self.server.stats_increment('commands')
+
+            latency = self.mailbox.latency if self.mailbox and self.mailbox.latency is not None \
+                else self.server.latency
+            if latency:
+                time.sleep(latency)
+            if self.server.disconnect_rate and random.random() < self.server.disconnect_rate:
+                self.server.stats_increment('disconnects')
+                return  # drop the connection without answering
+
+            handler = getattr(self, f'cmd_{command.lower()}', None)
+            if handler is None:
+                self.send(tag + b' BAD Unknown command')
+                continue
+            try:
+                if handler(tag, tokenize(args)) is False:
+                    return
+            except SearchError as e:
+                self.send(tag + b' BAD ' + str(e).encode())
+            except Exception as e:
+                self.send(tag + b' NO ' + str(e).encode('ascii', errors='replace'))
+
+    def read_command(self) -> Optional[bytes]:
+        """Read one command line, inlining any {n} literals as quoted strings."""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        while True:
+            match = _LITERAL.search(line)
+            if not match:
+                parts.append(line.rstrip(b'\r\n'))
+                return b''.join(parts)
+            if not line.rstrip(b'\r\n').endswith(b'+}'):
+                self.send(b'+ Ready for literal')
+            literal = self.rfile.read(int(match.group(1)))
+            quoted = b'"' + literal.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"'
+            parts.append(line[:match.start()] + quoted)
+            line = self.rfile.readline()
+
+    def send(self, data: bytes):
+        self.wfile.write(data + b'\r\n')
+
+    # Commands
+
+    def cmd_capability(self, tag, args):
+        self.send(b'* CAPABILITY IMAP4rev1 LITERAL+')
+        self.send(tag + b' OK CAPABILITY completed')
+
+    def cmd_noop(self, tag, args):
+        self.send(tag + b' OK NOOP completed')
+
+    def cmd_login(self, tag, args):
+        mailbox = self.server.mailboxes.get(args[0].lower()) if len(args) == 2 else None
+        if mailbox is None or mailbox.password != args[1]:
+            self.send(tag + b' NO [AUTHENTICATIONFAILED] Invalid credentials')
+            return
+        self.mailbox = mailbox
+        self.server.stats_increment('logins')
+        self.send(tag + b' OK LOGIN completed')
+
+    def cmd_logout(self, tag, args):
+        self.send(b'* BYE Fake IMAP server logging out')
+        self.send(tag + b' OK LOGOUT completed')
+        return False
+
+    def cmd_select(self, tag, args, readonly=False):
+        self.require_auth()
+        folder = self.mailbox.folders.get(args[0] if args else '')
+        if folder is None:
+            self.folder = None
+            self.send(tag + b' NO Mailbox does not exist')
+            return
+        self.folder, self.readonly = folder, readonly
+        with self.mailbox.lock:
+            exists, uidnext = len(folder.messages), folder.uidnext
+        self.send(b'* %d EXISTS' % exists)
+        self.send(b'* 0 RECENT')
+        self.send(b'* FLAGS (\\Seen \\Answered \\Flagged \\Deleted \\Draft)')
+        self.send(b'* OK [UIDVALIDITY %d] UIDs valid' % folder.uidvalidity)
+        self.send(b'* OK [UIDNEXT %d] Predicted next UID' % uidnext)
+        mode = b'READ-ONLY' if readonly else b'READ-WRITE'
+        self.send(tag + b' OK [' + mode + b'] SELECT completed')
+
+    def cmd_examine(self, tag, args):
+        self.cmd_select(tag, args, readonly=True)
+
+    def cmd_status(self, tag, args):
+        self.require_auth()
+        name = args[0] if args else ''
+        folder = self.mailbox.folders.get(name)
+        if folder is None:
+            self.send(tag + b' NO Mailbox does not exist')
+            return
+        with self.mailbox.lock:
+            counts = {'MESSAGES': len(folder.messages), 'UIDNEXT': folder.uidnext,
+                      'UIDVALIDITY': folder.uidvalidity,
+                      'UNSEEN': sum(1 for m in folder.messages if '\\Seen' not in m.flags),
+                      'RECENT': 0}
+        items = args[1] if len(args) > 1 and isinstance(args[1], list) else list(counts)
+        values = ' '.join(f'{item.upper()} {counts[item.upper()]}' for item in items if item.upper() in counts)
+        self.send(f'* STATUS "{name}" ({values})'.encode())
+        self.send(tag + b' OK STATUS completed')
+
+    def cmd_close(self, tag, args):
+        self.folder = None
+        self.send(tag + b' OK CLOSE completed')
+
+    def cmd_uid(self, tag, args):
+        self.require_selected()
+        subcommand = args[0].upper() if args else ''
+        if subcommand == 'SEARCH':
+            self.uid_search(tag, args[1:])
+        elif subcommand == 'FETCH':
+            self.uid_fetch(tag, args[1], args[2] if len(args) > 2 else 'RFC822')
+        else:
+            self.send(tag + b' BAD Unsupported UID command')
+
+    def uid_search(self, tag, criteria):
+        if criteria and str(criteria[0]).upper() == 'CHARSET':
+            criteria = criteria[2:]
+        with self.mailbox.lock:
+            messages = list(self.folder.messages)
+        uids = [str(m.uid) for m in messages if match_search(criteria or ['ALL'], m, self.folder)]
+        self.send(('* SEARCH ' + ' '.join(uids)).rstrip().encode())
+        self.send(tag + b' OK SEARCH completed')
+
+    def uid_fetch(self, tag, uid_set, items):
+        items = ' '.join(items) if isinstance(items, list) else str(items)
+        items = items.upper()
+        with self.mailbox.lock:
+            wanted = parse_uid_set(uid_set, self.folder.uidnext)
+            messages = [(seq, m) for seq, m in enumerate(self.folder.messages, 1) if m.uid in wanted]
+        for seq, message in messages:
+            if 'HEADER' in items:
+                name, data = 'RFC822.HEADER', message.header
+            else:
+                name, data = 'RFC822', message.raw
+                if not self.readonly and 'PEEK' not in items:
+                    message.flags.add('\\Seen')
+            self.wfile.write(b'* %d FETCH (UID %d %s {%d}\r\n' % (seq, message.uid, name.encode(), len(data)))
+            self.wfile.write(data)
+            self.send(b')')
+        self.send(tag + b' OK FETCH completed')
+
+    def require_auth(self):
+        if self.mailbox is None:
+            raise PermissionError('Not authenticated')
+
+    def require_selected(self):
+        self.require_auth()
+        if self.folder is None:
+            raise PermissionError('No mailbox selected')
+
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    """Threaded fake IMAP server hosting many mailboxes."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, disconnect_rate: float = 0.0):
+        super().__init__((host, port), IMAPHandler)
+        self.latency = latency
+        self.disconnect_rate = disconnect_rate
+        self.mailboxes: Dict[str, FakeMailbox] = {}
+        self.stats = {'connections': 0, 'logins': 0, 'commands': 0, 'disconnects': 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def add_mailbox(self, address: str, password: str = DEFAULT_PASSWORD, **kwargs) -> FakeMailbox:
+        mailbox = FakeMailbox(address, password, **kwargs)
+        self.mailboxes[address.lower()] = mailbox
+        return mailbox
+
+    def add_mailboxes(self, count: int, prefix: str = 'supplier', **kwargs) -> List[FakeMailbox]:
+        return [self.add_mailbox(f'{prefix}-{i}@fake.local', **kwargs) for i in range(count)]
+
+    def stats_increment(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def start(self) -> 'FakeIMAPServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-imap', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def seed_mailboxes(server: FakeIMAPServer, manifests: List[Tuple[str, bytes]] = None,
+                   noise_per_mailbox: int = 3):
+    """Deliver the sample manifests round-robin plus some unrelated mail."""
+    manifests = load_sample_manifests() if manifests is None else manifests
+    mailboxes = list(server.mailboxes.values())
+    for i, (filename, data) in enumerate(manifests):
+        mailbox = mailboxes[i % len(mailboxes)]
+        mailbox.deliver(build_message(
+            f'Manifest {os.path.splitext(filename)[0]}', 'ops@classicvacations.com',
+            mailbox.address, 'Please find the manifest attached.', [(filename, data)]
+        ))
+    for mailbox in mailboxes:
+        for n in range(noise_per_mailbox):
+            mailbox.deliver(build_message(f'Newsletter #{n}', 'news@example.com', mailbox.address))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake IMAP server for local monitor testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1143)
+    parser.add_argument('--mailboxes', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every command')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0, help='probability of dropping a command')
+    args = parser.parse_args()
+
+    server = FakeIMAPServer(args.host, args.port, args.latency, args.disconnect_rate)
+    server.add_mailboxes(args.mailboxes)
+    seed_mailboxes(server)
+    print(f"📬 Fake IMAP server on {args.host}:{server.port} with {args.mailboxes} mailboxes "
+          f"(supplier-N@fake.local / {DEFAULT_PASSWORD}). Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        print(f"\n📊 {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Add processed_emails dedup table for the IMAP monitor
+
+Revision ID: 7d2f4a91c3e5
+Revises: 1516968b3cf9
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4a91c3e5'
+down_revision = '1516968b3cf9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('processed_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('config_id', sa.Integer(), nullable=False),
+    sa.Column('message_key', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['config_id'], ['email_configs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('config_id', 'message_key', name='uq_processed_emails_config_key')
+    )
+
+
+def downgrade():
+    op.drop_table('processed_emails')
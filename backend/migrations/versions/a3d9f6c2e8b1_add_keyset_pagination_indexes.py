@@ -0,0 +1,44 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: a3d9f6c2e8b1
+Revises: f1c7a3e9d2b6
+Create Date: 2026-10-19 17:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9f6c2e8b1'
+down_revision = 'f1c7a3e9d2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_service_date_created_at_id', ['service_date', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_email_logs_config_created_at_id', ['config_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('manifest_emails', schema=None) as batch_op:
+        batch_op.create_index('ix_manifest_emails_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
+
+    with op.batch_alter_table('manifest_emails', schema=None) as batch_op:
+        batch_op.drop_index('ix_manifest_emails_created_at_id')
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_config_created_at_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_service_date_created_at_id')
@@ -0,0 +1,26 @@
+"""Add stopped_modes to monitor_leases
+
+Revision ID: a7c3e9f1b5d2
+Revises: e4c7b2a9f1d8
+Create Date: 2026-10-20 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1b5d2'
+down_revision = 'e4c7b2a9f1d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('monitor_leases', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stopped_modes', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('monitor_leases', schema=None) as batch_op:
+        batch_op.drop_column('stopped_modes')
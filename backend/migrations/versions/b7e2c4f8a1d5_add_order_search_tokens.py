@@ -0,0 +1,60 @@
+"""Add order_search_tokens full-text index
+
+Revision ID: b7e2c4f8a1d5
+Revises: a3d9f6c2e8b1
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c4f8a1d5'
+down_revision = 'a3d9f6c2e8b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.services.order_search import FIELD_WEIGHTS, document_tokens
+
+    tokens = op.create_table('order_search_tokens',
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=30), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token', 'order_id', 'field')
+    )
+    with op.batch_alter_table('order_search_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_search_tokens_order_id'), ['order_id'], unique=False)
+
+    # Backfill from existing orders (same computation as `flask rebuild-order-search`)
+    orders = sa.table('orders', sa.column('id', sa.Integer()), *[
+        sa.column(field, sa.JSON() if field == 'passenger_names' else sa.Text())
+        for field in FIELD_WEIGHTS
+    ])
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(orders).where(orders.c.id > last_id).order_by(orders.c.id).limit(1000)
+        ).mappings().all()
+        if not batch:
+            break
+        rows = [
+            {'token': token, 'order_id': order['id'], 'field': field, 'weight': weight}
+            for order in batch
+            for (token, field), weight in document_tokens(order).items()
+        ]
+        if rows:
+            op.bulk_insert(tokens, rows)
+        last_id = batch[-1]['id']
+
+
+def downgrade():
+    with op.batch_alter_table('order_search_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_search_tokens_order_id'))
+
+    op.drop_table('order_search_tokens')
@@ -0,0 +1,26 @@
+"""Add body_filter to email_configs
+
+Revision ID: b83e1c6d0f27
+Revises: 7d2f4a91c3e5
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e1c6d0f27'
+down_revision = '7d2f4a91c3e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_configs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('body_filter', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('email_configs', schema=None) as batch_op:
+        batch_op.drop_column('body_filter')
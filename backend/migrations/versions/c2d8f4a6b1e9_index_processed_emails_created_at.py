@@ -0,0 +1,26 @@
+"""Index processed_emails.created_at for retention pruning
+
+Revision ID: c2d8f4a6b1e9
+Revises: a7c3e9f1b5d2
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8f4a6b1e9'
+down_revision = 'a7c3e9f1b5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('processed_emails', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_processed_emails_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('processed_emails', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_processed_emails_created_at'))
@@ -0,0 +1,64 @@
+"""Add order_passengers table
+
+Revision ID: c2f5a8d1e4b7
+Revises: b7e2c4f8a1d5
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f5a8d1e4b7'
+down_revision = 'b7e2c4f8a1d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.utils.text import normalize_name
+
+    passengers = op.create_table('order_passengers',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('passenger_type', sa.String(length=10), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('normalized_name', sa.String(length=200), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id', 'position')
+    )
+    with op.batch_alter_table('order_passengers', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_passengers_normalized_name'), ['normalized_name'], unique=False)
+
+    # Backfill from orders.passenger_names; the first passenger_count_adults names are adults
+    orders = sa.table('orders',
+        sa.column('id', sa.Integer()),
+        sa.column('passenger_names', sa.JSON()),
+        sa.column('passenger_count_adults', sa.Integer())
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(orders).where(orders.c.id > last_id).order_by(orders.c.id).limit(1000)
+        ).all()
+        if not batch:
+            break
+        rows = [
+            {'order_id': order_id, 'position': position,
+             'passenger_type': 'adult' if position < (adults or 0) else 'child',
+             'name': name[:200], 'normalized_name': normalize_name(name)[:200]}
+            for order_id, names, adults in batch
+            for position, name in enumerate(names or [])
+        ]
+        if rows:
+            op.bulk_insert(passengers, rows)
+        last_id = batch[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('order_passengers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_passengers_normalized_name'))
+
+    op.drop_table('order_passengers')
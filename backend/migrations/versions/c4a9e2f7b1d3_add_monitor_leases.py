@@ -0,0 +1,31 @@
+"""Add monitor_leases table for single-leader IMAP monitoring
+
+Revision ID: c4a9e2f7b1d3
+Revises: b83e1c6d0f27
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2f7b1d3'
+down_revision = 'b83e1c6d0f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monitor_leases',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=255), nullable=False),
+    sa.Column('acquired_at', sa.DateTime(), nullable=False),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('monitor_leases')
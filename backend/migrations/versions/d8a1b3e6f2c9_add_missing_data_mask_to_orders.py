@@ -0,0 +1,50 @@
+"""Add missing_data_mask to orders
+
+Revision ID: d8a1b3e6f2c9
+Revises: c2f5a8d1e4b7
+Create Date: 2026-10-19 19:50:00.000000
+
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a1b3e6f2c9'
+down_revision = 'c2f5a8d1e4b7'
+branch_labels = None
+depends_on = None
+
+# Same bit order as app.models.order.MISSING_DATA_FLAGS
+MISSING_DATA_FLAGS = ('pickup_time', 'pickup_location', 'contact_phone', 'passenger_names', 'vehicle_model')
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('missing_data_mask', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_orders_missing_data_mask'), ['missing_data_mask'], unique=False)
+
+    # Backfill from missing_data_flags: one UPDATE per mask value and chunk of ids
+    orders = sa.table('orders',
+        sa.column('id', sa.Integer()),
+        sa.column('missing_data_flags', sa.JSON()),
+        sa.column('missing_data_mask', sa.Integer())
+    )
+    bind = op.get_bind()
+    ids_by_mask = defaultdict(list)
+    for order_id, flags in bind.execute(sa.select(orders.c.id, orders.c.missing_data_flags)):
+        mask = sum(1 << MISSING_DATA_FLAGS.index(flag) for flag in set(flags or []) if flag in MISSING_DATA_FLAGS)
+        if mask:
+            ids_by_mask[mask].append(order_id)
+    for mask, ids in ids_by_mask.items():
+        for start in range(0, len(ids), 1000):
+            bind.execute(
+                orders.update().where(orders.c.id.in_(ids[start:start + 1000])).values(missing_data_mask=mask)
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_orders_missing_data_mask'))
+        batch_op.drop_column('missing_data_mask')
@@ -0,0 +1,29 @@
+"""Add change_counters table for conditional GETs
+
+Revision ID: e4c7b2a9f1d8
+Revises: d8a1b3e6f2c9
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c7b2a9f1d8'
+down_revision = 'd8a1b3e6f2c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_counters',
+    sa.Column('table_name', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('change_counters')
@@ -0,0 +1,26 @@
+"""Add folders to email_configs
+
+Revision ID: e5b3d8a2c9f4
+Revises: c4a9e2f7b1d3
+Create Date: 2026-10-19 13:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b3d8a2c9f4'
+down_revision = 'c4a9e2f7b1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_configs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('folders', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('email_configs', schema=None) as batch_op:
+        batch_op.drop_column('folders')
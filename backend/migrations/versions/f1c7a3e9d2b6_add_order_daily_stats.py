@@ -0,0 +1,57 @@
+"""Add order_daily_stats rollup table
+
+Revision ID: f1c7a3e9d2b6
+Revises: e5b3d8a2c9f4
+Create Date: 2026-10-19 16:10:00.000000
+
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7a3e9d2b6'
+down_revision = 'e5b3d8a2c9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    stats = op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('service_type', sa.String(length=100), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('missing_data_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'action', 'service_type')
+    )
+
+    # Backfill from existing orders (same computation as `flask rebuild-order-stats`)
+    orders = sa.table('orders',
+        sa.column('created_at', sa.DateTime()),
+        sa.column('status', sa.String()),
+        sa.column('action', sa.String()),
+        sa.column('service_type', sa.String()),
+        sa.column('missing_data_flags', sa.JSON())
+    )
+    counts = defaultdict(lambda: [0, 0])
+    result = op.get_bind().execute(sa.select(
+        orders.c.created_at, orders.c.status, orders.c.action,
+        orders.c.service_type, orders.c.missing_data_flags
+    ))
+    for created_at, status, action, service_type, missing_data_flags in result:
+        entry = counts[(created_at.date(), status, action, service_type)]
+        entry[0] += 1
+        entry[1] += 1 if missing_data_flags else 0
+    if counts:
+        op.bulk_insert(stats, [
+            {'day': day, 'status': status, 'action': action, 'service_type': service_type,
+             'order_count': count, 'missing_data_count': missing}
+            for (day, status, action, service_type), (count, missing) in counts.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('order_daily_stats')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Startup profile of the Flask app: per-module import times (python -X importtime)
+and the create_app() phase breakdown, measured in a fresh interpreter.
+
+Usage:
+    python profile_startup.py               # top 25 modules by cumulative time
+    python profile_startup.py --top 50 --sort self --config production
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({config!r})
+built = time.perf_counter()
+print(json.dumps({{
+    'import_ms': round((imported - started) * 1000, 2),
+    'create_app_ms': round((built - imported) * 1000, 2),
+    'profile': app.extensions['startup_profile'].to_dict(),
+    'modules_loaded': len(sys.modules)
+}}))
+'''
+
+
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def profile(config_name=None):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(config=config_name)],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ create_app() failed:\n{result.stderr[-2000:]}")
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    return summary, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile app import and create_app() time')
+    parser.add_argument('--top', type=int, default=25, help='modules to list')
+    parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+    parser.add_argument('--config', default=None, help='config name passed to create_app()')
+    args = parser.parse_args()
+
+    summary, modules = profile(args.config)
+    key = 2 if args.sort == 'cumulative' else 1
+    ours = [m for m in modules if m[0] == 'app' or m[0].startswith('app.')]
+
+    print(f"🚀 import app: {summary['import_ms']} ms | create_app(): {summary['create_app_ms']} ms "
+          f"| modules loaded: {summary['modules_loaded']}")
+    print("=" * 60)
+    for name, milliseconds in summary['profile']['phases_ms'].items():
+        print(f"{name:<40} {milliseconds:10.2f} ms")
+    print("=" * 60)
+    print(f"{'module':<40} {'self ms':>9} {'cumul ms':>10}")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda m: m[key], reverse=True)[:args.top]:
+        print(f"{name[:40]:<40} {self_us / 1000:9.2f} {cumulative_us / 1000:10.2f}")
+    print("=" * 60)
+    print(f"app.* modules: {len(ours)}, self time {sum(m[1] for m in ours) / 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test delle azioni massive sugli ordini: UPDATE condizionali a blocchi, esiti
+per ordine presi dalle righe aggiornate e rollup coerente con un rebuild.
+"""
+import os
+import sys
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order, OrderDailyStat
+from app.services import order_bulk, order_rollup
+
+
+def _rollup():
+    return sorted(
+        (row.day, row.status, row.action, row.service_type, row.order_count, row.missing_data_count)
+        for row in OrderDailyStat.query.filter(OrderDailyStat.order_count != 0)
+    )
+
+
+def test_bulk_approve_is_set_based():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    chunk_size = order_bulk.CHUNK_SIZE
+    try:
+        statuses = ['pending', 'pending', 'pending', 'approved', 'completed']
+        orders = []
+        for i in range(25):
+            order = Order(f'BULK-{i:03d}', 'New', date(2025, 8, 1), 'Arrival Transfers',
+                          created_at=datetime(2025, 7, 1 + i % 3, 9))
+            order.status = statuses[i % len(statuses)]
+            orders.append(order)
+        db.session.add_all(orders)
+        db.session.commit()
+        ids = [order.id for order in orders]
+
+        statements = []
+        listener = lambda conn, cursor, sql, params, context, many: statements.append(sql)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        order_bulk.CHUNK_SIZE = 10
+        try:
+            current = order_bulk.current_statuses(ids + [999999])
+            assert len(current) == 25
+            results = order_bulk.apply('approve', {order_id: current[order_id] for order_id in ids}, user_id=7)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        # 15 pending orders -> 2 chunked UPDATEs, no per-order statements
+        updates = [sql for sql in statements if sql.lstrip().upper().startswith('UPDATE ORDERS')]
+        assert len(updates) == 2
+        assert len(statements) < 15
+
+        assert [result['id'] for result in results] == ids
+        approved = {result['id'] for result in results if result['status'] == 'approved'}
+        assert approved == {order.id for order in orders if statuses[ids.index(order.id) % 5] == 'pending'}
+        skipped = [result for result in results if result['status'] == 'skipped']
+        assert len(skipped) == 10 and all(result['reason'] == 'not pending' for result in skipped)
+
+        db.session.expire_all()
+        row = db.session.get(Order, next(iter(approved)))
+        assert row.status == 'approved' and row.approved_by_id == 7 and row.approved_at is not None
+        assert order_bulk.outcome_counts(results) == {'approved': 15, 'not pending': 10}
+
+        # Cancel touches every status but completed/cancelled, one UPDATE per old status
+        current = order_bulk.current_statuses(ids)
+        results = order_bulk.apply('cancel', current)
+        db.session.commit()
+        assert order_bulk.outcome_counts(results) == {'cancelled': 20, 'already completed/cancelled': 5}
+
+        incremental = _rollup()
+        assert order_rollup.rebuild() == 25
+        assert _rollup() == incremental
+    finally:
+        order_bulk.CHUNK_SIZE = chunk_size
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_bulk_approve_is_set_based()
+    print("✅ Bulk order action tests passed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test delle GET condizionali: ETag deboli da updated_at o dai contatori di
+modifica per tabella, 304 su If-None-Match senza caricare le righe, e
+contatori incrementati una volta per transazione.
+"""
+import contextlib
+import io
+import os
+import sys
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.manifest_email import ManifestEmail
+from app.models.order import Order
+from app.models.seeds import assign_user_role, seed_rbac_data
+from app.models.user import User
+from app.services import change_counters, order_bulk
+
+
+def _setup():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    user = User.query.filter_by(username='etag-admin').first()
+    if user is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_rbac_data()
+        user = User('etag-admin', 'etag@example.com', 'pw', 'E', 'Tag', role='admin')
+        db.session.add(user)
+        db.session.commit()
+        assign_user_role(user, 'admin')
+        db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    return app, ctx, headers
+
+
+def test_conditional_get():
+    app, ctx, headers = _setup()
+    client = app.test_client()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    try:
+        order = Order('ETAG-1', 'New', date(2025, 7, 1), 'Arrival Transfers', description='Transfer')
+        db.session.add(order)
+        db.session.commit()
+        assert change_counters.versions(['orders', 'manifest_emails']) == {'orders': 1, 'manifest_emails': 0}
+
+        response = client.get(f'/api/orders/{order.id}', headers=headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag.startswith('W/"') and 'private' in response.headers['Cache-Control']
+
+        # Revalidation: a primary key lookup of updated_at, no full row, no body
+        event.listen(db.engine, 'before_cursor_execute', record)
+        response = client.get(f'/api/orders/{order.id}', headers={**headers, 'If-None-Match': etag})
+        event.remove(db.engine, 'before_cursor_execute', record)
+        assert response.status_code == 304 and response.data == b''
+        assert not any('orders.description' in statement for statement in statements)
+
+        # Any write changes the tag; a bulk statement bumps the counter too
+        stats = client.get('/api/orders/stats', headers=headers)
+        assert 'max-age' in stats.headers['Cache-Control']
+        order_bulk.apply('approve', order_bulk.current_statuses([order.id]), user_id=None)
+        db.session.commit()
+        assert change_counters.versions(['orders'])['orders'] == 2
+        response = client.get(f'/api/orders/{order.id}', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200 and response.headers['ETag'] != etag
+        assert response.get_json()['status'] == 'approved'
+        response = client.get('/api/orders/stats', headers={**headers, 'If-None-Match': stats.headers['ETag']})
+        assert response.status_code == 200
+
+        # Several flushes in one transaction count as one change
+        order.description = 'First'
+        db.session.flush()
+        order.description = 'Second'
+        db.session.commit()
+        assert change_counters.versions(['orders'])['orders'] == 3
+
+        # The approver and the source manifest are part of the tag
+        manifest = ManifestEmail(email_subject='Manifest 01.07', email_sender='ops@example.com',
+                                 email_date=datetime(2025, 7, 1), email_message_id='<etag@example.com>')
+        db.session.add(manifest)
+        db.session.flush()
+        order.source_manifest_id = manifest.id
+        db.session.commit()
+        etag = client.get(f'/api/orders/{order.id}', headers=headers).headers['ETag']
+        manifest.email_subject = 'Manifest 01.07 (rev)'
+        db.session.commit()
+        response = client.get(f'/api/orders/{order.id}', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['manifest_email']['subject'] == 'Manifest 01.07 (rev)'
+
+        history = client.get('/api/manifest/history', headers=headers)
+        assert history.status_code == 200
+        response = client.get('/api/manifest/history', headers={**headers, 'If-None-Match': history.headers['ETag']})
+        assert response.status_code == 304
+
+        # Unknown orders are not tagged; auth is still checked before revalidating
+        assert client.get('/api/orders/999999', headers=headers).status_code == 404
+        assert client.get('/api/manifest/history', headers={'If-None-Match': history.headers['ETag']}).status_code == 401
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_conditional_get()
+    print("✅ Conditional GET tests passed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test dello store dei messaggi già elaborati: le chiavi entrano nella LRU solo
+dopo il commit delle righe processed_emails, quindi un batch annullato viene
+rielaborato; le chiavi bufferizzate da ActivityBuffer sopravvivono a un flush
+fallito insieme ai log; le righe più vecchie della retention vengono potate.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import push_test_app
+from app import db
+from app.models.email_config import EmailConfig, EmailLog, ProcessedEmail
+from app.services.activity_buffer import ActivityBuffer
+from app.services.dedup_store import ProcessedEmailStore
+
+
+def test_keys_are_cached_only_after_commit():
+    app, ctx = push_test_app(EmailLog, ProcessedEmail, EmailConfig)
+    try:
+        store = ProcessedEmailStore()
+
+        # Staged for a batched commit that then fails: nothing is remembered
+        store.mark_processed(1, ['<a@x>', '<b@x>'], commit=False)
+        assert len(store) == 0
+        db.session.rollback()
+        assert store.filter_new(1, ['<a@x>', '<b@x>']) == ['<a@x>', '<b@x>']
+
+        # The same batch committed later: cached and answered from memory
+        store.mark_processed(1, ['<a@x>'], commit=False)
+        db.session.commit()
+        assert len(store) == 1
+        assert store.filter_new(1, ['<a@x>', '<c@x>']) == ['<c@x>']
+
+        store.mark_processed(1, ['<c@x>'])
+        assert len(store) == 2 and ProcessedEmail.query.count() == 2
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_failed_flush_keeps_keys_with_their_logs():
+    app, ctx = push_test_app(EmailLog, ProcessedEmail, EmailConfig)
+    try:
+        store, buffer = ProcessedEmailStore(), ActivityBuffer()
+        buffer.log(config_id=1, action='approved', status='success', email_subject='Manifest 01.07')
+        buffer.mark_processed(store, 1, ['<a@x>'])
+
+        def broken_commit():
+            raise RuntimeError('database unavailable')
+
+        db.session.commit = broken_commit
+        try:
+            buffer.flush()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('the flush should fail')
+        finally:
+            del db.session.commit
+
+        # Still seen (not processed and logged again) and queued for the next flush
+        assert store.filter_new(1, ['<a@x>']) == []
+        assert buffer.pending() == 2 and ProcessedEmail.query.count() == 0
+
+        # A key stored meanwhile by another writer does not fail the retry
+        buffer.mark_processed(store, 1, ['<b@x>'])
+        db.session.add(ProcessedEmail(config_id=1, message_key='<b@x>'))
+        db.session.commit()
+        buffer.flush()
+        assert EmailLog.query.count() == 1 and ProcessedEmail.query.count() == 2
+        assert buffer.pending() == 0 and len(store) == 2
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_prune_drops_rows_past_retention():
+    app, ctx = push_test_app(EmailLog, ProcessedEmail, EmailConfig)
+    try:
+        store = ProcessedEmailStore(retention_days=7)
+        now = datetime.utcnow()
+        db.session.add_all(
+            [ProcessedEmail(config_id=1, message_key=f'<old{i}@x>', created_at=now - timedelta(days=8))
+             for i in range(5)]
+            + [ProcessedEmail(config_id=1, message_key='<new@x>', created_at=now - timedelta(days=2))]
+        )
+        db.session.commit()
+
+        assert store.prune(batch_size=2) == 5
+        assert [row.message_key for row in ProcessedEmail.query.all()] == ['<new@x>']
+        assert store.filter_new(1, ['<new@x>']) == []
+        assert store.prune() == 0
+
+        # Rows still inside the SINCE window can never be pruned
+        try:
+            store.prune(retention_days=1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('retention below the SINCE window accepted')
+        assert ProcessedEmail.query.count() == 1
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_keys_are_cached_only_after_commit()
+    test_failed_flush_keeps_keys_with_their_logs()
+    test_prune_drops_rows_past_retention()
+    print("✅ Dedup store tests passed")
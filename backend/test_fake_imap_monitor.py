@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test di IMAPMonitorService contro il server IMAP finto (nessuna casella reale).
+Usa il database SQLite usa e getta di testing_db.
+"""
+import imaplib
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import push_test_app
+from fake_imap_server import FakeIMAPServer, build_message
+from app import db
+from app.models.email_config import EmailConfig, EmailLog, ProcessedEmail
+from app.models.manifest_email import ManifestEmail
+from app.services.imap_folders import FolderTracker
+from app.services.imap_monitor import IMAPMonitorService
+from app.services.imap_search import SearchQuery
+
+
+def _setup(server):
+    app, ctx = push_test_app(EmailLog, ProcessedEmail, EmailConfig)
+    mailbox = server.add_mailbox('ops@fake.local', folders=('INBOX', 'Suppliers'))
+    config = EmailConfig(name='fake', imap_server='127.0.0.1', imap_port=server.port,
+                         email=mailbox.address, use_ssl=False, folders=['Suppliers'],
+                         subject_filter='manifest', created_by=1)
+    config.set_password(mailbox.password)
+    db.session.add(config)
+    db.session.commit()
+    return ctx, mailbox, config
+
+
+def test_continuous_check_against_fake_server():
+    server = FakeIMAPServer().start()
+    ctx, mailbox, config = _setup(server)
+    try:
+        mailbox.deliver(build_message('Manifest 01.07', 'ops@classicvacations.com', mailbox.address))
+        mailbox.deliver(build_message('Newsletter', 'news@example.com', mailbox.address))
+        mailbox.deliver(build_message('Manifest 02.07', 'ops@classicvacations.com', mailbox.address), 'Suppliers')
+
+        service = IMAPMonitorService()
+        result = service.check_config_emails_continuous(config)
+        assert result['new_emails'] == 2  # the newsletter is filtered by the server
+        assert EmailLog.query.filter_by(action='approved').count() == 2
+
+        # Nothing changed: both folders are skipped after STATUS, no new logs
+        result = service.check_config_emails_continuous(config)
+        assert result['new_emails'] == 0
+        assert result['folders_skipped'] == 2
+        assert server.stats['logins'] == 2
+    finally:
+        ctx.pop()
+        server.stop()
+
+
+def test_failed_fetch_is_retried_next_cycle():
+    server = FakeIMAPServer().start()
+    ctx, mailbox, config = _setup(server)
+    original_uid = imaplib.IMAP4.uid
+    failures = []
+
+    def flaky_uid(self, command, *args):
+        # One transient NO on the first FETCH
+        if command == 'FETCH' and not failures:
+            failures.append(args)
+            return 'NO', [b'temporary failure']
+        return original_uid(self, command, *args)
+
+    try:
+        mailbox.deliver(build_message('Manifest 04.07', 'ops@classicvacations.com', mailbox.address))
+        service = IMAPMonitorService()
+        imaplib.IMAP4.uid = flaky_uid
+        try:
+            result = service.check_config_emails_continuous(config)
+        finally:
+            imaplib.IMAP4.uid = original_uid
+        assert failures and result['new_emails'] == 0
+        assert result['folders_failed'] == ['INBOX']
+
+        # INBOX's STATUS was not committed, so it is checked again
+        result = service.check_config_emails_continuous(config)
+        assert result['new_emails'] == 1 and result['folders_skipped'] == 1
+        assert EmailLog.query.filter_by(action='approved').count() == 1
+    finally:
+        ctx.pop()
+        server.stop()
+
+
+def test_ingested_message_is_recorded_with_its_manifest():
+    server = FakeIMAPServer().start()
+    ctx, mailbox, config = _setup(server)
+    ManifestEmail.query.filter_by(email_subject='Manifest 05.07').delete()
+    db.session.commit()
+    service = IMAPMonitorService()
+    try:
+        mailbox.deliver(build_message('Manifest 05.07', 'ops@classicvacations.com', mailbox.address))
+        service.pipeline.start(ctx.app)
+        assert service.check_config_emails_continuous(config)['new_emails'] == 1
+        # Not recorded by the check itself: the pipeline writes the key with the manifest
+        service.folder_tracker = FolderTracker()  # look at INBOX again
+        assert service.check_config_emails_continuous(config)['new_emails'] == 0
+        service.pipeline.stop()
+
+        assert ManifestEmail.query.filter_by(email_subject='Manifest 05.07').count() == 1
+        assert ProcessedEmail.query.filter_by(config_id=config.id).count() == 1
+        assert EmailLog.query.filter_by(action='approved').count() == 1
+    finally:
+        service.pipeline.stop()
+        ctx.pop()
+        server.stop()
+
+
+def test_continuous_search_is_narrowed_to_new_mail():
+    server = FakeIMAPServer().start()
+    ctx, mailbox, config = _setup(server)
+    original_execute = SearchQuery.execute
+    searches = []
+
+    def recording_execute(self, mail):
+        searches.append(self.to_criteria())
+        return original_execute(self, mail)
+
+    SearchQuery.execute = recording_execute
+    try:
+        mailbox.deliver(build_message('Manifest 06.07', 'ops@classicvacations.com', mailbox.address))
+        service = IMAPMonitorService()
+        assert service.check_config_emails_continuous(config)['new_emails'] == 1
+        # No previous STATUS yet: the BODY search covers yesterday's mail only
+        assert all(criteria.startswith('SINCE ') for criteria in searches)
+
+        searches.clear()
+        uid = mailbox.deliver(build_message('Newsletter', 'news@example.com', mailbox.address,
+                                            'The manifest is attached'))
+        assert service.check_config_emails_continuous(config)['new_emails'] == 1
+        assert searches == [f'UID {uid}:* OR SUBJECT "manifest" BODY "manifest"']
+    finally:
+        SearchQuery.execute = original_execute
+        ctx.pop()
+        server.stop()
+
+
+def test_stage_timings_are_recorded():
+    server = FakeIMAPServer(latency=0.01).start()
+    ctx, mailbox, config = _setup(server)
+    try:
+        mailbox.deliver(build_message('Manifest 03.07', 'ops@classicvacations.com', mailbox.address))
+        service = IMAPMonitorService()
+        service.check_config_emails_continuous(config)
+
+        summary = service.timings.summary()
+        assert summary['cycles']['count'] == 1 and summary['cycles']['failed'] == 0
+        for stage in ('connect', 'login', 'select', 'search', 'fetch', 'parse'):
+            assert summary['stages'][stage]['count'] == 1, stage
+        assert summary['stages']['login']['p50_ms'] >= 10  # one round trip at 10ms latency
+        assert summary['slowest'][0]['config_id'] == config.id
+    finally:
+        ctx.pop()
+        server.stop()
+
+
+def test_dropped_connection_is_reported_as_error():
+    server = FakeIMAPServer(disconnect_rate=1.0).start()
+    ctx, mailbox, config = _setup(server)
+    try:
+        try:
+            IMAPMonitorService().check_config_emails_continuous(config)
+        except Exception:
+            pass
+        else:
+            raise AssertionError('a dropped connection should fail the check')
+        assert db.session.get(EmailConfig, config.id).last_error
+    finally:
+        ctx.pop()
+        server.stop()
+
+
+if __name__ == '__main__':
+    test_continuous_check_against_fake_server()
+    test_failed_fetch_is_retried_next_cycle()
+    test_ingested_message_is_recorded_with_its_manifest()
+    test_continuous_search_is_narrowed_to_new_mail()
+    test_stage_timings_are_recorded()
+    test_dropped_connection_is_reported_as_error()
+    print("✅ Fake IMAP monitor tests passed")
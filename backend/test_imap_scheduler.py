@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test del ciclo di pianificazione di IMAPMonitorService: un batch che fallisce
+per una modalità non deve lasciare le caselle dell'altra fuori dalla coda.
+Non usa né IMAP né il database.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.imap_async import MailboxResult, MailboxSnapshot
+from app.services.imap_monitor import IMAPMonitorService
+
+
+class _Registry:
+    def __init__(self, configs):
+        self.configs = configs
+
+    def active(self):
+        return self.configs
+
+
+def test_failing_mode_does_not_unschedule_the_other():
+    now = [1000.0]
+    config = MailboxSnapshot(id=1, name='ops', imap_server='imap.example.com', imap_port=993,
+                             email='ops@example.com', password='secret')
+    service = IMAPMonitorService()
+    service.registry = _Registry({config.id: config})
+    service.scheduler.clock = lambda: now[0]
+    service.scheduler.jitter = 0
+    service.monitoring_active = service.continuous_monitoring = True
+    service._apply_check_results = service._handle_continuous_result = lambda *args: {'new_emails': 0}
+    service.activity.flush = lambda: None
+    service.lease.is_valid = lambda: True
+
+    cycles = []
+
+    def run_cycle(configs, fetch):
+        mode = 'regular' if fetch == service._fetch_recent_emails else 'continuous'
+        cycles.append(mode)
+        if mode == 'regular':
+            raise RuntimeError('engine down')
+        return [MailboxResult(config_id=c.id) for c in configs]
+
+    service.engine.run_cycle = run_cycle
+
+    # The regular batch (popped first) raises: the continuous one still runs
+    service._run_due_checks()
+    assert cycles == ['regular', 'continuous']
+    for key in (('regular', 1), ('continuous', 1)):
+        assert not service.scheduler.is_in_flight(key), key
+    status = {entry['mode']: entry for entry in service.get_schedule_status()}
+    assert status['regular']['failures'] == 1 and status['continuous']['failures'] == 0
+
+    # Both keys are back in the queue and come due again
+    now[0] += 3600
+    service._run_due_checks()
+    assert cycles.count('continuous') == 2 and cycles.count('regular') == 2
+
+    # Keys never recorded (the batch failed before reaching the scheduler) are backed off
+    def broken_check(mode, configs):
+        raise RuntimeError('before run_cycle')
+
+    service._check_configs = broken_check
+    now[0] += 3600
+    service._run_due_checks()
+    status = {entry['mode']: entry for entry in service.get_schedule_status()}
+    assert status['regular']['failures'] == 3 and status['continuous']['failures'] == 1
+    assert not any(service.scheduler.is_in_flight(key) for key in (('regular', 1), ('continuous', 1)))
+
+
+if __name__ == '__main__':
+    test_failing_mode_does_not_unschedule_the_other()
+    print("✅ IMAP scheduler tests passed")
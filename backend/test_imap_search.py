@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test del builder IMAP SEARCH (quoting, OR annidati, literal UTF-8).
+Non richiede un server IMAP: usa una connessione finta che registra i comandi.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.imap_search import Criterion, SearchQuery, imap_quote
+
+
+class RecordingMail:
+    """Connessione IMAP finta: registra i comandi UID SEARCH."""
+
+    def __init__(self, results):
+        self.results = results
+        self.literal = None
+        self.commands = []
+
+    def uid(self, command, *args):
+        self.commands.append((command, args, self.literal))
+        self.literal = None
+        return 'OK', [self.results.pop(0) if self.results else b'']
+
+
+def test_quote_escapes_backslash_and_quotes():
+    assert imap_quote('TRF "01.07"') == '"TRF \\"01.07\\""'
+    assert imap_quote('a\\b') == '"a\\\\b"'
+
+
+def test_ascii_query_is_a_single_search():
+    query = SearchQuery('ALL').require_any(
+        Criterion('SUBJECT', 'manifest'), Criterion('BODY', 'manifest')
+    ).require('FROM', 'ops@supplier.com').require('BODY', None)
+
+    mail = RecordingMail([b'3 7 9'])
+    assert query.execute(mail) == [b'3', b'7', b'9']
+    assert query.to_criteria() == 'ALL OR SUBJECT "manifest" BODY "manifest" FROM "ops@supplier.com"'
+    assert len(mail.commands) == 1
+
+
+def test_non_ascii_keyword_uses_literal_and_combines_results():
+    query = SearchQuery('ALL').require_any(
+        Criterion('SUBJECT', 'città'), Criterion('BODY', 'città')
+    ).require('FROM', 'ops@supplier.com')
+
+    # SUBJECT -> 1 2, BODY -> 2 5, FROM -> 2 5 9
+    mail = RecordingMail([b'1 2', b'2 5', b'2 5 9'])
+    assert query.execute(mail) == [b'2', b'5']
+
+    command, args, literal = mail.commands[0]
+    assert args == ('CHARSET', 'UTF-8', 'ALL', 'SUBJECT')
+    assert literal == 'città'.encode('utf-8')
+
+
+if __name__ == '__main__':
+    test_quote_escapes_backslash_and_quotes()
+    test_ascii_query_is_a_single_search()
+    test_non_ascii_keyword_uses_literal_and_combines_results()
+    print("✅ IMAP search tests passed")
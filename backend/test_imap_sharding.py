@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test dell'assegnazione delle caselle IMAP agli shard (consistent hashing).
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.imap_sharding import ShardAssignment, parse_shard
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for value in ('4/4', '-1/4', '1', 'a/b', '0/0'):
+        try:
+            parse_shard(value)
+        except ValueError:
+            continue
+        raise AssertionError(f'{value} should be rejected')
+
+
+def test_every_config_has_exactly_one_owner():
+    shards = [ShardAssignment(i, 4) for i in range(4)]
+    owned = [shard.filter(range(1, 1001)) for shard in shards]
+
+    assert sum(len(ids) for ids in owned) == 1000
+    assert set().union(*owned) == set(range(1, 1001))
+    # Distribution is roughly even
+    assert all(150 < len(ids) < 350 for ids in owned)
+
+
+def test_adding_a_shard_moves_few_configs():
+    before = ShardAssignment(0, 4)
+    after = ShardAssignment(0, 5)
+    moved = sum(1 for config_id in range(1, 1001)
+                if before.shard_for(config_id) != after.shard_for(config_id))
+    # Ideal is 1/5 of the configs; modulo hashing would move ~4/5
+    assert moved < 350
+
+
+if __name__ == '__main__':
+    test_parse_shard()
+    test_every_config_has_exactly_one_owner()
+    test_adding_a_shard_moves_few_configs()
+    print("✅ IMAP sharding tests passed")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test della scrittura della pipeline di ingestione: la chiave dedup viene
+registrata solo con gli ordini, le modifiche a ordini esistenti finiscono
+nell'audit log, le date vengono convertite in UTC e i manifest in tabella
+vengono letti.
+Usa il database SQLite usa e getta di testing_db.
+"""
+import io
+import os
+import sys
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import docx
+from testing_db import ORDER_TABLES, push_test_app
+from fake_imap_server import build_message
+from app import db
+from app.models.audit_log import AuditLog
+from app.models.email_config import ProcessedEmail
+from app.models.manifest_email import ManifestEmail
+from app.models.order import Order
+from app.services.dedup_store import ProcessedEmailStore
+from app.services.imap_async import MailboxSnapshot
+from app.services.ingest_pipeline import FetchedMessage, IngestPipeline, ParsedMessage
+from app.services.manifest_parser import ManifestParser, ParsedService
+
+MAILBOX = MailboxSnapshot(id=1, name='ops', imap_server='imap.example.com', imap_port=993,
+                          email='ops@example.com', password='secret')
+
+
+def _parsed(key, message_id, action='Change', pickup_location='Naples Station'):
+    service = ParsedService(action=action, service_id='CV-100', service_date=date(2025, 8, 5),
+                            service_type='Arrival Transfers', description='Naples - Sorrento',
+                            pickup_location=pickup_location, passenger_count_adults=1,
+                            passenger_names=['Ann Smith'])
+    return ParsedMessage(config_id=MAILBOX.id, message_id=message_id, subject='Manifest 05.08',
+                         sender='ops@classicvacations.com', date=datetime(2025, 8, 1), body_text='',
+                         attachment_filenames=[], services=[service], errors=[], key=key)
+
+
+def test_changes_to_reviewed_orders_are_audited():
+    app, ctx = push_test_app(AuditLog, *ORDER_TABLES, ManifestEmail, ProcessedEmail)
+    try:
+        order = Order(service_id='CV-100', action='New', service_date=date(2025, 8, 5),
+                      service_type='Arrival Transfers', description='Naples - Sorrento',
+                      pickup_location='Naples Airport', passenger_count_adults=1,
+                      passenger_names=['Ann Smith'])
+        order.status = 'approved'
+        db.session.add(order)
+        db.session.commit()
+
+        store = ProcessedEmailStore()
+        pipeline = IngestPipeline(processed_store=store)
+        pipeline._persist([_parsed('<change@x>', '<change@x>')])
+
+        order = Order.query.filter_by(service_id='CV-100').one()
+        assert order.status == 'modified' and order.pickup_location == 'Naples Station'
+        entry = AuditLog.query.filter_by(order_id=order.id).one()
+        assert entry.action == 'order_modified'
+        assert entry.old_values == {'action': 'New', 'pickup_location': 'Naples Airport', 'status': 'approved'}
+        assert entry.new_values['pickup_location'] == 'Naples Station'
+        assert store.filter_new(MAILBOX.id, ['<change@x>']) == []
+
+        # The same data again (another message) changes and audits nothing
+        order.status = 'approved'
+        db.session.commit()
+        pipeline._persist([_parsed('<resend@x>', '<resend@x>')])
+        assert db.session.get(Order, order.id).status == 'approved'
+        assert AuditLog.query.count() == 1
+
+        pipeline._persist([_parsed('<cancel@x>', '<cancel@x>', action='Cancel')])
+        assert db.session.get(Order, order.id).status == 'cancelled'
+        assert AuditLog.query.order_by(AuditLog.id.desc()).first().action == 'order_cancelled'
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_failed_write_leaves_the_message_to_retry():
+    app, ctx = push_test_app(AuditLog, *ORDER_TABLES, ManifestEmail, ProcessedEmail)
+    try:
+        store = ProcessedEmailStore()
+        pipeline = IngestPipeline(processed_store=store)
+        pipeline.running = True  # accept submissions without starting the stage threads
+        assert pipeline.submit(MAILBOX, ['7'], keys={'7': '<fail@x>'})
+        assert pipeline.is_pending(MAILBOX.id, '<fail@x>')
+
+        def broken_persist(batch):
+            raise RuntimeError('database unavailable')
+
+        pipeline._persist = broken_persist
+        pipeline._write_batch([_parsed('<fail@x>', '<fail@x>')])
+        assert not pipeline.is_pending(MAILBOX.id, '<fail@x>')
+        assert ProcessedEmail.query.count() == 0
+        assert store.filter_new(MAILBOX.id, ['<fail@x>']) == ['<fail@x>']
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_parse_converts_dates_and_reads_tables():
+    raw = build_message('Manifest 05.08', 'ops@classicvacations.com', 'ops@example.com')
+    raw = raw.replace(raw[raw.index(b'Date: '):raw.index(b'\r\n', raw.index(b'Date: '))],
+                      b'Date: Fri, 01 Aug 2025 10:30:00 +0200')
+    parsed = IngestPipeline()._parse_message(FetchedMessage(MAILBOX.id, '1', raw, key='<k@x>'))
+    assert parsed.date == datetime(2025, 8, 1, 8, 30) and parsed.key == '<k@x>'
+
+    # Manifest laid out as a label/value table
+    document = docx.Document()
+    document.add_paragraph('CLASSIC VACATIONS ADVISING MANIFEST')
+    table = document.add_table(rows=0, cols=2)
+    for label, value in (('[New] 15-Jul-25', 'Transfer - Naples to Rome by Mercedes E for 1-2'),
+                         ('Booking #:', '12871711-DI23278963153'),
+                         ('Adult 1:', 'Mr. John Doe'),
+                         ('pick up', '9:00 am')):
+        cells = table.add_row().cells
+        cells[0].text, cells[1].text = label, value
+    data = io.BytesIO()
+    document.save(data)
+    services = ManifestParser().parse_manifest_bytes(data.getvalue(), 'table.docx')
+    assert [service.service_id for service in services] == ['12871711-DI23278963153']
+    assert services[0].passenger_names == ['Mr. John Doe'] and services[0].pickup_time == '9:00 am'
+
+
+if __name__ == '__main__':
+    test_changes_to_reviewed_orders_are_audited()
+    test_failed_write_leaves_the_message_to_retry()
+    test_parse_converts_dates_and_reads_tables()
+    print("✅ Ingest pipeline tests passed")
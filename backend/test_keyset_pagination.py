@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test della paginazione keyset: scorrendo i cursori si ottengono tutte le righe,
+nell'ordine di ORDER BY, senza duplicati anche con chiavi a pari merito, e
+senza OFFSET né COUNT.
+"""
+import os
+import sys
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order
+from app.routes.orders import ORDER_KEYS
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+
+def _setup():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    # Many ties on service_date and created_at, so the id breaks them
+    for i in range(23):
+        db.session.add(Order(f'PAGE-{i}', 'New', date(2025, 7, 1 + i % 3), 'Arrival Transfers',
+                             created_at=datetime(2025, 6, 1, 9 + i % 2)))
+    db.session.commit()
+    return ctx
+
+
+def test_cursor_walk_matches_order_by():
+    ctx = _setup()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.upper(), parameters))
+
+    try:
+        expected = [o.id for o in Order.query.order_by(
+            Order.service_date.desc(), Order.created_at.desc(), Order.id.desc())]
+        event.listen(db.engine, 'before_cursor_execute', record)
+        seen, cursor, pages = [], '', 0
+        while True:
+            items, pagination = keyset_page(Order.query, ORDER_KEYS, cursor, 5)
+            seen.extend(o.id for o in items)
+            pages += 1
+            if not pagination['has_next']:
+                assert pagination['next_cursor'] is None
+                break
+            cursor = pagination['next_cursor']
+        assert seen == expected and pages == 5
+        # SQLite always renders LIMIT ? OFFSET ?; the offset must stay 0
+        assert not any('COUNT(' in sql for sql, _ in statements)
+        assert all(params[-1] == 0 for sql, params in statements if 'OFFSET' in sql)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    values = [date(2025, 7, 1), datetime(2025, 6, 1, 9, 30), 42]
+    assert decode_cursor(encode_cursor(values), 3) == values
+    for bad in ('not-a-cursor', encode_cursor([1, 2])):
+        try:
+            decode_cursor(bad, 3)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f'accepted {bad!r}')
+
+
+if __name__ == '__main__':
+    test_cursor_walk_matches_order_by()
+    test_cursor_round_trip_and_rejects_garbage()
+    print("✅ Keyset pagination tests passed")
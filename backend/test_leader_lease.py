@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test del lease del monitor IMAP: il thread di heartbeat lo rinnova anche
+durante un ciclo più lungo del TTL, e uno stop richiesto a un worker che non
+è leader ferma comunque il leader.
+Usa il database SQLite usa e getta di testing_db; niente IMAP.
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import push_test_app
+from app.models.email_config import MonitorLease
+from app.services.imap_async import MailboxResult, MailboxSnapshot
+from app.services.imap_monitor import IMAPMonitorService
+from app.services.leader_lease import LeaderLease
+
+TTL = 1.5  # seconds: the heartbeat renews every 0.5s
+
+
+class _Registry:
+    refresh_interval = 30
+
+    def __init__(self, configs):
+        self.configs = configs
+
+    def active(self):
+        return self.configs
+
+
+def _service(cycle_seconds=0.0):
+    config = MailboxSnapshot(id=1, name='ops', imap_server='imap.example.com', imap_port=993,
+                             email='ops@example.com', password='secret')
+    service = IMAPMonitorService()
+    service.registry = _Registry({config.id: config})
+    service._handle_continuous_result = lambda *args: {'new_emails': 0}
+
+    def run_cycle(configs, fetch):
+        time.sleep(cycle_seconds)
+        return [MailboxResult(config_id=c.id) for c in configs]
+
+    service.engine.run_cycle = run_cycle
+    return service
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_lease_is_renewed_during_a_long_cycle():
+    app, ctx = push_test_app(MonitorLease)
+    app.config['IMAP_LEASE_TTL'] = TTL
+    service = _service(cycle_seconds=TTL * 2)
+    other = LeaderLease(ttl=TTL)
+    try:
+        service.start_continuous_monitoring(1)
+        assert _wait_for(lambda: service.lease.is_leader)
+
+        # Well past the TTL, while the first cycle is still running
+        time.sleep(TTL * 1.5)
+        assert not other.acquire()
+        assert service.lease.is_valid()
+    finally:
+        service.stop_continuous_monitoring()
+        service.heartbeat_thread.join(timeout=TTL * 4)
+    try:
+        # Released once the last cycle is written
+        assert not service.heartbeat_thread.is_alive()
+        assert other.acquire()
+    finally:
+        other.release()
+        ctx.pop()
+
+
+def test_stop_reaches_the_leader_from_another_worker():
+    app, ctx = push_test_app(MonitorLease)
+    app.config['IMAP_LEASE_TTL'] = TTL
+    leader, standby = _service(), _service()
+    try:
+        leader.start_continuous_monitoring(1)
+        assert _wait_for(lambda: leader.lease.is_leader)
+
+        # The admin's stop lands on a worker that is not polling
+        standby.stop_continuous_monitoring(deployment_wide=True)
+        assert _wait_for(lambda: not leader.continuous_monitoring)
+        assert leader.lease.stopped_modes() == {'continuous'}
+        assert _wait_for(lambda: not leader.heartbeat_thread.is_alive())
+
+        # A new start lifts the stop
+        leader.start_continuous_monitoring(1)
+        assert leader.lease.stopped_modes() == set()
+        time.sleep(TTL)
+        assert leader.continuous_monitoring
+    finally:
+        leader.stop_continuous_monitoring()
+        leader.heartbeat_thread.join(timeout=TTL * 4)
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_lease_is_renewed_during_a_long_cycle()
+    test_stop_reaches_the_leader_from_another_worker()
+    print("✅ Leader lease tests passed")
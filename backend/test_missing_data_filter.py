@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test della bitmask missing_data_mask: tenuta allineata da check_missing_data
+e usata dal filtro `missing` come IN sui valori della maschera.
+"""
+import os
+import sys
+from datetime import date, time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order, OrderDailyStat, missing_data_mask
+
+
+def _ids(flags):
+    return sorted(order.service_id for order in Order.query.filter(Order.missing_all(flags)))
+
+
+def test_mask_follows_flags_and_filters():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    try:
+        complete = dict(pickup_time=time(10), pickup_location='FCO', contact_phone='+39',
+                        passenger_names=['Mario Rossi'], vehicle_model='Sedan')
+        db.session.add_all([
+            Order('MASK-ALL', 'New', date(2025, 7, 1), 'Arrival Transfers'),
+            Order('MASK-PHONE', 'New', date(2025, 7, 1), 'Arrival Transfers',
+                  **dict(complete, contact_phone=None)),
+            Order('MASK-NONE', 'New', date(2025, 7, 1), 'Arrival Transfers', **complete),
+        ])
+        db.session.commit()
+
+        assert Order.query.filter_by(service_id='MASK-NONE').one().missing_data_mask == 0
+        assert Order.query.filter_by(service_id='MASK-ALL').one().missing_data_mask == 0b11111
+        assert _ids(['contact_phone']) == ['MASK-ALL', 'MASK-PHONE']
+        assert _ids(['contact_phone', 'pickup_time']) == ['MASK-ALL']
+        assert missing_data_mask(['contact_phone']) == 0b100
+
+        order = Order.query.filter_by(service_id='MASK-PHONE').one()
+        order.update_data(contact_phone='+39 333')
+        assert order.missing_data_mask == 0 and _ids(['contact_phone']) == ['MASK-ALL']
+        assert OrderDailyStat.query.with_entities(db.func.sum(OrderDailyStat.missing_data_count)).scalar() == 1
+
+        # Plain attribute edits (as in PUT /orders/<id>) refresh the mask on flush
+        order = Order.query.filter_by(service_id='MASK-ALL').one()
+        for field, value in complete.items():
+            setattr(order, field, value)
+        db.session.commit()
+        assert order.missing_data_mask == 0 and order.missing_data_flags == [] and _ids(['contact_phone']) == []
+        assert OrderDailyStat.query.with_entities(db.func.sum(OrderDailyStat.missing_data_count)).scalar() == 0
+
+        try:
+            missing_data_mask(['hotel'])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unknown flag accepted')
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_mask_follows_flags_and_filters()
+    print("✅ Missing data filter tests passed")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test della proiezione della lista ordini: solo le colonne dei campi richiesti
+vengono lette, la descrizione è troncata in SQL e i campi sconosciuti sono
+rifiutati.
+"""
+import os
+import sys
+from datetime import date, time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order
+from app.routes.orders import DEFAULT_ORDER_LIST_FIELDS, order_list_item, order_projection
+
+
+def _setup():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    db.session.add(Order('PROJ-1', 'New', date(2025, 7, 1), 'Arrival Transfers', description='x' * 300,
+                         pickup_time=time(10, 30), raw_manifest_data={'block': 'y' * 1000}))
+    db.session.commit()
+    return ctx
+
+
+def test_projection_loads_only_requested_columns():
+    ctx = _setup()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    try:
+        names, columns = order_projection()
+        assert names == list(DEFAULT_ORDER_LIST_FIELDS)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        item = order_list_item(Order.query.with_entities(*columns).one(), names)
+        assert item['description'] == 'x' * 100 + '...' and item['pickup_time'] == '10:30'
+        assert 'raw_manifest_data' not in statements[-1]
+        assert 'orders.description AS' not in statements[-1]
+
+        names, columns = order_projection('status, service_id,status')
+        item = order_list_item(Order.query.with_entities(*columns).one(), names)
+        assert item == {'id': item['id'], 'status': 'pending', 'service_id': 'PROJ-1'}
+
+        try:
+            order_projection('id,raw_manifest_data')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unknown field accepted')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+        db.session.rollback()
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_projection_loads_only_requested_columns()
+    print("✅ Order projection tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test del rollup order_daily_stats: aggiornato nella stessa transazione degli
+ordini (inserimento, cambio di stato, cancellazione) e identico a un rebuild.
+"""
+import os
+import sys
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order, OrderDailyStat
+from app.services import order_rollup
+
+
+def _rows():
+    return sorted(
+        (row.day, row.status, row.action, row.service_type, row.order_count, row.missing_data_count)
+        for row in OrderDailyStat.query.filter(OrderDailyStat.order_count != 0)
+    )
+
+
+def test_rollup_follows_order_writes():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    try:
+        orders = [
+            Order('ROLL-1', 'New', date(2025, 7, 1), 'Arrival Transfers', created_at=datetime(2025, 6, 1, 9)),
+            Order('ROLL-2', 'New', date(2025, 7, 2), 'Arrival Transfers', created_at=datetime(2025, 6, 1, 18),
+                  pickup_time=datetime(2025, 7, 2, 10).time(), pickup_location='FCO', contact_phone='+39',
+                  passenger_names=['Mario Rossi'], vehicle_model='Sedan'),
+            Order('ROLL-3', 'Cancel', date(2025, 7, 3), 'Departure Transfers', created_at=datetime(2025, 6, 2, 8)),
+        ]
+        db.session.add_all(orders)
+        db.session.commit()
+        assert _rows() == [
+            (date(2025, 6, 1), 'pending', 'New', 'Arrival Transfers', 2, 1),
+            (date(2025, 6, 2), 'pending', 'Cancel', 'Departure Transfers', 1, 1),
+        ]
+
+        # Status change on an expired instance, then a delete
+        db.session.expire(orders[0])
+        orders[0].status = 'approved'
+        db.session.delete(orders[2])
+        db.session.commit()
+        assert _rows() == [
+            (date(2025, 6, 1), 'approved', 'New', 'Arrival Transfers', 1, 1),
+            (date(2025, 6, 1), 'pending', 'New', 'Arrival Transfers', 1, 0),
+        ]
+        counts = order_rollup.counts_by_status()
+        assert counts['approved'] == 1 and counts['pending'] == 1 and counts.get('cancelled', 0) == 0
+
+        # A rolled back write leaves the rollup untouched
+        orders[1].status = 'cancelled'
+        db.session.flush()
+        db.session.rollback()
+        incremental = _rows()
+        assert order_rollup.rebuild() == 2
+        assert _rows() == incremental
+    finally:
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_rollup_follows_order_writes()
+    print("✅ Order rollup tests passed")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test della ricerca full-text sugli ordini: l'indice dei token segue le
+scritture (inserimento, modifica, cancellazione), i termini sono prefissi in
+AND e i risultati sono ordinati per rilevanza.
+"""
+import os
+import sys
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order, OrderSearchToken
+from app.services import order_search
+
+
+def _ids(text):
+    return [order_id for order_id, _ in order_search.search(text)]
+
+
+def test_index_follows_order_writes():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    try:
+        rossi = Order('12871711-DI23278963153', 'New', date(2025, 7, 1), 'Arrival Transfers',
+                      passenger_names=['Mario Rossi', 'Anna Bianchi'], contact_phone='+39 333 123 4567',
+                      pickup_location='Hotel Niccolò Roma')
+        other = Order('12871712-DI00000000001', 'New', date(2025, 7, 1), 'Departure Transfers',
+                      description='Pickup requested by Mr Rossi for his guests', pickup_location='Hotel Artemide')
+        db.session.add_all([rossi, other])
+        db.session.commit()
+
+        # Prefixes, accents folded, every term required, passenger match ranked first
+        assert _ids('ross') == [rossi.id, other.id]
+        assert _ids('ross mar') == [rossi.id]
+        assert _ids('niccolo') == [rossi.id]
+        assert _ids('3933312') == [rossi.id]
+        assert _ids('DI2327') == [rossi.id]
+        assert _ids('-') == []
+
+        rossi.passenger_names = ['Luigi Verdi']
+        db.session.delete(other)
+        db.session.commit()
+        assert _ids('rossi') == [] and _ids('verdi') == [rossi.id]
+
+        indexed = sorted((t.token, t.field) for t in OrderSearchToken.query)
+        assert order_search.rebuild() == 1
+        assert sorted((t.token, t.field) for t in OrderSearchToken.query) == indexed
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_index_follows_order_writes()
+    print("✅ Order search tests passed")
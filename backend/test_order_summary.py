@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test del riepilogo ordini per stato: una sola GROUP BY, servita dalla cache
+finché un commit non modifica gli ordini.
+"""
+import os
+import sys
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, update
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order
+from app.services.order_stats import OrderSummaryCache, order_summary
+
+
+def _setup():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    for i, status in enumerate(['pending', 'pending', 'approved', 'cancelled']):
+        order = Order(f'TEST-{i}', 'New', date(2025, 7, 1), 'Arrival Transfers')
+        order.status = status
+        db.session.add(order)
+    db.session.commit()
+    return ctx
+
+
+def _count_queries(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+
+def test_summary_is_one_query_then_cached():
+    ctx = _setup()
+    try:
+        cache = OrderSummaryCache(ttl=60)
+        summary, queries = _count_queries(cache.summary)
+        assert queries == 1
+        assert summary == {'total_orders': 4, 'pending_orders': 2, 'approved_orders': 1,
+                           'completed_orders': 0, 'cancelled_orders': 1}
+        _, queries = _count_queries(cache.summary)
+        assert queries == 0
+    finally:
+        ctx.pop()
+
+
+def test_order_commits_invalidate_the_cache():
+    ctx = _setup()
+    try:
+        assert order_summary.summary(ttl=60)['pending_orders'] == 2
+
+        order = Order.query.filter_by(status='pending').first()
+        order.status = 'approved'
+        db.session.commit()
+        assert order_summary.summary(ttl=60)['pending_orders'] == 1
+
+        db.session.execute(update(Order).where(Order.status == 'cancelled').values(status='completed'))
+        db.session.commit()
+        assert order_summary.summary(ttl=60)['completed_orders'] == 1
+    finally:
+        ctx.pop()
+
+
+if __name__ == '__main__':
+    test_summary_is_one_query_then_cached()
+    test_order_commits_invalidate_the_cache()
+    print("✅ Order summary tests passed")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test della tabella order_passengers: righe scritte insieme a passenger_names
+(tipo adulto/bambino, nome normalizzato), aggiornate in posizione e usate per
+trovare tutti gli ordini di un passeggero.
+"""
+import os
+import sys
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from testing_db import ORDER_TABLES, push_test_app
+from app import db
+from app.models.order import Order, OrderPassenger
+from app.services.manifest_parser import ManifestParser, ParsedService
+
+
+def _passengers(order_id):
+    return [(p.position, p.passenger_type, p.normalized_name)
+            for p in OrderPassenger.query.filter_by(order_id=order_id).order_by(OrderPassenger.position)]
+
+
+def test_passenger_rows_follow_the_order():
+    app, ctx = push_test_app(*ORDER_TABLES)
+    try:
+        arrival = Order('PAX-1', 'New', date(2025, 7, 1), 'Arrival Transfers', passenger_count_adults=1,
+                        passenger_names=['Niccolò Rossi', 'Anna Rossi'])
+        departure = Order('PAX-2', 'New', date(2025, 7, 8), 'Departure Transfers',
+                          passenger_names=['NICCOLO ROSSI'], passenger_types=['adult'])
+        db.session.add_all([arrival, departure])
+        db.session.commit()
+        assert _passengers(arrival.id) == [(0, 'adult', 'niccolo rossi'), (1, 'child', 'anna rossi')]
+
+        arrival.set_passengers(['Anna Rossi'], ['adult'])
+        db.session.commit()
+        assert _passengers(arrival.id) == [(0, 'adult', 'anna rossi')]
+        assert arrival.passenger_names == ['Anna Rossi']
+
+        # Types that don't line up with the names fall back to adults first
+        arrival.set_passengers(['Anna Rossi', 'Luca Rossi'], [])
+        db.session.commit()
+        assert _passengers(arrival.id) == [(0, 'adult', 'anna rossi'), (1, 'child', 'luca rossi')]
+        arrival.set_passengers(['Anna Rossi'], ['adult'])
+        db.session.commit()
+
+        matches = OrderPassenger.query.filter_by(normalized_name='niccolo rossi').all()
+        assert [p.order_id for p in matches] == [departure.id]
+
+        db.session.delete(departure)
+        db.session.commit()
+        assert OrderPassenger.query.filter_by(order_id=departure.id).count() == 0
+    finally:
+        db.session.rollback()
+        ctx.pop()
+
+
+def test_parser_keeps_passenger_types():
+    service = ParsedService('New', '1-DI1', date(2025, 7, 1), 'Arrival Transfers', '')
+    ManifestParser().extract_passenger_info('Adult 1: Mario Rossi\nChild 1: Luca Rossi\n', service)
+    assert service.passenger_names == ['Mario Rossi', 'Luca Rossi']
+    assert service.passenger_types == ['adult', 'child']
+
+
+if __name__ == '__main__':
+    test_passenger_rows_follow_the_order()
+    test_parser_keeps_passenger_types()
+    print("✅ Passenger lookup tests passed")
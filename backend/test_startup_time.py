@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test del tempo di avvio: import dell'app + create_app() in un interprete nuovo
+deve restare sotto un budget (STARTUP_BUDGET_SECONDS, default 1.5s), senza
+derivare la chiave di cifratura delle password email e senza caricare il
+servizio IMAP. `python profile_startup.py` mostra dove va il tempo.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault(
+    'SQLALCHEMY_DATABASE_URI',
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='startup-test-'), 'test.db')
+)
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', '1.5'))
+
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app as package
+implicit_app = 'app' in vars(package)
+package.create_app()
+elapsed = time.perf_counter() - started
+from app.utils.encryption import email_password_manager
+print(json.dumps({
+    'elapsed': elapsed,
+    'implicit_app': implicit_app,
+    'key_derived': email_password_manager._fernet is not None,
+    'lazy_modules_loaded': [m for m in ('app.services.imap_monitor', 'docx') if m in sys.modules]
+}))
+'''
+
+
+def _cold_start():
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE], cwd=BACKEND_DIR,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_create_app_within_budget():
+    result = _cold_start()
+    assert result['elapsed'] < STARTUP_BUDGET_SECONDS, (
+        f"cold start took {result['elapsed']:.2f}s (budget {STARTUP_BUDGET_SECONDS}s)"
+    )
+
+
+def test_no_eager_work_at_import():
+    result = _cold_start()
+    assert not result['implicit_app']
+    assert result['lazy_modules_loaded'] == []
+
+
+def test_password_key_is_derived_lazily():
+    assert not _cold_start()['key_derived']
+
+    from app.utils.encryption import EmailPasswordManager
+    manager = EmailPasswordManager('test-secret')
+    assert manager._fernet is None
+    assert manager.test_encrypt_decrypt('s3cret!')
+    assert manager._fernet is not None
+
+
+if __name__ == '__main__':
+    test_create_app_within_budget()
+    test_no_eager_work_at_import()
+    test_password_key_is_derived_lazily()
+    print("✅ Startup time tests passed")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test del logging IMAP strutturato: i livelli disabilitati non costano nulla,
+il file contiene una riga JSON per evento e la scrittura avviene nel thread
+del QueueListener.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ['IMAP_LOG_DIR'] = tempfile.mkdtemp(prefix='imap-logs-')
+os.environ.setdefault(
+    'SQLALCHEMY_DATABASE_URI',
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='imap-test-'), 'test.db')
+)
+
+from app.utils import logging_config
+from app.utils.logging_config import log_imap_activity, setup_imap_logger, shutdown_logging
+
+
+def test_disabled_level_does_no_work():
+    logger = logging.getLogger('test_gated')
+    logger.setLevel(logging.INFO)
+
+    def fail():
+        raise AssertionError('context built for a disabled level')
+
+    original = logging_config.get_log_context
+    logging_config.get_log_context = fail
+    try:
+        log_imap_activity(logger, 'DEBUG', 'per_message', details={'uid': 1})
+    finally:
+        logging_config.get_log_context = original
+
+
+def test_records_are_written_as_json_lines_by_the_listener():
+    shutdown_logging()
+    logger = setup_imap_logger('test_structured')
+    log_imap_activity(logger, 'SUCCESS', 'email_check_complete', details={'new_emails': 3},
+                      config_name='Office365', error=None)
+    log_imap_activity(logger, 'ERROR', 'connection_failed', error=ConnectionError('reset'))
+    log_imap_activity(logger, 'DEBUG', 'skipped_below_level')
+    listener_thread = logging_config._listener._thread
+    shutdown_logging()  # drains the queue
+
+    log_dir = os.environ['IMAP_LOG_DIR']
+    with open(os.path.join(log_dir, os.listdir(log_dir)[0]), encoding='utf-8') as log_file:
+        entries = [json.loads(line) for line in log_file]
+    ours = [entry for entry in entries if entry['logger'] == 'test_structured']
+    assert [entry['action'] for entry in ours] == ['email_check_complete', 'connection_failed']
+    assert ours[0]['level'] == 'INFO' and ours[0]['details'] == {'new_emails': 3}
+    assert ours[0]['config'] == 'Office365' and ours[0]['username'] == 'Anonymous'
+    assert ours[1]['level'] == 'ERROR' and ours[1]['error'] == 'reset'
+    assert listener_thread is not None
+
+
+if __name__ == '__main__':
+    test_disabled_level_does_no_work()
+    test_records_are_written_as_json_lines_by_the_listener()
+    print("✅ Structured logging tests passed")
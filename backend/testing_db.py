@@ -0,0 +1,38 @@
+"""
+Database setup shared by the tests.
+Tests always run on the 'testing' config - a throwaway SQLite file - whatever
+SQLALCHEMY_DATABASE_URI is exported, because they empty the tables they use.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models.change_counter import ChangeCounter
+from app.models.order import Order, OrderDailyStat, OrderPassenger, OrderSearchToken
+from config import TestingConfig
+
+# A fresh file for every test run
+_TEST_DB = TestingConfig.SQLALCHEMY_DATABASE_URI[len('sqlite:///'):]
+if os.path.exists(_TEST_DB):
+    os.remove(_TEST_DB)
+
+# Every order table, children first: SQLite does not enforce ON DELETE CASCADE
+ORDER_TABLES = (OrderPassenger, OrderSearchToken, Order, OrderDailyStat, ChangeCounter)
+
+
+def push_test_app(*models):
+    """Create the test app, push its context and empty the tables of `models`.
+
+    Returns (app, ctx); the caller pops ctx.
+    """
+    app = create_app('testing')
+    if not (app.config['TESTING'] and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:')):
+        raise RuntimeError('refusing to run tests on a non-test database')
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    for model in models:
+        model.query.delete()
+    db.session.commit()
+    return app, ctx
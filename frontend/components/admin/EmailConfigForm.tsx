@@ -30,8 +30,10 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
     use_ssl: config?.use_ssl !== undefined ? config.use_ssl : true,
     use_starttls: config?.use_starttls || false,
     folder: config?.folder || 'INBOX',
+    folders: (config?.folders || []).join(', '),
     subject_filter: config?.subject_filter || '',
     sender_filter: config?.sender_filter || '',
+    body_filter: config?.body_filter || '',
     attachment_filter: config?.attachment_filter || '',
     is_active: config?.is_active !== undefined ? config.is_active : true
   });
@@ -80,6 +82,11 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
     return Object.keys(newErrors).length === 0;
   };
 
+  const buildPayload = () => ({
+    ...formData,
+    folders: formData.folders.split(',').map(f => f.trim()).filter(Boolean)
+  });
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     
@@ -90,15 +97,16 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
 
     try {
       let result;
+      const payload = buildPayload();
       
       if (isEditing && config) {
-        const updateData: UpdateEmailConfigData = { ...formData };
+        const updateData: UpdateEmailConfigData = { ...payload };
         if (!formData.password) {
           delete updateData.password; // Don't update password if not provided
         }
         result = await emailConfigService.updateEmailConfig(config.id, updateData);
       } else {
-        const createData: CreateEmailConfigData = formData;
+        const createData: CreateEmailConfigData = payload;
         result = await emailConfigService.createEmailConfig(createData);
       }
       
@@ -121,10 +129,11 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
     try {
       // For testing, we need to create a temporary config or use existing one
       let configToTest;
+      const payload = buildPayload();
       
       if (isEditing && config) {
         // Update the existing config first if we're editing
-        const updateData: UpdateEmailConfigData = { ...formData };
+        const updateData: UpdateEmailConfigData = { ...payload };
         if (!formData.password) {
           delete updateData.password;
         }
@@ -132,7 +141,7 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
         configToTest = config;
       } else {
         // Create the config first
-        const createData: CreateEmailConfigData = formData;
+        const createData: CreateEmailConfigData = payload;
         const result = await emailConfigService.createEmailConfig(createData);
         configToTest = result.data;
       }
@@ -329,6 +338,24 @@ const EmailConfigForm: React.FC<EmailConfigFormProps> = ({
                 helperText="Filter by file extensions (comma separated)"
               />
             </div>
+
+            <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+              <Input
+                label="Body Filter"
+                value={formData.body_filter}
+                onChange={(e) => handleInputChange('body_filter', e.target.value)}
+                placeholder="Classic Vacations"
+                helperText="Filter emails whose body contains this text (searched on the server)"
+              />
+              
+              <Input
+                label="Additional Folders"
+                value={formData.folders}
+                onChange={(e) => handleInputChange('folders', e.target.value)}
+                placeholder="Suppliers/Classic, Archive"
+                helperText="Other folders checked in the same session (comma separated)"
+              />
+            </div>
           </div>
 
           {/* Test Result */}
@@ -11,8 +11,10 @@ export interface EmailConfig {
   use_ssl: boolean;
   use_starttls: boolean;
   folder: string;
+  folders?: string[]; // Extra folders checked in the same IMAP session
   subject_filter?: string;
   sender_filter?: string;
+  body_filter?: string;
   attachment_filter?: string;
   is_active: boolean;
   last_check?: string;
@@ -33,8 +35,10 @@ export interface CreateEmailConfigData {
   use_ssl?: boolean;
   use_starttls?: boolean;
   folder?: string;
+  folders?: string[];
   subject_filter?: string;
   sender_filter?: string;
+  body_filter?: string;
   attachment_filter?: string;
   is_active?: boolean;
 }
@@ -48,8 +52,10 @@ export interface UpdateEmailConfigData {
   use_ssl?: boolean;
   use_starttls?: boolean;
   folder?: string;
+  folders?: string[];
   subject_filter?: string;
   sender_filter?: string;
+  body_filter?: string;
   attachment_filter?: string;
   is_active?: boolean;
 }